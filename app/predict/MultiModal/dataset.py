@@ -4,6 +4,8 @@ import numpy as np
 from torch.utils.data import Dataset
 import os
 import pandas as pd
+from app.predict.frame_store import read_frame
+
 class MultimodalDataset(Dataset):
     """사용자 정의 멀티모달 데이터셋"""
     def __init__(self, X: pandas.DataFrame, y: pandas.Series):
@@ -29,20 +31,41 @@ class MultimodalDataset(Dataset):
 
 class MultimodalTestDataset(Dataset):
     """사용자 정의 멀티모달 데이터셋"""
-    def __init__(self, X: pandas.DataFrame):
+    def __init__(self, X: pandas.DataFrame, frame_store=None):
         """필요한 데이터를 이곳에서 선언
             Parameter:
             X: 열화상 이미지와 센서데이터의 데이터 프레임
+            frame_store: 장비 열화상 프레임 저장소 (None 이면 개별 .bin 파일 로드)
             """
         self.X = X
+        self.frame_store = frame_store
+        # 센서 칼럼은 생성 시 한 번만 float32 배열로 변환 (항목마다 DataFrame 복사 방지)
+        self.filenames = X['filenames'].tolist()
+        self.sensors = np.ascontiguousarray(X.drop(columns=['filenames']).to_numpy(dtype=np.float32))
 
     def __getitem__(self, index):
-        """열화상 이미지 [1,120,160] 크기와 센서 데이터 11개의 칼럼 반환"""
-        image = torch.tensor(np.load(self.X.iloc[index]['filenames']), dtype=torch.float32).unsqueeze(0)
-        sensor_features = self.X.drop(columns=['filenames'])
-        sensor_features = torch.tensor(sensor_features.iloc[index].values, dtype=torch.float32)
+        """열화상 이미지 [1,120,160] 크기와 센서 데이터 11개의 칼럼 반환 (slice 는 배치 텐서 반환)"""
+        if isinstance(index, slice):
+            return self.get_batch(range(len(self))[index])
+        frame = read_frame(self.filenames[index], self.frame_store)
+        image = torch.tensor(frame, dtype=torch.float32).unsqueeze(0)
+        sensor_features = torch.from_numpy(self.sensors[index])
         return image, sensor_features
 
+    def get_batch(self, indices=None):
+        """여러 프레임을 collate 없이 한 번에 반환
+        return 열화상 이미지 [n,1,120,160], 센서 데이터 [n,11]
+        """
+        indices = list(range(len(self)) if indices is None else indices)
+        filenames = [self.filenames[index] for index in indices]
+        if self.frame_store is not None and all(filename in self.frame_store for filename in filenames):
+            frames = self.frame_store.read_many(filenames)
+        else:
+            frames = np.stack([read_frame(filename, self.frame_store) for filename in filenames])
+        images = torch.from_numpy(np.asarray(frames, dtype=np.float32)).unsqueeze(1)
+        sensor_features = torch.from_numpy(self.sensors[indices])
+        return images, sensor_features
+
     def __len__(self):
         return len(self.X)
     
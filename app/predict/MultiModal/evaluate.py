@@ -0,0 +1,113 @@
+"""기준 모델(fp32, 전체 Transformer)과 추론용 변형 모델의 예측 일치도 비교
+
+사용 예:
+    python -m app.predict.MultiModal.evaluate --device-type AGV --numbers 17 18 --limit 600
+"""
+import argparse
+import sys
+import time
+
+import joblib
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader
+
+from app.predict.dbfunc import Database
+from app.predict.MultiModal.dataset import MultimodalTestDataset
+from app.predict.MultiModal.model import ConditionClassifier
+
+MODEL_CONFIG = {
+    "img_dim_h": 120,
+    "img_dim_w": 160,
+    "patch_size": 16,
+    "embed_dim": 256,
+    "num_heads": 8,
+    "depth": 6,
+    "aux_input_dim": 11,
+    "num_classes": 4
+}
+PARAMETERS_DIR = 'app/predict/Parameters'
+
+
+def load_test_frames(device_type: str, numbers, base_path='./data', limit=None) -> pd.DataFrame:
+    """data/{agv,oht}NN_test_df 파일을 읽어 모델 입력 형태(filenames + 센서 11개)로 반환"""
+    frames = []
+    for number in numbers:
+        with open(f'{base_path}/{device_type.lower()}{number}_test_df', 'rb') as file:
+            df = Database.preprocess_dataframe(joblib.load(file))
+        frames.append(df.head(limit) if limit else df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_model(device_type: str, encoder_only=False, parameters_dir=PARAMETERS_DIR) -> ConditionClassifier:
+    """저장된 *_Best_State_Model.pth 가중치로 모델 생성"""
+    model = ConditionClassifier(**MODEL_CONFIG, encoder_only=encoder_only)
+    path = f'{parameters_dir}/{device_type}_Best_State_Model.pth'
+    model.load_state_dict(torch.load(path, map_location='cpu'))
+    return model.eval()
+
+
+def collect_logits(model, dataloader):
+    """데이터로더 전체에 대한 로짓과 추론 시간(초) 반환"""
+    outputs = []
+    elapsed = 0.0
+    with torch.inference_mode():
+        for images, sensors in dataloader:
+            start = time.perf_counter()
+            outputs.append(model(images, sensors))
+            elapsed += time.perf_counter() - start
+    return torch.cat(outputs), elapsed
+
+
+def compare_models(reference, candidate, dataloader, num_classes=4) -> dict:
+    """두 모델의 클래스 예측 일치율, 로짓 오차, 클래스 분포 및 속도 비교"""
+    ref_logits, ref_time = collect_logits(reference, dataloader)
+    cand_logits, cand_time = collect_logits(candidate, dataloader)
+    ref_pred = torch.argmax(ref_logits, dim=1)
+    cand_pred = torch.argmax(cand_logits, dim=1)
+
+    per_class = {}
+    for cls in range(num_classes):
+        mask = ref_pred == cls
+        if mask.any():
+            per_class[cls] = round((cand_pred[mask] == cls).float().mean().item(), 4)
+
+    return {
+        'frames': len(ref_pred),
+        'agreement': round((ref_pred == cand_pred).float().mean().item(), 4),
+        'per_class_agreement': per_class,
+        'max_abs_logit_diff': round((ref_logits - cand_logits).abs().max().item(), 4),
+        'reference_distribution': torch.bincount(ref_pred, minlength=num_classes).tolist(),
+        'candidate_distribution': torch.bincount(cand_pred, minlength=num_classes).tolist(),
+        'reference_seconds': round(ref_time, 3),
+        'candidate_seconds': round(cand_time, 3),
+        'speedup': round(ref_time / cand_time, 2) if cand_time else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="인코더 전용 추론 경로와 기준 모델의 예측 일치도 검증")
+    parser.add_argument('--device-type', choices=['AGV', 'OHT'], default='AGV')
+    parser.add_argument('--numbers', nargs='+', default=['17', '18'])
+    parser.add_argument('--limit', type=int, default=None, help="장비별 최대 프레임 수")
+    parser.add_argument('--batch-size', type=int, default=300)
+    parser.add_argument('--min-agreement', type=float, default=0.95,
+                        help="허용 최소 클래스 일치율 (미달 시 종료 코드 1)")
+    args = parser.parse_args(argv)
+
+    df = load_test_frames(args.device_type, args.numbers, limit=args.limit)
+    dataloader = DataLoader(MultimodalTestDataset(df), batch_size=args.batch_size)
+    report = compare_models(
+        build_model(args.device_type),
+        build_model(args.device_type, encoder_only=True),
+        dataloader,
+        num_classes=MODEL_CONFIG['num_classes']
+    )
+
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    return 0 if report['agreement'] >= args.min_agreement else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,27 +3,54 @@ from torch.utils.data import Dataset, DataLoader
 import torch.nn as nn
 import torch.nn.functional as F
 
+class TransformerEncoderOnly(nn.Module):
+    """nn.Transformer 에서 인코더만 남긴 모듈 (state_dict 키 `encoder.*` 를 그대로 사용)"""
+    def __init__(self, d_model, nhead, num_encoder_layers):
+        super().__init__()
+        encoder_layer = nn.TransformerEncoderLayer(d_model=d_model, nhead=nhead, batch_first=True)
+        # nn.Transformer 와 동일하게 마지막에 LayerNorm 적용
+        self.encoder = nn.TransformerEncoder(encoder_layer, num_encoder_layers, norm=nn.LayerNorm(d_model))
+
+    def forward(self, x):
+        return self.encoder(x)
+
 class ViTFeatureExtractor(nn.Module):
-    def __init__(self, img_dim_h, img_dim_w, patch_size, embed_dim, num_heads, depth):
+    def __init__(self, img_dim_h, img_dim_w, patch_size, embed_dim, num_heads, depth, encoder_only=False):
         super().__init__()
+        self.encoder_only = encoder_only
         # Transformer 설정
-        self.vit = nn.Transformer(
-            d_model=embed_dim,
-            nhead=num_heads,
-            num_encoder_layers=depth,
-            batch_first=True
-        )
+        if encoder_only:
+            # 추론 전용 경로: 디코더 6층을 생략하여 프레임당 연산량 약 절반으로 감소
+            self.vit = TransformerEncoderOnly(d_model=embed_dim, nhead=num_heads, num_encoder_layers=depth)
+        else:
+            self.vit = nn.Transformer(
+                d_model=embed_dim,
+                nhead=num_heads,
+                num_encoder_layers=depth,
+                batch_first=True
+            )
         # Patch embedding: 채널을 1로 설정
         self.patch_embed = nn.Conv2d(1, embed_dim, kernel_size=patch_size, stride=patch_size)
         # 포지셔널 임베딩
         num_patches = (img_dim_h // patch_size) * (img_dim_w // patch_size)
         self.pos_embedding = nn.Parameter(torch.randn(1, num_patches, embed_dim))
 
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # 기존 *_Best_State_Model.pth 체크포인트의 디코더 가중치는 인코더 전용 모드에서 사용하지 않음
+        if self.encoder_only:
+            decoder_prefix = prefix + 'vit.decoder.'
+            for key in [key for key in state_dict if key.startswith(decoder_prefix)]:
+                del state_dict[key]
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
     def forward(self, x):
         # x: [batch_size, 1, img_dim_h, img_dim_w]
         patches = self.patch_embed(x).flatten(2).transpose(1, 2)  # [batch_size, num_patches, embed_dim]
         x = patches + self.pos_embedding  # Positional embedding 추가
-        x = self.vit(x, x)  # [batch_size, num_patches, embed_dim]
+        if self.encoder_only:
+            x = self.vit(x)  # [batch_size, num_patches, embed_dim]
+        else:
+            x = self.vit(x, x)  # [batch_size, num_patches, embed_dim]
         return x.mean(dim=1)  # [batch_size, embed_dim]
 
 class SoftLabelEncoder(nn.Module):
@@ -49,9 +76,9 @@ class CrossAttention(nn.Module):
 
 class ConditionClassifier(nn.Module):
               
-    def __init__(self, img_dim_h,img_dim_w, patch_size, embed_dim, num_heads, depth, aux_input_dim, num_classes):
+    def __init__(self, img_dim_h,img_dim_w, patch_size, embed_dim, num_heads, depth, aux_input_dim, num_classes, encoder_only=False):
         super().__init__()
-        self.vit = ViTFeatureExtractor(img_dim_h, img_dim_w, patch_size, embed_dim, num_heads, depth)
+        self.vit = ViTFeatureExtractor(img_dim_h, img_dim_w, patch_size, embed_dim, num_heads, depth, encoder_only)
         self.soft_label_encoder = SoftLabelEncoder(aux_input_dim, embed_dim)
         self.cross_attention = CrossAttention(embed_dim, num_heads)
         self.classifier = nn.Sequential(
@@ -0,0 +1,115 @@
+"""ConditionClassifier 추론용 변형 모델(INT8 동적 양자화, TorchScript) 생성 및 로드
+
+사용 예:
+    python -m app.predict.MultiModal.variants --device-type AGV --numbers 17 18 --limit 600
+
+Parameters/ 폴더에 변형 모델을 저장하고, 기준 fp32 모델 대비 정확도 변화 리포트
+({device_type}_variant_report.json)를 함께 생성합니다.
+"""
+import argparse
+import json
+import sys
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+
+from app.predict.MultiModal.dataset import MultimodalTestDataset
+from app.predict.MultiModal.evaluate import (MODEL_CONFIG, PARAMETERS_DIR, build_model,
+                                             compare_models, load_test_frames)
+from app.predict.MultiModal.model import ConditionClassifier
+
+MODEL_VARIANTS = ('fp32', 'int8', 'torchscript')
+
+
+def variant_path(device_type: str, variant: str, encoder_only=False, parameters_dir=PARAMETERS_DIR) -> str:
+    """변형 모델 파일 경로 (fp32 는 기존 *_Best_State_Model.pth)"""
+    if variant == 'fp32':
+        return f'{parameters_dir}/{device_type}_Best_State_Model.pth'
+    suffix = '_encoder' if encoder_only else ''
+    extension = 'pth' if variant == 'int8' else 'pt'
+    return f'{parameters_dir}/{device_type}_Best_State_Model{suffix}_{variant}.{extension}'
+
+
+def quantize_model(model: ConditionClassifier) -> nn.Module:
+    """Linear 계층(어텐션 out_proj, FFN, 분류기)을 INT8 동적 양자화"""
+    quantized = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    # 양자화된 Linear 는 Transformer fastpath 커널을 사용할 수 없으므로 해당 레이어의 fastpath 비활성화
+    # activation_relu_or_gelu 는 PyTorch 1.12 이후 TransformerEncoderLayer 의 비공개 fastpath 플래그 (2.x 에서 확인,
+    # DecoderLayer 에는 없음) - 이름이 바뀐 버전에서는 건드리지 않음
+    for module in quantized.modules():
+        if isinstance(module, nn.TransformerEncoderLayer) and hasattr(module, 'activation_relu_or_gelu'):
+            module.activation_relu_or_gelu = 0
+    return quantized.eval()
+
+
+def export_variants(device_type: str, encoder_only=False, parameters_dir=PARAMETERS_DIR) -> dict:
+    """fp32 가중치로부터 INT8 / TorchScript 변형 모델 파일 생성"""
+    model = build_model(device_type, encoder_only=encoder_only, parameters_dir=parameters_dir)
+    example = (
+        torch.zeros(1, 1, MODEL_CONFIG['img_dim_h'], MODEL_CONFIG['img_dim_w']),
+        torch.zeros(1, MODEL_CONFIG['aux_input_dim'])
+    )
+
+    paths = {}
+    paths['int8'] = variant_path(device_type, 'int8', encoder_only, parameters_dir)
+    torch.save(quantize_model(model).state_dict(), paths['int8'])
+
+    paths['torchscript'] = variant_path(device_type, 'torchscript', encoder_only, parameters_dir)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(model, example))
+    torch.jit.save(scripted, paths['torchscript'])
+    return paths
+
+
+def load_model_variant(device_type: str, variant='fp32', encoder_only=False, parameters_dir=PARAMETERS_DIR):
+    """추론용 모델 로드 - variant: 'fp32' | 'int8' | 'torchscript'"""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant: {variant}")
+    if variant == 'fp32':
+        return build_model(device_type, encoder_only=encoder_only, parameters_dir=parameters_dir)
+
+    path = variant_path(device_type, variant, encoder_only, parameters_dir)
+    if variant == 'torchscript':
+        return torch.jit.load(path, map_location='cpu').eval()
+
+    model = quantize_model(ConditionClassifier(**MODEL_CONFIG, encoder_only=encoder_only).eval())
+    model.load_state_dict(torch.load(path, map_location='cpu'))
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="INT8 / TorchScript 변형 모델 생성 및 정확도 변화 리포트")
+    parser.add_argument('--device-type', choices=['AGV', 'OHT'], default='AGV')
+    parser.add_argument('--encoder-only', action='store_true', help="인코더 전용 경로로 변형 모델 생성")
+    parser.add_argument('--numbers', nargs='+', default=['17', '18'])
+    parser.add_argument('--limit', type=int, default=None, help="장비별 최대 프레임 수")
+    parser.add_argument('--batch-size', type=int, default=300)
+    args = parser.parse_args(argv)
+
+    paths = export_variants(args.device_type, args.encoder_only)
+    for variant, path in paths.items():
+        print(f"[{variant}] saved: {path}")
+
+    df = load_test_frames(args.device_type, args.numbers, limit=args.limit)
+    dataloader = DataLoader(MultimodalTestDataset(df), batch_size=args.batch_size)
+    reference = build_model(args.device_type)
+
+    report = {}
+    for variant in MODEL_VARIANTS:
+        candidate = load_model_variant(args.device_type, variant, args.encoder_only)
+        report[variant] = compare_models(reference, candidate, dataloader,
+                                         num_classes=MODEL_CONFIG['num_classes'])
+        print(f"[{variant}] agreement: {report[variant]['agreement']}, speedup: {report[variant]['speedup']}")
+
+    suffix = '_encoder' if args.encoder_only else ''
+    report_path = f'{PARAMETERS_DIR}/{args.device_type}{suffix}_variant_report.json'
+    with open(report_path, 'w', encoding='utf-8') as file:
+        json.dump({'encoder_only': args.encoder_only, 'numbers': args.numbers, 'variants': report},
+                  file, ensure_ascii=False, indent=2)
+    print(f"report saved: {report_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
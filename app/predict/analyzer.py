@@ -1,7 +1,32 @@
 import numpy as np
 import pandas as pd
 from typing import Dict
-from scipy.stats import norm
+
+STATES = ['정상', '주의', '경고', '위험']
+
+class GaussianStateEngine:
+    """센서별 상태 정규분포를 mu/sigma/로그 정규화 상수 배열로 보관하고
+    [행 × 센서 × 상태] 블록의 사후확률을 log 공간에서 한 번에 계산"""
+    def __init__(self, distributions: Dict, sensors: list, states: list = STATES):
+        self.sensors = list(sensors)
+        self.states = list(states)
+        self.mu = np.array([[distributions[sensor][state]['mu'] for state in self.states]
+                            for sensor in self.sensors])  # [sensors, states]
+        self.sigma = np.array([[distributions[sensor][state]['sigma'] for state in self.states]
+                               for sensor in self.sensors])
+        self.log_norm = -np.log(self.sigma) - 0.5 * np.log(2 * np.pi)
+
+    def log_likelihoods(self, values: np.ndarray) -> np.ndarray:
+        """values [..., sensors] -> 로그 가능도 [..., sensors, states]"""
+        z = (np.asarray(values, dtype=np.float64)[..., None] - self.mu) / self.sigma
+        return self.log_norm - 0.5 * z * z
+
+    def posteriors(self, values: np.ndarray) -> np.ndarray:
+        """균등 사전확률 기준 상태 사후확률 [..., sensors, states] (log-sum-exp 로 underflow 방지)"""
+        log_likelihoods = self.log_likelihoods(values)
+        log_likelihoods -= log_likelihoods.max(axis=-1, keepdims=True)
+        probabilities = np.exp(log_likelihoods)
+        return probabilities / probabilities.sum(axis=-1, keepdims=True)
 
 class ImprovedSensorAnalyzer:
     def __init__(self, model_config):
@@ -221,36 +246,72 @@ class ImprovedSensorAnalyzer:
             }
         }
 
+        # 분포 딕셔너리를 배열로 미리 변환한 장비 타입별 상태 확률 엔진
+        self.agv_engine = GaussianStateEngine(self.agv_sensor_distributions, self.sensor_columns)
+        self.oht_engine = GaussianStateEngine(self.oht_sensor_distributions, self.sensor_columns)
+
+    def get_engine(self, device_id: str) -> GaussianStateEngine:
+        """장비 타입에 맞는 상태 확률 엔진 반환"""
+        return self.oht_engine if 'oht' in device_id.lower() else self.agv_engine
+
     def calculate_state_probabilities(self, sensor: str, value: float, device_id: str) -> Dict[str, float]:
         # 장비 타입에 따라 적절한 분포 선택
-        is_oht = 'oht' in device_id.lower()
-        distributions = self.oht_sensor_distributions if is_oht else self.agv_sensor_distributions
-        
-        if sensor not in distributions:
-            return {'정상': 0.25, '주의': 0.25, '경고': 0.25, '위험': 0.25}
-            
-        sensor_dist = distributions[sensor]
-        likelihoods = {
-            state: norm.pdf(value, dist['mu'], dist['sigma'])
-            for state, dist in sensor_dist.items()
-        }
+        engine = self.get_engine(device_id)
         
-        total = sum(likelihoods.values())
-        if total == 0:
+        if sensor not in engine.sensors:
             return {'정상': 0.25, '주의': 0.25, '경고': 0.25, '위험': 0.25}
             
-        return {state: likelihood/total for state, likelihood in likelihoods.items()}
+        index = engine.sensors.index(sensor)
+        values = np.zeros(len(engine.sensors))
+        values[index] = value
+        probabilities = engine.posteriors(values)[index]
+        return dict(zip(engine.states, probabilities.tolist()))
+
+    def window_state_probabilities(self, device_id: str, window_data: pd.DataFrame) -> np.ndarray:
+        """윈도우 전체 행의 센서별 상태 사후확률 [rows, sensors, states] (센서 순서: self.sensor_columns)"""
+        engine = self.get_engine(device_id)
+        return engine.posteriors(window_data[engine.sensors].to_numpy(dtype=np.float64))
 
-    def analyze_device_status(self, device_id: str, window_data: pd.DataFrame) -> Dict:
+    def window_statistics(self, device_id: str, window_data: pd.DataFrame) -> Dict:
+        """윈도우 전체를 한 번에 계산한 센서별 통계 (RollingSensorStats.snapshot 과 같은 형식)"""
+        engine = self.get_engine(device_id)
+        values = window_data[engine.sensors].to_numpy(dtype=np.float64)
+        posteriors = engine.posteriors(values)
+        states = posteriors.argmax(axis=-1)
+        statistics = {}
+        for index, sensor in enumerate(engine.sensors):
+            statistics[sensor] = {
+                'mean': float(values[:, index].mean()),
+                'std': float(values[:, index].std()),
+                'min': float(values[:, index].min()),
+                'max': float(values[:, index].max()),
+                'count': len(values),
+                'state_counts': dict(zip(engine.states, np.bincount(states[:, index], minlength=len(engine.states)).tolist())),
+                'state_probabilities': dict(zip(engine.states, posteriors[:, index].mean(axis=0).tolist()))
+            }
+        return statistics
+
+    def analyze_device_status(self, device_id: str, window_data: pd.DataFrame, window_stats: Dict = None) -> Dict:
+        """
+        window_stats: 모니터가 유지하는 RollingSensorStats.snapshot() 결과 (없으면 윈도우 전체 재계산)
+        """
         try:
             sensor_details = {}
             critical_messages = []
             warning_messages = []
             latest_data = window_data.iloc[-1]
 
-            for sensor in self.sensor_columns:
+            is_oht = 'oht' in device_id.lower()
+            distributions = self.oht_sensor_distributions if is_oht else self.agv_sensor_distributions
+            engine = self.get_engine(device_id)
+            if window_stats is None:
+                window_stats = self.window_statistics(device_id, window_data)
+            # 현재 상태는 마지막 행 기준
+            latest_probabilities = engine.posteriors(latest_data[engine.sensors].to_numpy(dtype=np.float64))
+
+            for index, sensor in enumerate(self.sensor_columns):
                 current_value = float(latest_data[sensor])
-                probabilities = self.calculate_state_probabilities(sensor, current_value, device_id)
+                probabilities = dict(zip(engine.states, latest_probabilities[index].tolist()))
                 
                 status = max(probabilities.items(), key=lambda x: x[1])[0]
                 message = self._get_sensor_message(sensor, current_value, status, device_id)
@@ -261,22 +322,21 @@ class ImprovedSensorAnalyzer:
                     elif status == '경고':
                         warning_messages.append(message)
 
-                values = window_data[sensor].values
-                mean_value = np.mean(values)
-                std_value = np.std(values)
-                
-                is_oht = 'oht' in device_id.lower()
-                distributions = self.oht_sensor_distributions if is_oht else self.agv_sensor_distributions
+                stats = window_stats[sensor]
                 normal_range = self._get_normal_range(sensor, distributions)
                 
                 sensor_details[sensor] = {
                     'current_value': current_value,
-                    'mean': mean_value,
-                    'std': std_value,
+                    'mean': stats['mean'],
+                    'std': stats['std'],
+                    'min': stats['min'],
+                    'max': stats['max'],
                     'normal_range': normal_range,
                     'status': status,
                     'message': message,
-                    'state_probabilities': probabilities
+                    'state_probabilities': probabilities,
+                    'window_state_probabilities': stats.get('state_probabilities'),
+                    'window_state_counts': stats.get('state_counts')
                 }
 
             summary = self._generate_summary(critical_messages, warning_messages)
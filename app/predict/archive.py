@@ -0,0 +1,173 @@
+"""오래된 측정/상태 데이터의 Parquet 보관(cold storage)과 SQLite + Parquet 통합 조회
+
+sensor_data.db 에는 최근 데이터만 두고, 지난 날짜의 행은 장비/일 단위 Parquet 파일로 옮깁니다.
+    {ARCHIVE_ROOT}/{table}/{device_id}/{YYYY-MM-DD}.parquet   (장비 칼럼이 없는 테이블은 device_id = 'all')
+
+query_range 는 조회 구간에 걸치는 Parquet 파일과 SQLite 행을 합쳐 하나의 DataFrame 으로 반환합니다.
+
+보관 실행 (프로젝트 루트에서, 기본: ARCHIVE_AFTER_DAYS 일 이전 데이터):
+    python -m app.predict.archive [days]
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+ARCHIVE_ROOT = os.getenv('MONOGUARD_ARCHIVE_ROOT', './data/archive')
+ARCHIVE_AFTER_DAYS = int(os.getenv('MONOGUARD_ARCHIVE_AFTER_DAYS', 7))
+COMPRESSION = 'zstd'
+
+# 보관 대상: 테이블 -> (시각 칼럼, 장비 칼럼(None 이면 공용))
+ARCHIVE_TABLES = {
+    'sensor_timeseries': ('timestamp', 'device_id'),
+    'environment_measurements': ('timestamp', None),
+    'aggregated_device_status': ('aggregation_end', 'device_id')
+}
+SHARED_DEVICE = 'all'
+
+
+def _partition_path(table, device_id, day, root=ARCHIVE_ROOT):
+    return os.path.join(root, table, device_id, f'{day}.parquet')
+
+
+def _key_columns(table):
+    time_column, device_column = ARCHIVE_TABLES[table]
+    return [device_column, time_column] if device_column else [time_column]
+
+
+def _sort_columns(table):
+    time_column, device_column = ARCHIVE_TABLES[table]
+    return [time_column, device_column] if device_column else [time_column]
+
+
+def _normalize(df, table):
+    """시각 칼럼을 datetime 으로 통일 (SQLite 는 문자열로 저장)"""
+    time_column = ARCHIVE_TABLES[table][0]
+    df[time_column] = pd.to_datetime(df[time_column], format='ISO8601')
+    return df
+
+
+def _write_partition(df, path, table):
+    """파티션 파일 쓰기 - 기존 파일이 있으면 합친 뒤 키 기준 중복 제거, 임시 파일 교체로 원자적 저장"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        df = pd.concat([pd.read_parquet(path), df], ignore_index=True)
+        df = df.drop_duplicates(subset=_key_columns(table), keep='last')
+    df = df.sort_values(_sort_columns(table)).reset_index(drop=True)
+    temp_path = f'{path}.tmp'
+    df.to_parquet(temp_path, compression=COMPRESSION, index=False)
+    os.replace(temp_path, path)
+
+
+def archive_table(db, table, cutoff, root=ARCHIVE_ROOT):
+    """cutoff 날짜 이전(당일 제외) 행을 Parquet 로 옮기고 SQLite 에서 삭제 - 옮긴 행 수 반환
+    aggregated_device_status 는 장비별 최신 상태 행을 남겨 둠
+    """
+    time_column, device_column = ARCHIVE_TABLES[table]
+    cutoff = datetime.combine(cutoff.date() if isinstance(cutoff, datetime) else cutoff, datetime.min.time())
+    keep_latest = ''
+    if table == 'aggregated_device_status':
+        keep_latest = f'''
+        AND {time_column} < (SELECT MAX(latest.{time_column}) FROM {table} latest
+                             WHERE latest.{device_column} = {table}.{device_column})
+        '''
+    condition = f'{time_column} < ? {keep_latest}'
+
+    with db.read() as conn:
+        df = pd.read_sql(f'SELECT * FROM {table} WHERE {condition}', conn, params=(cutoff,))
+    if df.empty:
+        return 0
+
+    df = _normalize(df, table)
+    devices = df[device_column] if device_column else pd.Series(SHARED_DEVICE, index=df.index)
+    days = df[time_column].dt.strftime('%Y-%m-%d')
+    for (device_id, day), partition in df.groupby([devices, days]):
+        _write_partition(partition, _partition_path(table, device_id, day, root), table)
+
+    # Parquet 저장이 끝난 뒤에만 삭제 (중간 실패 시 다음 실행에서 중복 제거 후 다시 저장)
+    with db.write() as conn:
+        conn.execute(f'DELETE FROM {table} WHERE {condition}', (cutoff,))
+    return len(df)
+
+
+def archive_before(db, cutoff, tables=ARCHIVE_TABLES, root=ARCHIVE_ROOT):
+    """보관 대상 테이블 전체 보관 - 테이블별 옮긴 행 수 반환"""
+    return {table: archive_table(db, table, cutoff, root) for table in tables}
+
+
+def _cold_files(table, start, end, device_id=None, root=ARCHIVE_ROOT):
+    """조회 구간에 걸치는 파티션 파일 목록"""
+    table_root = os.path.join(root, table)
+    if not os.path.isdir(table_root):
+        return []
+    if ARCHIVE_TABLES[table][1] is None:
+        devices = [SHARED_DEVICE]
+    elif device_id is not None:
+        devices = [device_id]
+    else:
+        devices = sorted(os.listdir(table_root))
+
+    first_day = start.strftime('%Y-%m-%d') if start is not None else ''
+    last_day = end.strftime('%Y-%m-%d') if end is not None else '9999-12-31'
+    files = []
+    for device in devices:
+        device_root = os.path.join(table_root, device)
+        if not os.path.isdir(device_root):
+            continue
+        files.extend(os.path.join(device_root, name) for name in sorted(os.listdir(device_root))
+                     if name.endswith('.parquet') and first_day <= name[:-len('.parquet')] <= last_day)
+    return files
+
+
+def query_range(db, table, start=None, end=None, device_id=None, columns=None, root=ARCHIVE_ROOT):
+    """SQLite(최근) + Parquet(과거) 행을 합쳐 시각 순으로 반환
+    start/end: datetime 또는 ISO 문자열 (None 이면 제한 없음)
+    columns: 조회할 칼럼 (None 이면 전체, 시각/장비 칼럼은 항상 포함)
+    """
+    time_column, device_column = ARCHIVE_TABLES[table]
+    start = pd.Timestamp(start).to_pydatetime() if start is not None else None
+    end = pd.Timestamp(end).to_pydatetime() if end is not None else None
+    if columns is not None:
+        columns = list(dict.fromkeys([*_key_columns(table), *columns]))
+
+    conditions, params = [], []
+    if device_column and device_id is not None:
+        conditions.append(f'{device_column} = ?')
+        params.append(device_id)
+    if start is not None:
+        conditions.append(f'{time_column} >= ?')
+        params.append(start)
+    if end is not None:
+        conditions.append(f'{time_column} <= ?')
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    with db.read() as conn:
+        hot = pd.read_sql(f"SELECT {', '.join(columns) if columns else '*'} FROM {table} {where}",
+                          conn, params=params)
+    frames = [_normalize(hot, table)] if not hot.empty else []
+
+    filters = []
+    if start is not None:
+        filters.append((time_column, '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append((time_column, '<=', pd.Timestamp(end)))
+    for path in _cold_files(table, start, end, device_id, root):
+        cold = pd.read_parquet(path, columns=columns, filters=filters or None)
+        if not cold.empty:
+            frames.append(cold)
+
+    if not frames:
+        return hot
+    # 같은 키가 양쪽에 있으면 SQLite(최근 값) 우선
+    df = pd.concat(frames[::-1], ignore_index=True)
+    df = df.drop_duplicates(subset=_key_columns(table), keep='last')
+    return df.sort_values(_sort_columns(table)).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    from app.predict.dbfunc import Database
+
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    moved = archive_before(Database(), datetime.now() - timedelta(days=days))
+    print(f"보관 완료 ({days}일 이전): {moved}")
@@ -0,0 +1,284 @@
+"""전체 장비 일괄 리포트 생성 (교대 인수인계용)
+
+저장된 분석 결과(device_analysis)로 기간 내 모든 장비의 리포트를 한 번에 만듭니다.
+- 결론 문단: 스레드 풀에서 병렬 요청 (같은 입력은 결론 캐시 사용)
+- PDF 렌더링: 프로세스 풀 - 프로세스마다 ReportRenderer 하나를 만들어 템플릿/CSS/글꼴 재사용
+- 결과: {REPORTS_DIR}/batch/{batch_id}/{device_id}.pdf + manifest.json, zip 은 요청 시 생성
+- 보관: 최근 MAX_REPORT_BATCHES 개만 남기고 오래된 일괄 디렉터리부터 삭제
+- BatchReportScheduler 가 교대 시각(BATCH_REPORT_HOURS)마다 직전 교대 구간을 자동 생성
+
+수동 실행 (프로젝트 루트에서, OPENAI_API_KEY 필요):
+    python -m app.predict.batch_reports --start 2025-01-01T06:00 --end 2025-01-01T14:00
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.predict.reports import ReportRenderer, REPORT_TEMPLATE_DIR
+
+REPORTS_DIR = os.getenv('MONOGUARD_REPORTS_DIR', 'reports')
+BATCH_DIR = os.path.join(REPORTS_DIR, 'batch')
+MANIFEST = 'manifest.json'
+# 교대 시각 (쉼표 구분, 빈 값이면 자동 생성 안 함)
+BATCH_REPORT_HOURS = [int(hour) for hour in os.getenv('MONOGUARD_BATCH_REPORT_HOURS', '6,14,22').split(',')
+                      if hour.strip()]
+RENDER_WORKERS = int(os.getenv('MONOGUARD_REPORT_RENDER_WORKERS', os.cpu_count() or 2))
+CONCLUSION_WORKERS = 8
+# 보관할 일괄 리포트 수 (기본 교대 3회/일 기준 10일)
+MAX_REPORT_BATCHES = int(os.getenv('MONOGUARD_MAX_REPORT_BATCHES', 30))
+BATCH_ID_PATTERN = re.compile(r'^[0-9]{8}_[0-9]{6}_[0-9a-f]{6}$')
+
+_worker_renderer = None
+
+
+def _init_render_worker(template_dir):
+    """렌더링 프로세스 초기화 - 프로세스당 렌더러 1개"""
+    global _worker_renderer
+    _worker_renderer = ReportRenderer(template_dir)
+
+
+def _render_task(task):
+    device_id, status_row, analysis_row, conclusion, path = task
+    return _worker_renderer.render(device_id, status_row, analysis_row, conclusion, path)
+
+
+def batch_path(batch_id, root=BATCH_DIR):
+    """batch_id 의 디렉터리 (형식이 맞지 않으면 ValueError)"""
+    if not BATCH_ID_PATTERN.match(batch_id):
+        raise ValueError(f"Invalid batch id: {batch_id}")
+    return os.path.join(root, batch_id)
+
+
+def new_batch_id(now=None):
+    """생성 시각 + 임의 접미사 (정렬하면 시간순)"""
+    return f"{(now or datetime.now()).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def _write_manifest(directory, manifest):
+    temp_path = os.path.join(directory, f'{MANIFEST}.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    os.replace(temp_path, os.path.join(directory, MANIFEST))
+
+
+def _time_text(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def create_batch(start=None, end=None, root=BATCH_DIR):
+    """대기(pending) 상태 manifest 를 먼저 저장하고 batch_id 반환 (생성 전에도 조회 가능)"""
+    batch_id = new_batch_id()
+    directory = batch_path(batch_id, root)
+    os.makedirs(directory, exist_ok=True)
+    _write_manifest(directory, {
+        'batch_id': batch_id,
+        'status': 'pending',
+        'start': _time_text(start),
+        'end': _time_text(end),
+        'created_at': datetime.now().isoformat(),
+        'finished_at': None,
+        'reports': []
+    })
+    return batch_id
+
+
+def generate_batch(db, conclusion_func, device_ids=None, start=None, end=None, device_type=None,
+                   root=BATCH_DIR, render_workers=RENDER_WORKERS, batch_id=None, max_batches=MAX_REPORT_BATCHES):
+    """기간(start~end) 내 최신 분석으로 장비별 리포트 일괄 생성 - manifest 반환
+    device_ids 가 None 이면 상태/분석 기록이 있는 전체 장비 (device_type 으로 AGV/OHT 제한)
+    batch_id: create_batch 로 미리 만든 일괄 ID (None 이면 새로 생성)
+    """
+    started_at = datetime.now()
+    batch_id = batch_id or new_batch_id(started_at)
+    directory = batch_path(batch_id, root)
+    os.makedirs(directory, exist_ok=True)
+    queued = load_manifest(batch_id, root)
+    if device_ids is None:
+        device_ids = db.get_fleet_status(device_type)['device_id']
+
+    entries = {}
+    tasks = []
+    for device_id in device_ids:
+        status_row, analysis_row = db.get_report_rows(device_id, start, end)
+        if not status_row or not analysis_row:
+            entries[device_id] = {'device_id': device_id, 'status': 'skipped',
+                                  'error': 'no status/analysis data in range'}
+            continue
+        entries[device_id] = {'device_id': device_id, 'status': 'pending', 'file': f'{device_id}.pdf',
+                              'analysis_timestamp': analysis_row[0], 'device_status': status_row[0]}
+        tasks.append((device_id, status_row, analysis_row))
+
+    manifest = {
+        'batch_id': batch_id,
+        'status': 'running',
+        'start': _time_text(start),
+        'end': _time_text(end),
+        'created_at': queued['created_at'] if queued else started_at.isoformat(),
+        'finished_at': None,
+        'reports': list(entries.values())
+    }
+    _write_manifest(directory, manifest)
+
+    # 결론 요청은 네트워크 대기이므로 스레드로 병렬 처리
+    with ThreadPoolExecutor(max_workers=CONCLUSION_WORKERS, thread_name_prefix='report-conclusion') as pool:
+        conclusions = list(pool.map(lambda task: _safe_call(conclusion_func, task[0], task[2]), tasks))
+
+    render_tasks = []
+    for (device_id, status_row, analysis_row), (conclusion, error) in zip(tasks, conclusions):
+        if error is not None:
+            entries[device_id].update(status='failed', error=error)
+            continue
+        render_tasks.append((device_id, status_row, analysis_row, conclusion,
+                             os.path.join(directory, entries[device_id]['file'])))
+
+    # WeasyPrint 렌더링은 CPU 작업이므로 프로세스 풀 (모니터 스레드가 있는 프로세스라 fork 대신 spawn)
+    if render_tasks:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max(1, min(render_workers, len(render_tasks))), mp_context=context,
+                                 initializer=_init_render_worker,
+                                 initargs=(os.path.abspath(REPORT_TEMPLATE_DIR),)) as pool:
+            futures = {task[0]: pool.submit(_render_task, task) for task in render_tasks}
+            for device_id, future in futures.items():
+                try:
+                    future.result()
+                    entries[device_id]['status'] = 'done'
+                except Exception as e:
+                    entries[device_id].update(status='failed', error=str(e))
+
+    manifest.update(status='done', finished_at=datetime.now().isoformat(), reports=list(entries.values()))
+    _write_manifest(directory, manifest)
+    done = sum(entry['status'] == 'done' for entry in entries.values())
+    print(f"Batch report {batch_id}: {done}/{len(entries)} reports "
+          f"({(datetime.now() - started_at).total_seconds():.1f}s)")
+    evict_batches(root, max_batches, keep=batch_id)
+    return manifest
+
+
+def _safe_call(func, *args):
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, str(e)
+
+
+def load_manifest(batch_id, root=BATCH_DIR):
+    """batch_id 의 manifest (없으면 None)"""
+    path = os.path.join(batch_path(batch_id, root), MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def list_batches(root=BATCH_DIR, limit=50):
+    """최근 일괄 생성 manifest 목록 (최신순)"""
+    if not os.path.isdir(root):
+        return []
+    batch_ids = sorted((name for name in os.listdir(root) if BATCH_ID_PATTERN.match(name)), reverse=True)
+    return [manifest for manifest in (load_manifest(batch_id, root) for batch_id in batch_ids[:limit]) if manifest]
+
+
+def evict_batches(root=BATCH_DIR, max_batches=MAX_REPORT_BATCHES, keep=None):
+    """일괄 리포트가 max_batches 개를 넘으면 오래된 디렉터리(PDF/zip 포함)부터 삭제 - keep 은 유지"""
+    if max_batches is None or not os.path.isdir(root):
+        return
+    batch_ids = sorted(name for name in os.listdir(root) if BATCH_ID_PATTERN.match(name))
+    for batch_id in batch_ids[:max(0, len(batch_ids) - max_batches)]:
+        if batch_id != keep:
+            shutil.rmtree(os.path.join(root, batch_id), ignore_errors=True)
+
+
+def zip_batch(batch_id, root=BATCH_DIR):
+    """완료된 일괄 리포트를 zip 으로 묶어 경로 반환 (이미 있으면 재사용)"""
+    manifest = load_manifest(batch_id, root)
+    if manifest is None:
+        raise FileNotFoundError(batch_id)
+    if manifest['status'] != 'done':
+        raise RuntimeError(f"Batch {batch_id} is {manifest['status']}")
+
+    directory = batch_path(batch_id, root)
+    zip_path = os.path.join(directory, f'{batch_id}.zip')
+    if not os.path.exists(zip_path):
+        temp_path = f'{zip_path}.tmp'
+        # PDF 는 이미 압축되어 있으므로 저장만 (ZIP_STORED)
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            archive.write(os.path.join(directory, MANIFEST), MANIFEST)
+            for entry in manifest['reports']:
+                if entry['status'] == 'done':
+                    archive.write(os.path.join(directory, entry['file']), entry['file'])
+        os.replace(temp_path, zip_path)
+    return zip_path
+
+
+class BatchReportScheduler:
+    """교대 시각마다 직전 교대 구간의 전체 장비 리포트 생성"""
+    def __init__(self, db, conclusion_func, hours=BATCH_REPORT_HOURS):
+        self.db = db
+        self.conclusion_func = conclusion_func
+        self.hours = sorted(hours)
+        self.running = False
+        self.thread = None
+
+    def next_run(self, now):
+        for day in range(2):
+            for hour in self.hours:
+                candidate = datetime.combine(now.date() + timedelta(days=day), datetime.min.time()) + timedelta(hours=hour)
+                if candidate > now:
+                    return candidate
+        return None
+
+    def previous_run(self, run_time):
+        """run_time 직전 교대 시각 (구간 시작)"""
+        for day in range(2):
+            for hour in reversed(self.hours):
+                candidate = datetime.combine(run_time.date() - timedelta(days=day), datetime.min.time()) + timedelta(hours=hour)
+                if candidate < run_time:
+                    return candidate
+        return run_time - timedelta(days=1)
+
+    def run(self):
+        while self.running:
+            run_time = self.next_run(datetime.now())
+            while self.running and datetime.now() < run_time:
+                time.sleep(min(60, max(0, (run_time - datetime.now()).total_seconds())))
+            if not self.running:
+                break
+            try:
+                generate_batch(self.db, self.conclusion_func, start=self.previous_run(run_time), end=run_time)
+            except Exception as e:
+                print(f"Error generating batch reports: {e}")
+
+    def start(self):
+        if not self.hours or self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+
+if __name__ == '__main__':
+    from app.predict.dbfunc import Database
+    from app.predict.conclusions import generate_conclusion
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--start', type=datetime.fromisoformat)
+    parser.add_argument('--end', type=datetime.fromisoformat)
+    parser.add_argument('--device-type', choices=['agv', 'oht'])
+    parser.add_argument('--workers', type=int, default=RENDER_WORKERS)
+    args = parser.parse_args()
+
+    manifest = generate_batch(Database(), generate_conclusion, start=args.start, end=args.end,
+                              device_type=args.device_type, render_workers=args.workers)
+    print(os.path.join(batch_path(manifest['batch_id']), MANIFEST))
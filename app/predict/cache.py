@@ -0,0 +1,88 @@
+"""조회 API 응답 캐시 (read-through) 와 쓰기 기반 무효화
+
+대시보드는 몇 초마다 같은 조회를 반복하지만 데이터는 DeviceMonitor 가 윈도우를 저장할 때만 바뀝니다.
+- 캐시 키에 장비별 버전을 포함하고, Database.update_* 가 저장 후 invalidate(device_id) 로 버전을 올림
+  -> 이전 버전 키는 더 이상 조회되지 않고 TTL 로 만료 (백엔드에 삭제 요청을 보내지 않아 모니터 스레드에서도 안전)
+- 백엔드는 aiocache 메모리 캐시만 사용: 버전 카운터가 프로세스 메모리에 있으므로 redis 등 공유 백엔드를 쓰면
+  다른 워커의 무효화를 보지 못하고, 재시작(uvicorn --reload 포함) 후 v0.0 부터 다시 세어 이전 응답을 돌려줄 수 있음
+  (메모리 캐시는 카운터와 함께 사라지므로 안전). 무효화는 같은 프로세스의 저장에만 반응하므로 단일 워커 기준
+- 네임스페이스별 hit/miss 횟수는 stats() 로 조회
+"""
+import os
+import threading
+from collections import defaultdict
+
+from aiocache import Cache
+
+CACHE_TTL = int(os.getenv('MONOGUARD_CACHE_TTL', 300))
+
+# 장비와 무관한 데이터(환경 측정값)의 버전 키
+SHARED_KEY = 'environment'
+
+_versions = defaultdict(int)
+_versions_lock = threading.Lock()
+_generation = 0
+
+
+def invalidate(*keys):
+    """장비(또는 SHARED_KEY)의 캐시된 응답을 무효화 - 어느 스레드에서나 호출 가능"""
+    with _versions_lock:
+        for key in keys:
+            _versions[key] += 1
+
+
+def invalidate_all():
+    """모든 캐시된 응답 무효화 (보존 기간 정리/보관처럼 여러 장비 데이터를 지울 때)"""
+    global _generation
+    with _versions_lock:
+        _generation += 1
+
+
+def version(key):
+    with _versions_lock:
+        return f'{_generation}.{_versions[key]}'
+
+
+class ResponseCache:
+    """버전 키 기반 read-through 캐시"""
+    def __init__(self, backend=None, ttl=CACHE_TTL):
+        self.backend = backend if backend is not None else Cache(Cache.MEMORY)
+        self.ttl = ttl
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    async def get_or_load(self, namespace, key, loader, *args, **kwargs):
+        """캐시에 있으면 반환, 없으면 loader(*args, **kwargs) 결과를 저장 후 반환
+        key: 무효화 단위 (장비 ID 또는 SHARED_KEY), None 결과는 저장하지 않음
+        """
+        params = ':'.join([*map(str, args), *(f'{name}={value}' for name, value in sorted(kwargs.items()))])
+        # 조회 전에 버전을 읽어 두므로, 조회 중 저장이 일어나면 결과는 이전 버전 키에 저장되어 다시 쓰이지 않음
+        cache_key = f'{namespace}:{key}:v{version(key)}:{params}'
+        value = await self.backend.get(cache_key)
+        if value is not None:
+            self.hits[namespace] += 1
+            return value
+
+        self.misses[namespace] += 1
+        value = await loader(*args, **kwargs)
+        if value is not None:
+            await self.backend.set(cache_key, value, ttl=self.ttl)
+        return value
+
+    def stats(self):
+        """네임스페이스별 hit/miss 횟수와 적중률"""
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        result = {}
+        for namespace in namespaces:
+            hits, misses = self.hits[namespace], self.misses[namespace]
+            result[namespace] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0.0
+            }
+        return result
+
+    async def clear(self):
+        await self.backend.clear()
+        self.hits.clear()
+        self.misses.clear()
@@ -0,0 +1,106 @@
+"""리포트 결론 문단 생성 (ChatGPT + 결론 캐시)
+
+프롬프트 입력이 같으면 llm_cache 에 저장된 결론을 사용하므로 ChatGPT 를 다시 호출하지 않습니다.
+API 키는 OPENAI_API_KEY 환경변수 (FastAPI 에서는 routers/predict.py 가 chatbot/api_key.txt 에서 설정).
+"""
+import json
+import threading
+
+import openai
+
+from app.predict.llm_cache import LLMResponseCache
+
+CONCLUSION_MODEL = "gpt-3.5-turbo"
+# 프롬프트 문구를 바꾸면 올려서 이전 캐시 응답을 쓰지 않도록 함
+CONCLUSION_PROMPT_VERSION = 1
+
+_conclusion_cache = None
+_conclusion_cache_lock = threading.Lock()
+
+
+def get_conclusion_cache() -> LLMResponseCache:
+    """리포트 결론 캐시 (첫 사용 때 생성 - import 만으로 캐시 DB 를 만들지 않음)"""
+    global _conclusion_cache
+    with _conclusion_cache_lock:
+        if _conclusion_cache is None:
+            _conclusion_cache = LLMResponseCache()
+        return _conclusion_cache
+
+
+def conclusion_inputs(device_id: str, analysis_result):
+    """분석 결과에서 결론 프롬프트에 들어가는 값만 추출 (캐시 키 계산에도 사용)"""
+    # None 체크 및 기본값 설정
+    summary = analysis_result[2] if analysis_result[2] else "분석 요약 없음"
+    critical_issues = json.loads(analysis_result[3]) if analysis_result[3] else []
+    warnings = json.loads(analysis_result[4]) if analysis_result[4] else []
+    recommendations = json.loads(analysis_result[5]) if analysis_result[5] else []
+    sensor_details = json.loads(analysis_result[6]) if analysis_result[6] else {}
+
+    # 센서별 상태 분석
+    critical_sensors = []
+    warning_sensors = []
+    caution_sensors = []
+    
+    for sensor_name, details in sensor_details.items():
+        if details['status'] == '위험':
+            critical_sensors.append(f"{sensor_name}: {details['current_value']:.2f}")
+        elif details['status'] == '경고':
+            warning_sensors.append(f"{sensor_name}: {details['current_value']:.2f}")
+        elif details['status'] == '주의':
+            caution_sensors.append(f"{sensor_name}: {details['current_value']:.2f}")
+
+    return {
+        "prompt_version": CONCLUSION_PROMPT_VERSION,
+        "device_id": device_id,
+        "summary": summary,
+        "critical_sensors": critical_sensors,
+        "warning_sensors": warning_sensors,
+        "caution_sensors": caution_sensors,
+        "critical_issues": critical_issues,
+        "warnings": warnings,
+        "recommendations": recommendations
+    }
+
+
+def build_conclusion_prompt(inputs):
+    """ChatGPT 프롬프트 작성"""
+    return f"""
+    다음은 장비 {inputs['device_id']}의 최신 분석 데이터입니다.
+
+    분석 요약: {inputs['summary']}
+
+    위험 수준 센서: {', '.join(inputs['critical_sensors']) if inputs['critical_sensors'] else '없음'}
+    경고 수준 센서: {', '.join(inputs['warning_sensors']) if inputs['warning_sensors'] else '없음'}
+    주의 수준 센서: {', '.join(inputs['caution_sensors']) if inputs['caution_sensors'] else '없음'}
+
+    중요 이슈: {', '.join(inputs['critical_issues']) if inputs['critical_issues'] else '없음'}
+    경고사항: {', '.join(inputs['warnings']) if inputs['warnings'] else '없음'}
+    권장사항: {', '.join(inputs['recommendations']) if inputs['recommendations'] else '없음'}
+
+    위 내용을 바탕으로 다음 사항을 포함하여 3~4문장으로 결론을 요약해 주세요:
+    1. 전반적인 장비 상태
+    2. 가장 심각한 센서들의 상태와 그 위험성
+    3. 권장되는 조치사항
+    """
+
+
+def request_conclusion(prompt: str) -> str:
+    """ChatGPT 호출"""
+    client = openai.OpenAI()
+
+    response = client.chat.completions.create(
+        model=CONCLUSION_MODEL,
+        messages=[{"role": "user", "content": prompt}]
+    )
+
+    return response.choices[0].message.content
+
+
+def generate_conclusion(device_id: str, analysis_result, llm=request_conclusion, cache=None):
+    """ChatGPT를 사용하여 분석 결과를 요약하고 결론을 도출 (같은 입력은 캐시된 결론 사용)
+    llm: 프롬프트 -> 결론 함수 (로컬 실행 시 가짜 함수로 교체 가능)
+    cache: 결론 캐시 (None 이면 get_conclusion_cache())
+    """
+    inputs = conclusion_inputs(device_id, analysis_result)
+    return (cache or get_conclusion_cache()).get_or_create(CONCLUSION_MODEL, inputs,
+                                                           lambda: llm(build_conclusion_prompt(inputs)))
@@ -1,11 +1,13 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 import plotly.express as px
 import json
 import plotly.graph_objects as go
 import numpy as np
 import os
+from datetime import timedelta
+from sensor_db import read_dataframe  # 프로세스 내 공유 WAL 읽기 연결 풀
+from rollups import series_query  # 조회 구간에 맞춰 원본/집계 테이블 선택
 
 # ✅ Streamlit 페이지 설정 (가장 먼저 실행해야 함)
 st.set_page_config(page_title="장비 모니터링 대시보드", layout="wide")
@@ -15,12 +17,6 @@ query_params = st.query_params
 page = query_params.get("page", "AGV 상태 분포")  # 기본값 설정
 embed_mode = query_params.get("embed", "false").lower() == "true"  # embed=true이면 True
 
-# ✅ 데이터베이스 연결 함수
-def get_db_connection():
-    #BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    #db_path = os.path.join(BASE_DIR, "sensor_data.db")
-    #return sqlite3.connect(db_path)
-    return sqlite3.connect("sensor_data.db") 
 
 # ✅ 모든 페이지에서 Streamlit UI 요소 제거 (상단 색깔 선, Deploy 버튼 등)
 st.markdown("""
@@ -43,7 +39,6 @@ st.markdown("""
 
 # ✅ AGV 상태 분포
 def agv_status_distribution():
-    conn = get_db_connection()
     query = """
         WITH latest_status AS (
             SELECT device_id, MAX(aggregation_end) as latest_time
@@ -62,8 +57,7 @@ def agv_status_distribution():
         INNER JOIN latest_status l 
         ON a.device_id = l.device_id AND a.aggregation_end = l.latest_time
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_dataframe(query)
 
     if df.empty:
         st.warning("⚠️ 현재 AGV 장비 데이터가 없습니다.")
@@ -112,15 +106,13 @@ def agv_status_distribution():
 
 # ✅ AGV 경고 및 위험 장비 (`aggregated_device_status` 기반)
 def agv_warning_risk():
-    conn = get_db_connection()
     query = """
         SELECT device_id, normal_ratio, caution_ratio, warning_ratio, risk_ratio
         FROM aggregated_device_status
-        WHERE device_id LIKE 'AGV%'
+        WHERE substr(device_id, 1, 3) = 'AGV'
         ORDER BY risk_ratio DESC, warning_ratio DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_dataframe(query)
 
     if df.empty:
         st.warning("⚠️ 현재 경고 및 위험 상태의 AGV 장비가 없습니다.")
@@ -166,17 +158,15 @@ def agv_warning_risk():
 
 # ✅ 시간에 따른 AGV 상태 변화 (`aggregated_device_status` 기반)
 def agv_status_time_series():
-   conn = get_db_connection()
    query = """
        SELECT device_id, aggregation_start AS timestamp, 
               normal_ratio, caution_ratio, warning_ratio, risk_ratio,
               status as current_status
        FROM aggregated_device_status
-       WHERE device_id LIKE 'AGV%'
+       WHERE substr(device_id, 1, 3) = 'AGV'
        ORDER BY aggregation_start ASC
    """
-   df = pd.read_sql_query(query, conn)
-   conn.close()
+   df = read_dataframe(query)
 
    if df.empty:
        st.error("⚠️ AGV 데이터가 없습니다! DB를 확인해주세요.")
@@ -341,7 +331,6 @@ def recent_environment():
     """, unsafe_allow_html=True)
     
     # 데이터베이스 연결 및 데이터 조회
-    conn = get_db_connection()
     query = """
         SELECT 
             timestamp,
@@ -352,8 +341,7 @@ def recent_environment():
         ORDER BY timestamp DESC
         LIMIT 1
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_dataframe(query)
     
     if df.empty:
         st.warning("⚠️ 현재 환경 데이터가 없습니다.")
@@ -396,10 +384,20 @@ def recent_environment():
         unsafe_allow_html=True
     )
         
+# 환경 차트 표시 구간 (최신 측정 시각 기준)
+ENVIRONMENT_CHART_HOURS = 24
+
+def environment_series(metric, hours=ENVIRONMENT_CHART_HOURS):
+    """최근 hours 시간의 환경 지표 - 구간 길이에 맞춰 원본/1분/1시간 집계 중 자동 선택"""
+    latest = read_dataframe("SELECT MAX(timestamp) AS latest FROM environment_measurements")["latest"].iloc[0]
+    if latest is None:
+        return pd.DataFrame(columns=["timestamp", metric])
+    end = pd.to_datetime(latest).to_pydatetime()
+    return read_dataframe(*series_query('environment', [metric], start=end - timedelta(hours=hours), end=end))
+
 # ✅ AGV 온도 변화 
 def agv_temperature_change():
-    conn = get_db_connection()
-    df = pd.read_sql("SELECT timestamp, ex_temperature FROM environment_measurements", conn) 
+    df = environment_series('ex_temperature')
     
     if df.empty:
         st.warning("⚠️ 현재 AGV 온도 데이터가 없습니다.")
@@ -410,7 +408,6 @@ def agv_temperature_change():
     df = df.dropna(subset=["timestamp"])
     df["minute"] = df["timestamp"].dt.floor("min")
     df = df.groupby("minute")[["ex_temperature"]].mean().reset_index()
-    conn.close()
 
     # 온도 임계값
     NORMAL_TEMP = 25.066730
@@ -541,8 +538,7 @@ def agv_temperature_change():
        
 # ✅ AGV 습도 변화 
 def agv_humidity_change():
-    conn = get_db_connection()
-    df = pd.read_sql("SELECT timestamp, ex_humidity FROM environment_measurements", conn) 
+    df = environment_series('ex_humidity')
     
     if df.empty:
         st.warning("⚠️ 현재 AGV 습도 데이터가 없습니다.")
@@ -559,7 +555,6 @@ def agv_humidity_change():
     df = df.dropna(subset=["timestamp"])
     df["minute"] = df["timestamp"].dt.floor("min")
     df = df.groupby("minute")[["ex_humidity"]].mean().reset_index()
-    conn.close()
 
     # 메트릭스 스타일
     st.markdown("""
@@ -664,8 +659,7 @@ def agv_humidity_change():
        
 # ✅ AGV 조도 변화 
 def agv_illuminance_change():
-    conn = get_db_connection()
-    df = pd.read_sql("SELECT timestamp, ex_illuminance FROM environment_measurements", conn) 
+    df = environment_series('ex_illuminance')
     
     if df.empty:
         st.warning("⚠️ 현재 AGV 조도 데이터가 없습니다.")
@@ -682,7 +676,6 @@ def agv_illuminance_change():
     df = df.dropna(subset=["timestamp"])
     df["minute"] = df["timestamp"].dt.floor("min")
     df = df.groupby("minute")[["ex_illuminance"]].mean().reset_index()
-    conn.close()
 
     # 메트릭스 스타일
     st.markdown("""
@@ -799,7 +792,6 @@ def agv_illuminance_change():
 
 # ✅ AGV 상태 현황 (최근 aggregation_end 기준 가장 높은 비율을 반영, 장비별 최신 데이터 보장)
 def agv_device_status():
-    conn = get_db_connection()
     query = """
     SELECT 
         SUM(CASE WHEN max_category = 'normal' THEN 1 ELSE 0 END) AS normal_count,
@@ -830,8 +822,7 @@ def agv_device_status():
         ) latest ON s.device_id = latest.device_id AND s.aggregation_end = latest.latest_aggregation
     ) AS subquery;
     """
-    df_status = pd.read_sql_query(query, conn)
-    conn.close()
+    df_status = read_dataframe(query)
     
     if df_status.empty:
         st.warning("⚠️ 장비 상태 데이터가 없습니다.")
@@ -1055,7 +1046,6 @@ def agv_thermal_monitoring():
 
 # ✅ OHT 상태 현황 (최근 aggregation_end 기준 가장 높은 비율을 반영, 장비별 최신 데이터 보장)
 def oht_device_status():
-    conn = get_db_connection()
     query = """
     SELECT 
         SUM(CASE WHEN max_category = 'normal' THEN 1 ELSE 0 END) AS normal_count,
@@ -1086,8 +1076,7 @@ def oht_device_status():
         ) latest ON s.device_id = latest.device_id AND s.aggregation_end = latest.latest_aggregation
     ) AS subquery;
     """
-    df_status = pd.read_sql_query(query, conn)
-    conn.close()
+    df_status = read_dataframe(query)
     
     if df_status.empty:
         st.warning("⚠️ 장비 상태 데이터가 없습니다.")
@@ -1157,7 +1146,6 @@ def oht_device_status():
         
 # ✅ OHT 상태 분포
 def oht_status_distribution():
-    conn = get_db_connection()
     query = """
         WITH latest_status AS (
             SELECT device_id, MAX(aggregation_end) as latest_time
@@ -1176,8 +1164,7 @@ def oht_status_distribution():
         INNER JOIN latest_status l 
         ON a.device_id = l.device_id AND a.aggregation_end = l.latest_time
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_dataframe(query)
 
     if df.empty:
         st.warning("⚠️ 현재 OHT 장비 데이터가 없습니다.")
@@ -1224,17 +1211,15 @@ def oht_status_distribution():
 
 # ✅ 시간에 따른 OHT 상태 변화 (`aggregated_device_status` 기반)
 def oht_status_time_series():
-    conn = get_db_connection()
     query = """
         SELECT device_id, aggregation_start AS timestamp, 
                normal_ratio, caution_ratio, warning_ratio, risk_ratio,
                status as current_status
         FROM aggregated_device_status
-        WHERE device_id LIKE 'OHT%'
+        WHERE substr(device_id, 1, 3) = 'OHT'
         ORDER BY aggregation_start ASC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_dataframe(query)
 
     if df.empty:
         st.error("⚠️ OHT 데이터가 없습니다! DB를 확인해주세요.")
@@ -1358,15 +1343,13 @@ def oht_status_time_series():
         
 # ✅ OHT 경고 및 위험 장비 (`aggregated_device_status` 기반)
 def oht_warning_risk():
-    conn = get_db_connection()
     query = """
         SELECT device_id, normal_ratio, caution_ratio, warning_ratio, risk_ratio
         FROM aggregated_device_status
-        WHERE device_id LIKE 'OHT%'
+        WHERE substr(device_id, 1, 3) = 'OHT'
         ORDER BY risk_ratio DESC, warning_ratio DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_dataframe(query)
 
     if df.empty:
         st.warning("⚠️ 현재 경고 및 위험 상태의 OHT 장비가 없습니다.")
@@ -1452,7 +1435,6 @@ def oht_recent_environment():
         </style>
     """, unsafe_allow_html=True)
     
-    conn = get_db_connection()
     query = """
         SELECT 
             timestamp,
@@ -1463,8 +1445,7 @@ def oht_recent_environment():
         ORDER BY timestamp DESC
         LIMIT 1
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = read_dataframe(query)
     
     if df.empty:
         st.warning("⚠️ 현재 환경 데이터가 없습니다.")
@@ -1508,8 +1489,7 @@ def oht_recent_environment():
         
 # ✅ OHT 온도 변화 
 def oht_temperature_change():
-   conn = get_db_connection()
-   df = pd.read_sql("SELECT timestamp, ex_temperature FROM environment_measurements", conn) 
+   df = environment_series('ex_temperature')
    
    if df.empty:
        st.warning("⚠️ 현재 OHT 온도 데이터가 없습니다.")
@@ -1519,7 +1499,6 @@ def oht_temperature_change():
    df = df.dropna(subset=["timestamp"])
    df["minute"] = df["timestamp"].dt.floor("min")
    df = df.groupby("minute")[["ex_temperature"]].mean().reset_index()
-   conn.close()
 
    NORMAL_TEMP = 27.457478
    CAUTION_TEMP = 29.167545 
@@ -1644,8 +1623,7 @@ def oht_temperature_change():
        
 # ✅ OHT 습도 변화
 def oht_humidity_change():
-    conn = get_db_connection()
-    df = pd.read_sql("SELECT timestamp, ex_humidity FROM environment_measurements", conn) 
+    df = environment_series('ex_humidity')
     
     if df.empty:
         st.warning("⚠️ 현재 OHT 습도 데이터가 없습니다.")
@@ -1662,7 +1640,6 @@ def oht_humidity_change():
     df = df.dropna(subset=["timestamp"])
     df["minute"] = df["timestamp"].dt.floor("min")
     df = df.groupby("minute")[["ex_humidity"]].mean().reset_index()
-    conn.close()
 
     # 메트릭스 스타일
     st.markdown("""
@@ -1779,8 +1756,7 @@ def oht_humidity_change():
        
 # ✅ OHT 조도 변화
 def oht_illuminance_change():
-   conn = get_db_connection()
-   df = pd.read_sql("SELECT timestamp, ex_illuminance FROM environment_measurements", conn) 
+   df = environment_series('ex_illuminance')
    
    if df.empty:
        st.warning("⚠️ 현재 OHT 조도 데이터가 없습니다.")
@@ -1795,7 +1771,6 @@ def oht_illuminance_change():
    df = df.dropna(subset=["timestamp"])
    df["minute"] = df["timestamp"].dt.floor("min")
    df = df.groupby("minute")[["ex_illuminance"]].mean().reset_index()
-   conn.close()
 
    st.markdown("""
        <style>
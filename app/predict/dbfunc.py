@@ -1,25 +1,68 @@
-import sqlite3
 import os
+import hashlib
 import pandas as pd
 from datetime import datetime, timedelta
 import json
 import joblib
+from app.predict.sensor_db import get_sensor_db, DB_PATH, SENSOR_COLUMNS
+from app.predict import rollups
+from app.predict import archive
+from app.predict import cache
+from app.predict import downsample
+
+# 리포트 상태 행 칼럼 (reports.STATUS_FIELDS 순서)
+REPORT_STATUS_COLUMNS = ('status', 'aggregation_end', 'normal_ratio', 'caution_ratio', 'warning_ratio', 'risk_ratio')
+
+# init_tables 가 관리하는 인덱스 (idx_ 로 시작하며 목록에 없는 인덱스는 제거됨)
+# 장비별 최신 행 조회(device_id = ? ORDER BY 시각 DESC)는 각 테이블의 PRIMARY KEY 로 처리됨
+INDEXES = {
+    # dashboard.py 장비 종류별 시계열 (substr(device_id, 1, 3) = 'AGV' ORDER BY aggregation_start)
+    'idx_aggregated_status_type_start': '''
+        CREATE INDEX IF NOT EXISTS idx_aggregated_status_type_start
+        ON aggregated_device_status (substr(device_id, 1, 3), aggregation_start)
+    ''',
+    # dashboard.py 장비 종류별 경고/위험 목록 (ORDER BY risk_ratio DESC, warning_ratio DESC)
+    'idx_aggregated_status_type_risk': '''
+        CREATE INDEX IF NOT EXISTS idx_aggregated_status_type_risk
+        ON aggregated_device_status (substr(device_id, 1, 3), risk_ratio DESC, warning_ratio DESC)
+    ''',
+    # pages/*_dashboard.py 전체 장비 최신 센서 값 (ORDER BY timestamp DESC LIMIT n)
+    'idx_sensor_timeseries_timestamp': '''
+        CREATE INDEX IF NOT EXISTS idx_sensor_timeseries_timestamp
+        ON sensor_timeseries (timestamp)
+    '''
+}
 
 class Database:
-    def __init__(self):
+    def __init__(self, db_path=DB_PATH):
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.db_path = os.path.join(self.base_dir, 'sensor_data.db')
         self.base_path = './data'
+        # 프로세스 내 공유 연결 관리자 (읽기 연결 풀 + 단일 쓰기 연결, WAL)
+        self.sensor_db = get_sensor_db(db_path)
+        self.db_path = self.sensor_db.db_path
+
+    def read(self):
+        """읽기 연결 대여 - with db.read() as conn:"""
+        return self.sensor_db.read()
+
+    def write(self):
+        """쓰기 트랜잭션 - with db.write() as conn:"""
+        return self.sensor_db.write()
 
     def get_connection(self):
-        #return sqlite3.connect(self.db_path)
-        return sqlite3.connect("sensor_data.db") 
+        """풀을 거치지 않는 개별 연결 (호출 측에서 close 필요)"""
+        return self.sensor_db.connect()
     
     def init_tables(self):
         """모든 테이블 초기화 및 초기 데이터 로드"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self.create_tables()
+        self.create_indexes()
         
+        # 초기 데이터 로드
+        self._load_initial_data()
+
+    def create_tables(self):
+        """모니터링 결과 테이블 생성"""
         # 필요한 테이블들 생성
         tables = {
             'device_status': '''
@@ -63,14 +106,13 @@ class Database:
                     PRIMARY KEY (device_id, timestamp)
                 )
             ''',
-            'sensor_measurements': '''
-                CREATE TABLE IF NOT EXISTS sensor_measurements (
-                    device_id TEXT,
-                    timestamp DATETIME,
-                    sensor_name TEXT,
-                    sensor_value REAL,
-                    PRIMARY KEY (device_id, timestamp, sensor_name)
-                )
+            'sensor_timeseries': f'''
+                CREATE TABLE IF NOT EXISTS sensor_timeseries (
+                    device_id TEXT NOT NULL,
+                    timestamp DATETIME NOT NULL,
+                    {', '.join(f'{sensor} REAL' for sensor in SENSOR_COLUMNS)},
+                    PRIMARY KEY (device_id, timestamp)
+                ) WITHOUT ROWID
             ''',
             'environment_measurements': '''
                 CREATE TABLE IF NOT EXISTS environment_measurements (
@@ -80,82 +122,202 @@ class Database:
                     ex_illuminance REAL,
                     PRIMARY KEY (timestamp)
                 )
+            ''',
+            'data_load_manifest': '''
+                CREATE TABLE IF NOT EXISTS data_load_manifest (
+                    table_name TEXT PRIMARY KEY,
+                    source_path TEXT,
+                    source_size INTEGER,
+                    source_mtime REAL,
+                    source_hash TEXT,
+                    columns TEXT,
+                    row_count INTEGER,
+                    rows_hash TEXT,
+                    loaded_at DATETIME
+                )
             '''
         }
         
-        for table_name, create_query in tables.items():
-            cursor.execute(create_query)
-        
-        conn.commit()
-        
-        # 초기 데이터 로드
-        self._load_initial_data()
-        conn.close()
+        with self.write() as conn:
+            for table_name, create_query in tables.items():
+                conn.execute(create_query)
+            self._migrate_sensor_measurements(conn)
+            rollups.create_rollup_tables(conn)
+
+    def create_indexes(self):
+        """관리 인덱스 생성 및 목록에서 빠진 idx_ 인덱스 제거"""
+        with self.write() as conn:
+            existing = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'"
+            )]
+            for name in existing:
+                if name not in INDEXES:
+                    conn.execute(f'DROP INDEX IF EXISTS {name}')
+            for create_query in INDEXES.values():
+                conn.execute(create_query)
+            conn.execute('PRAGMA optimize')
+
+    @staticmethod
+    def _migrate_sensor_measurements(conn):
+        """(device, timestamp, sensor_name) 행 단위 sensor_measurements 테이블을 sensor_timeseries 로 옮기고
+        기존 쿼리용 호환 뷰(sensor_measurements) 생성"""
+        legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sensor_measurements'"
+        ).fetchone()
+        if legacy:
+            pivot = ', '.join(f"MAX(CASE WHEN sensor_name = '{sensor}' THEN sensor_value END)"
+                              for sensor in SENSOR_COLUMNS)
+            conn.execute(f'''
+            INSERT OR REPLACE INTO sensor_timeseries (device_id, timestamp, {', '.join(SENSOR_COLUMNS)})
+            SELECT device_id, timestamp, {pivot}
+            FROM sensor_measurements
+            GROUP BY device_id, timestamp
+            ''')
+            conn.execute('DROP TABLE sensor_measurements')
+            print("sensor_measurements -> sensor_timeseries 마이그레이션 완료")
+
+        union = '\n            UNION ALL\n            '.join(
+            f"SELECT device_id, timestamp, '{sensor}' AS sensor_name, {sensor} AS sensor_value "
+            f"FROM sensor_timeseries WHERE {sensor} IS NOT NULL"
+            for sensor in SENSOR_COLUMNS
+        )
+        conn.execute(f'''
+            CREATE VIEW IF NOT EXISTS sensor_measurements AS
+            {union}
+        ''')
+
+    @staticmethod
+    def _upsert_sensor_rows(conn, device_id, rows):
+        """시각별 센서 값 행 저장 - 값이 없는(None) 센서는 기존 값 유지
+        rows: [{'timestamp', 'NTC', 'PM1_0', ...}, ...]
+        """
+        columns = ', '.join(SENSOR_COLUMNS)
+        placeholders = ', '.join('?' for _ in SENSOR_COLUMNS)
+        updates = ', '.join(f'{sensor} = COALESCE(excluded.{sensor}, {sensor})' for sensor in SENSOR_COLUMNS)
+        conn.executemany(f'''
+        INSERT INTO sensor_timeseries (device_id, timestamp, {columns})
+        VALUES (?, ?, {placeholders})
+        ON CONFLICT (device_id, timestamp) DO UPDATE SET {updates}
+        ''', [(
+            device_id,
+            row['timestamp'],
+            *(row.get(sensor) for sensor in SENSOR_COLUMNS)
+        ) for row in rows])
+
+    @staticmethod
+    def preprocess_dataframe(df):
+        """테스트 데이터프레임 전처리 (칼럼명 '.' -> '_', 경로 구분자 통일, 메타 칼럼 제거)"""
+        df.columns = [col.replace('.', '_') for col in df.columns]
+        if 'filenames' in df.columns:
+            df['filenames'] = df['filenames'].str.replace('\\', '/', regex=False)
+        df.drop(columns=['device_id', 'collection_date', 'collection_time', 'cumulative_operating_day'], 
+                inplace=True, errors='ignore')
+        return df
 
     def _load_initial_data(self):
-        """초기 데이터 로드"""
-        # AGV 데이터 로드
-        agv_data = {}
-        for i in range(17, 19):
-            try:
-                with open(f'{self.base_path}/agv{i}_test_df', 'rb') as file:
-                    agv_data[i] = joblib.load(file)
-            except Exception as e:
-                print(f"Error loading AGV{i} data: {e}")
-
-        # OHT 데이터 로드
-        oht_data = {}
-        for i in range(17, 19):
-            try:
-                with open(f'{self.base_path}/oht{i}_test_df', 'rb') as file:
-                    oht_data[i] = joblib.load(file)
-            except Exception as e:
-                print(f"Error loading OHT{i} data: {e}")
-
-        # 데이터 전처리
-        for dataset in [agv_data, oht_data]:
-            for key, df in dataset.items():
-                df.columns = [col.replace('.', '_') for col in df.columns]
-                if 'filenames' in df.columns:
-                    df['filenames'] = df['filenames'].str.replace('\\', '/', regex=False)
-                df.drop(columns=['device_id', 'collection_date', 'collection_time', 'cumulative_operating_day'], 
-                        inplace=True, errors='ignore')
-                
-        '''
-        # 데이터 전처리
-        for dataset in [agv_data, oht_data]:
-            for key, df in dataset.items():
-                df.columns = [col.replace('.', '_') for col in df.columns]
-                if 'filenames' in df.columns:
-                    df['filenames'] = '/Users/hwangeunbi/monoguard/app/predict/' + df['filenames'].str.replace('\\', '/', regex=False)
-                df.drop(columns=['device_id', 'collection_date', 'collection_time', 'cumulative_operating_day'],
-                        inplace=True, errors='ignore')
-        '''
-
-        # 데이터베이스에 저장
-        conn = self.get_connection()
-        for i, df in agv_data.items():
-            df.to_sql(f'agv{i}_table', conn, if_exists='replace', index=False)
-        for i, df in oht_data.items():
-            df.to_sql(f'oht{i}_table', conn, if_exists='replace', index=False)
-        conn.close()
+        """초기 데이터 로드 - 원본 파일이 바뀐 테이블만 다시 적재 (data_load_manifest 기준)"""
+        for device_type in ['agv', 'oht']:
+            for i in range(17, 19):
+                table_name = f'{device_type}{i}_table'
+                source_path = f'{self.base_path}/{device_type}{i}_test_df'
+                try:
+                    self._load_source(table_name, source_path)
+                except Exception as e:
+                    print(f"Error loading {device_type.upper()}{i} data: {e}")
+
+    @staticmethod
+    def _file_hash(path, chunk_size=1 << 20):
+        """파일 내용 sha256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _rows_hash(row_hashes):
+        """행 해시 배열(pd.util.hash_pandas_object) -> 단일 해시"""
+        return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+    def _load_source(self, table_name, source_path):
+        """원본 파일 1개를 테이블에 반영
+        - 크기/수정시각이 같거나 내용 해시가 같으면 건너뜀 (unpickle 없음)
+        - 기존 행이 새 데이터의 앞부분과 같으면 늘어난 행만 append
+        - 그 외에는 테이블 전체 교체
+        """
+        stat = os.stat(source_path)
+        with self.read() as conn:
+            manifest = conn.execute('''
+            SELECT source_size, source_mtime, source_hash, columns, row_count, rows_hash
+            FROM data_load_manifest
+            WHERE table_name = ?
+            ''', (table_name,)).fetchone()
+            table_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+            ).fetchone() is not None
+        
+        if manifest and not table_exists:
+            manifest = None
+        if manifest and (manifest[0], manifest[1]) == (stat.st_size, stat.st_mtime):
+            return
+        
+        source_hash = self._file_hash(source_path)
+        if manifest and manifest[2] == source_hash:
+            # 내용은 그대로이고 수정시각만 바뀐 경우
+            with self.write() as conn:
+                conn.execute('''
+                UPDATE data_load_manifest SET source_size = ?, source_mtime = ? WHERE table_name = ?
+                ''', (stat.st_size, stat.st_mtime, table_name))
+            return
+        
+        with open(source_path, 'rb') as file:
+            df = self.preprocess_dataframe(joblib.load(file))
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        columns = json.dumps(list(df.columns), ensure_ascii=False)
+        
+        append_from = None
+        if manifest and manifest[3] == columns and manifest[4] <= len(df):
+            if self._rows_hash(row_hashes[:manifest[4]]) == manifest[5]:
+                append_from = manifest[4]
+        
+        with self.write() as conn:
+            if append_from is None:
+                df.to_sql(table_name, conn, if_exists='replace', index=False)
+                print(f"{table_name}: {len(df)}행 적재")
+            elif append_from < len(df):
+                df.iloc[append_from:].to_sql(table_name, conn, if_exists='append', index=False)
+                print(f"{table_name}: {len(df) - append_from}행 추가")
+            
+            conn.execute('''
+            INSERT OR REPLACE INTO data_load_manifest
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                table_name,
+                source_path,
+                stat.st_size,
+                stat.st_mtime,
+                source_hash,
+                columns,
+                len(df),
+                self._rows_hash(row_hashes),
+                datetime.now()
+            ))
 
     def get_device_status(self, device_id):
         """디바이스 현재 상태 조회"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.read() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT status, aggregation_end, normal_ratio, caution_ratio, 
-            warning_ratio, risk_ratio, monitoring_in_progress
-        FROM aggregated_device_status
-        WHERE device_id = ?
-        ORDER BY aggregation_end DESC
-        LIMIT 1
-        ''', (device_id,))
+            cursor.execute('''
+            SELECT status, aggregation_end, normal_ratio, caution_ratio, 
+                warning_ratio, risk_ratio, monitoring_in_progress
+            FROM aggregated_device_status
+            WHERE device_id = ?
+            ORDER BY aggregation_end DESC
+            LIMIT 1
+            ''', (device_id,))
         
-        result = cursor.fetchone()
-        conn.close()
+            result = cursor.fetchone()
         
         if not result:
             return None
@@ -174,19 +336,18 @@ class Database:
 
     def get_device_history(self, device_id, limit=10):
         """디바이스 상태 이력 조회"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.read() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT aggregation_end, status, normal_ratio, caution_ratio, warning_ratio, risk_ratio
-        FROM aggregated_device_status
-        WHERE device_id = ?
-        ORDER BY aggregation_end DESC
-        LIMIT ?
-        ''', (device_id, limit))
+            cursor.execute('''
+            SELECT aggregation_end, status, normal_ratio, caution_ratio, warning_ratio, risk_ratio
+            FROM aggregated_device_status
+            WHERE device_id = ?
+            ORDER BY aggregation_end DESC
+            LIMIT ?
+            ''', (device_id, limit))
         
-        results = cursor.fetchall()
-        conn.close()
+            results = cursor.fetchall()
         
         return [{
             "timestamp": result[0],
@@ -200,35 +361,40 @@ class Database:
         } for result in results]
 
     def get_sensor_data(self, device_id, limit=900):
-        """센서 데이터 조회"""
-        conn = self.get_connection()
-        df = pd.read_sql('''
-        SELECT timestamp, sensor_name, sensor_value
-        FROM sensor_measurements
-        WHERE device_id = ?
-        ORDER BY timestamp DESC
-        LIMIT ?
-        ''', conn, params=(device_id, limit))
-        conn.close()
+        """센서 데이터 조회
+        limit: 센서 값 개수 기준 (시각 수 = limit // 센서 수)
+        """
+        with self.read() as conn:
+            rows = conn.execute(f'''
+            SELECT timestamp, {', '.join(SENSOR_COLUMNS)}
+            FROM sensor_timeseries
+            WHERE device_id = ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+            ''', (device_id, max(1, limit // len(SENSOR_COLUMNS)))).fetchall()
         
         sensor_data = {}
-        for sensor in df['sensor_name'].unique():
-            sensor_df = df[df['sensor_name'] == sensor]
-            sensor_data[sensor] = {
-                'timestamps': sensor_df['timestamp'].tolist(),
-                'values': sensor_df['sensor_value'].tolist()
-            }
+        if not rows:
+            return sensor_data
+        timestamps, *columns = zip(*rows)
+        for sensor, values in zip(SENSOR_COLUMNS, columns):
+            points = [(timestamp, value) for timestamp, value in zip(timestamps, values) if value is not None]
+            if points:
+                sensor_timestamps, sensor_values = zip(*points)
+                sensor_data[sensor] = {
+                    'timestamps': list(sensor_timestamps),
+                    'values': list(sensor_values)
+                }
         return sensor_data
 
     def get_environment_data(self, limit=900):
         """환경 데이터 조회"""
-        conn = self.get_connection()
-        df = pd.read_sql(f'''
-        SELECT * FROM environment_measurements 
-        ORDER BY timestamp DESC 
-        LIMIT {limit}
-        ''', conn)
-        conn.close()
+        with self.read() as conn:
+            df = pd.read_sql(f'''
+            SELECT * FROM environment_measurements 
+            ORDER BY timestamp DESC 
+            LIMIT {limit}
+            ''', conn)
         
         return {
             "timestamps": df['timestamp'].tolist(),
@@ -237,62 +403,234 @@ class Database:
             "ex_illuminance": df['ex_illuminance'].tolist()
         }
 
+    def get_fleet_status(self, device_type=None, device_ids=None):
+        """여러 장비의 최신 상태/비율/분석 결과를 칼럼 단위로 조회 (테이블당 쿼리 1회)
+        device_type: 'AGV' | 'OHT' (None 이면 전체), device_ids: 장비 ID 목록 (None 이면 전체)
+        반환: {'device_id': [...], 'status': [...], ..., 'analysis': {'timestamp': [...], ...}}
+        """
+        conditions, params = [], []
+        if device_type:
+            # GLOB 접두어 조건은 PRIMARY KEY (device_id, ...) 범위 검색으로 처리되어 GROUP BY 정렬이 필요 없음
+            conditions.append('device_id GLOB ?')
+            params.append(f'{device_type.upper()}*')
+        if device_ids:
+            conditions.append(f"device_id IN ({', '.join('?' * len(device_ids))})")
+            params.extend(device_ids)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        # MAX() 와 함께 조회한 칼럼은 SQLite 에서 최댓값 행의 값 (장비별 최신 행)
+        with self.read() as conn:
+            status_rows = conn.execute(f'''
+            SELECT device_id, MAX(aggregation_end), status, normal_ratio, caution_ratio,
+                   warning_ratio, risk_ratio, monitoring_in_progress
+            FROM aggregated_device_status
+            {where}
+            GROUP BY device_id
+            ''', params).fetchall()
+            analysis_rows = conn.execute(f'''
+            SELECT device_id, MAX(timestamp), current_state, summary, critical_issues,
+                   warnings, recommendations, sensor_details
+            FROM device_analysis
+            {where}
+            GROUP BY device_id
+            ''', params).fetchall()
+
+        statuses = {row[0]: row for row in status_rows}
+        analyses = {row[0]: row for row in analysis_rows}
+        devices = sorted(set(statuses) | set(analyses))
+
+        def column(rows, index, convert=None):
+            values = []
+            for device_id in devices:
+                row = rows.get(device_id)
+                value = row[index] if row is not None else None
+                values.append(convert(value) if convert and value is not None else value)
+            return values
+
+        return {
+            "device_id": devices,
+            "timestamp": column(statuses, 1),
+            "status": column(statuses, 2),
+            "normal_ratio": column(statuses, 3),
+            "caution_ratio": column(statuses, 4),
+            "warning_ratio": column(statuses, 5),
+            "risk_ratio": column(statuses, 6),
+            "monitoring_in_progress": column(statuses, 7, bool),
+            "analysis": {
+                "timestamp": column(analyses, 1),
+                "current_state": column(analyses, 2),
+                "summary": column(analyses, 3),
+                "critical_issues": column(analyses, 4, json.loads),
+                "warnings": column(analyses, 5, json.loads),
+                "recommendations": column(analyses, 6, json.loads),
+                "sensor_details": column(analyses, 7, json.loads)
+            }
+        }
+
+    def get_report_rows(self, device_id, start=None, end=None):
+        """리포트용 상태 행과 분석 행 조회 (없으면 None)
+        start/end: 시각 범위 - 범위 안의 최신 상태와 최신 분석 (None 이면 제한 없음)
+        범위를 지정하면 상태 행은 Parquet 보관본까지 조회 (get_history)
+        """
+        analysis_condition, analysis_params = '', [device_id]
+        if start is not None:
+            analysis_condition += ' AND timestamp >= ?'
+            analysis_params.append(start)
+        if end is not None:
+            analysis_condition += ' AND timestamp <= ?'
+            analysis_params.append(end)
+
+        with self.read() as conn:
+            if start is None and end is None:
+                status_row = conn.execute(f'''
+                    SELECT {', '.join(REPORT_STATUS_COLUMNS)}
+                    FROM aggregated_device_status
+                    WHERE device_id = ?
+                    ORDER BY aggregation_end DESC
+                    LIMIT 1
+                ''', (device_id,)).fetchone()
+            analysis_row = conn.execute(f'''
+                SELECT timestamp, current_state, summary, critical_issues, 
+                       warnings, recommendations, sensor_details
+                FROM device_analysis
+                WHERE device_id = ? {analysis_condition}
+                ORDER BY timestamp DESC
+                LIMIT 1
+            ''', analysis_params).fetchone()
+
+        if start is not None or end is not None:
+            status = self.get_history('aggregated_device_status', start, end, device_id,
+                                      columns=list(REPORT_STATUS_COLUMNS))
+            status_row = None
+            if not status.empty:
+                latest = status.iloc[-1]
+                status_row = (latest['status'], str(latest['aggregation_end'].to_pydatetime()),
+                              *(float(latest[column]) for column in REPORT_STATUS_COLUMNS[2:]))
+        return status_row, analysis_row
+
+    def get_thermal_filenames(self, device_id):
+        """장비 원본 테이블의 열화상 파일 경로 목록"""
+        device_type = 'oht' if 'oht' in device_id.lower() else 'agv'
+        number = ''.join(filter(str.isdigit, device_id))
+        with self.read() as conn:
+            return [row[0] for row in conn.execute(f'SELECT filenames FROM {device_type}{number}_table')]
+
+    def get_series(self, source, metrics, device_id=None, start=None, end=None, level=None, stat='mean'):
+        """시계열 조회 - 구간 길이/보존 기간에 따라 원본 또는 1분/1시간/1일 집계 테이블 자동 선택
+        source: 'sensor' | 'environment' | 'status'
+        """
+        query, params = rollups.series_query(source, metrics, device_id, start, end, level, stat)
+        with self.read() as conn:
+            return pd.read_sql(query, conn, params=params)
+
+    def get_downsampled_series(self, source, metrics, device_id=None, start=None, end=None,
+                               max_points=500, method='minmax'):
+        """차트용 다운샘플링 시계열 - {'level', 'series': {지표: {'timestamps', 'values'}}}
+        구간이 길면 집계 테이블의 버킷별 최솟값/최댓값(lttb 는 평균)을 읽어 원본 행을 모두 읽지 않음
+        """
+        level = rollups.choose_level(start, end, max_points * downsample.OVERSAMPLE)
+        stats = ['mean'] if level == 'raw' or method == 'lttb' else ['min', 'max']
+
+        points = {metric: [] for metric in metrics if metric in rollups.ROLLUP_SOURCES[source][3]}
+        with self.read() as conn:
+            for stat in stats:
+                query, params = rollups.series_query(source, list(points), device_id, start, end, level, stat)
+                for row in conn.execute(query, params):
+                    for metric, value in zip(points, row[1:]):
+                        points[metric].append((row[0], stat, value))
+
+        series = {}
+        for metric, metric_points in points.items():
+            # 같은 버킷의 최솟값/최댓값은 버킷 시각 순 -> min, max 순서로 배치
+            metric_points.sort(key=lambda point: (point[0], point[1] == 'max'))
+            timestamps = [point[0] for point in metric_points]
+            values = [point[2] for point in metric_points]
+            timestamps, values = downsample.downsample(timestamps, values, max_points, method)
+            series[metric] = {'timestamps': timestamps, 'values': values}
+        return {'level': level, 'series': series}
+
+    def rebuild_rollups(self):
+        """원본 테이블에서 집계 테이블 전체 재계산"""
+        with self.write() as conn:
+            rollups.rebuild_rollups(conn)
+
+    def apply_retention(self, now=None):
+        """보존 기간이 지난 원본/집계 행 삭제 (rollups.RETENTION_DAYS)"""
+        with self.write() as conn:
+            deleted = rollups.apply_retention(conn, now)
+        if any(deleted.values()):
+            cache.invalidate_all()
+            print(f"보존 기간 정리: {deleted}")
+        return deleted
+
+    def archive_history(self, days=archive.ARCHIVE_AFTER_DAYS):
+        """days 일 이전 데이터를 장비/일 단위 Parquet 로 옮김 (archive.ARCHIVE_ROOT)"""
+        moved = archive.archive_before(self, datetime.now() - timedelta(days=days))
+        if any(moved.values()):
+            cache.invalidate_all()
+            print(f"Parquet 보관: {moved}")
+        return moved
+
+    def get_history(self, table, start=None, end=None, device_id=None, columns=None):
+        """기간 조회 - SQLite 의 최근 데이터와 Parquet 에 보관된 과거 데이터를 합쳐 반환
+        table: 'sensor_timeseries' | 'environment_measurements' | 'aggregated_device_status'
+        """
+        return archive.query_range(self, table, start, end, device_id, columns)
+
     def get_device_analysis(self, device_id):
         """디바이스 분석 결과 조회"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT timestamp, current_state, summary, critical_issues, 
-               warnings, recommendations, sensor_details
-        FROM device_analysis
-        WHERE device_id = ?
-        ORDER BY timestamp DESC
-        LIMIT 1
-        ''', (device_id,))
-        
-        result = cursor.fetchone()
-        
-        if not result:
-            return None
+        with self.read() as conn:
+            cursor = conn.cursor()
             
-        analysis_data = {
-            "timestamp": result[0],
-            "current_state": result[1],
-            "summary": result[2],
-            "critical_issues": json.loads(result[3]),
-            "warnings": json.loads(result[4]),
-            "recommendations": json.loads(result[5]),
-            "sensor_details": json.loads(result[6])
-        }
-        
-        cursor.execute('''
-        SELECT normal_ratio, caution_ratio, warning_ratio, risk_ratio
-        FROM aggregated_device_status
-        WHERE device_id = ?
-        ORDER BY aggregation_end DESC
-        LIMIT 1
-        ''', (device_id,))
-        
-        ratio_result = cursor.fetchone()
-        
-        if ratio_result:
-            analysis_data["state_ratios"] = {
-                "normal": ratio_result[0],
-                "caution": ratio_result[1],
-                "warning": ratio_result[2],
-                "risk": ratio_result[3]
+            cursor.execute('''
+            SELECT timestamp, current_state, summary, critical_issues, 
+                   warnings, recommendations, sensor_details
+            FROM device_analysis
+            WHERE device_id = ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+            ''', (device_id,))
+        
+            result = cursor.fetchone()
+        
+            if not result:
+                return None
+            
+            analysis_data = {
+                "timestamp": result[0],
+                "current_state": result[1],
+                "summary": result[2],
+                "critical_issues": json.loads(result[3]),
+                "warnings": json.loads(result[4]),
+                "recommendations": json.loads(result[5]),
+                "sensor_details": json.loads(result[6])
             }
+        
+            cursor.execute('''
+            SELECT normal_ratio, caution_ratio, warning_ratio, risk_ratio
+            FROM aggregated_device_status
+            WHERE device_id = ?
+            ORDER BY aggregation_end DESC
+            LIMIT 1
+            ''', (device_id,))
+        
+            ratio_result = cursor.fetchone()
+        
+            if ratio_result:
+                analysis_data["state_ratios"] = {
+                    "normal": ratio_result[0],
+                    "caution": ratio_result[1],
+                    "warning": ratio_result[2],
+                    "risk": ratio_result[3]
+                }
             
-        conn.close()
         return analysis_data
 
     def update_device_status(self, device_id: str, status_data: dict):
         """디바이스 상태 업데이트"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
+        with self.write() as conn:
+            cursor = conn.cursor()
+            
             if 'monitoring_in_progress' in status_data:
                 # 모니터링 상태만 업데이트
                 cursor.execute('''
@@ -301,7 +639,11 @@ class Database:
                 WHERE device_id = ?
                 ''', (status_data['monitoring_in_progress'], device_id))
             else:
-                # 전체 상태 업데이트
+                # 전체 상태 업데이트 (집계는 덮어쓸 기존 행을 읽어야 하므로 먼저 반영)
+                rollups.apply_rollup_rows(conn, 'status', device_id, [{
+                    'timestamp': status_data['end_time'],
+                    **{f'{state}_ratio': ratio for state, ratio in status_data['ratios'].items()}
+                }])
                 cursor.execute('''
                 INSERT OR REPLACE INTO aggregated_device_status
                 (device_id, status, aggregation_start, aggregation_end,
@@ -317,125 +659,143 @@ class Database:
                     status_data['ratios']['warning'],
                     status_data['ratios']['risk']
                 ))
-            
-            conn.commit()
-        finally:
-            conn.close()
+        # 커밋 후 무효화 (커밋 전에 올리면 이전 데이터가 새 버전 키로 캐시될 수 있음)
+        cache.invalidate(device_id)
 
     def update_device_analysis(self, device_id: str, timestamp: datetime, window_start: int, window_end: int, analysis_data: dict):
         """디바이스 분석 결과 업데이트 - 윈도우 정보 포함"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT OR REPLACE INTO device_analysis
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            device_id,
-            timestamp,
-            analysis_data['current_state'],
-            analysis_data['summary'],
-            json.dumps(analysis_data['critical_issues'], ensure_ascii=False),
-            json.dumps(analysis_data['warnings'], ensure_ascii=False),
-            json.dumps(analysis_data['recommendations'], ensure_ascii=False),
-            json.dumps(analysis_data['sensor_details'], ensure_ascii=False),
-            window_start,
-            window_end
-        ))
+        with self.write() as conn:
+            cursor = conn.cursor()
         
-        conn.commit()
-        conn.close()
-
-    def update_sensor_measurements(self, device_id: str, measurements: list):
-        """센서 측정값 업데이트"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        for measurement in measurements:
             cursor.execute('''
-            INSERT OR REPLACE INTO sensor_measurements
-            VALUES (?, ?, ?, ?)
+            INSERT OR REPLACE INTO device_analysis
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 device_id,
-                measurement['timestamp'],
-                measurement['sensor_name'],
-                measurement['value']
+                timestamp,
+                analysis_data['current_state'],
+                analysis_data['summary'],
+                json.dumps(analysis_data['critical_issues'], ensure_ascii=False),
+                json.dumps(analysis_data['warnings'], ensure_ascii=False),
+                json.dumps(analysis_data['recommendations'], ensure_ascii=False),
+                json.dumps(analysis_data['sensor_details'], ensure_ascii=False),
+                window_start,
+                window_end
             ))
+        cache.invalidate(device_id)
+
+
+    def update_sensor_measurements(self, device_id: str, measurements: list):
+        """센서 측정값 업데이트 (measurements: [{'timestamp', 'sensor_name', 'value'}, ...])"""
+        rows = {}
+        for measurement in measurements:
+            row = rows.setdefault(measurement['timestamp'], {'timestamp': measurement['timestamp']})
+            row[measurement['sensor_name']] = measurement['value']
         
-        conn.commit()
-        conn.close()
+        with self.write() as conn:
+            rollups.apply_rollup_rows(conn, 'sensor', device_id, list(rows.values()))
+            self._upsert_sensor_rows(conn, device_id, rows.values())
+        cache.invalidate(device_id)
 
     def update_environment_data(self, data: dict):
         """환경 데이터 업데이트"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        timestamp = datetime.now()
+        with self.write() as conn:
+            cursor = conn.cursor()
+            rollups.apply_rollup_rows(conn, 'environment', None, [{
+                'timestamp': timestamp,
+                'ex_temperature': data['temperature'],
+                'ex_humidity': data['humidity'],
+                'ex_illuminance': data['illuminance']
+            }])
         
-        cursor.execute('''
-        INSERT OR REPLACE INTO environment_measurements
-        VALUES (?, ?, ?, ?)
-        ''', (
-            datetime.now(),
-            data['temperature'],
-            data['humidity'],
-            data['illuminance']
-        ))
+            cursor.execute('''
+            INSERT OR REPLACE INTO environment_measurements
+            VALUES (?, ?, ?, ?)
+            ''', (
+                timestamp,
+                data['temperature'],
+                data['humidity'],
+                data['illuminance']
+            ))
+        cache.invalidate(cache.SHARED_KEY)
+
         
-        conn.commit()
-        conn.close()
+    def insert_window_measurements(self, device_id: str, sensor_rows: list, environment_rows: list):
+        """윈도우 단위 센서/환경 측정값 일괄 저장 (연결 1회, 단일 트랜잭션, executemany)
+        sensor_rows: [{'timestamp', 'NTC', 'PM1_0', ..., 'CT4'}, ...] (시각당 1행)
+        environment_rows: [{'timestamp', 'temperature', 'humidity', 'illuminance'}, ...]
+        """
+        with self.write() as conn:
+            # 1분/1시간/1일 집계 증분 반영 (덮어쓸 기존 원본 행을 읽어야 하므로 원본 저장 전에)
+            rollups.apply_rollup_rows(conn, 'sensor', device_id, sensor_rows)
+            rollups.apply_rollup_rows(conn, 'environment', None, [{
+                'timestamp': row['timestamp'],
+                'ex_temperature': row['temperature'],
+                'ex_humidity': row['humidity'],
+                'ex_illuminance': row['illuminance']
+            } for row in environment_rows])
+
+            self._upsert_sensor_rows(conn, device_id, sensor_rows)
+            
+            conn.executemany('''
+            INSERT OR REPLACE INTO environment_measurements
+            VALUES (?, ?, ?, ?)
+            ''', [(
+                row['timestamp'],
+                row['temperature'],
+                row['humidity'],
+                row['illuminance']
+            ) for row in environment_rows])
+        cache.invalidate(device_id, cache.SHARED_KEY)
         
     def update_device_status_raw(self, device_id: str, status: str, 
                                normal_ratio: float, caution_ratio: float, 
                                warning_ratio: float, risk_ratio: float):
         """device_status 테이블 업데이트"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.write() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        INSERT OR REPLACE INTO device_status
-        VALUES (?, ?, datetime('now', 'localtime'), ?, ?, ?, ?)
-        ''', (
-            device_id, 
-            status,
-            normal_ratio,
-            caution_ratio,
-            warning_ratio,
-            risk_ratio
-        ))
-        
-        conn.commit()
-        conn.close()
+            cursor.execute('''
+            INSERT OR REPLACE INTO device_status
+            VALUES (?, ?, datetime('now', 'localtime'), ?, ?, ?, ?)
+            ''', (
+                device_id, 
+                status,
+                normal_ratio,
+                caution_ratio,
+                warning_ratio,
+                risk_ratio
+            ))
+        cache.invalidate(device_id)
+
         
     def get_latest_device_status(self):
         """모든 디바이스의 최신 상태 조회"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.read() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT device_id, status, timestamp, normal_ratio, caution_ratio, warning_ratio, risk_ratio
-        FROM device_status
-        GROUP BY device_id
-        HAVING timestamp = MAX(timestamp)
-        ''')
+            cursor.execute('''
+            SELECT device_id, status, timestamp, normal_ratio, caution_ratio, warning_ratio, risk_ratio
+            FROM device_status
+            GROUP BY device_id
+            HAVING timestamp = MAX(timestamp)
+            ''')
         
-        results = cursor.fetchall()
-        conn.close()
+            results = cursor.fetchall()
         return results
     def load_device_data(self, device_type: str, device_number: str):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         table_name = f'{device_type.lower()}{device_number}_table'
         
         try:
-            cursor.execute(f'SELECT * FROM {table_name} LIMIT 300')
-            data = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
+            with self.read() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'SELECT * FROM {table_name} LIMIT 300')
+                data = cursor.fetchall()
+                columns = [description[0] for description in cursor.description]
             df = pd.DataFrame(data, columns=columns)
             return df
             
         except Exception as e:
             print(f"Error loading data for {device_type}{device_number}: {e}")
-            return pd.DataFrame()
-        
-        finally:
-            conn.close()
\ No newline at end of file
+            return pd.DataFrame()
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""차트용 시계열 다운샘플링 (NumPy)
+
+- minmax_downsample: 같은 개수로 나눈 구간마다 최솟값/최댓값 점을 남김 (피크가 사라지지 않음)
+- lttb: Largest-Triangle-Three-Buckets, 모양을 유지하는 점을 구간마다 1개 선택
+
+입력은 시각 순으로 정렬된 배열, 반환은 선택된 점의 인덱스 배열 (원본 시각/값을 그대로 사용).
+Streamlit 페이지에서도 import 할 수 있도록 app.* 모듈에 의존하지 않습니다.
+"""
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+# 다운샘플링 전에 읽는 점 수 상한 = max_points * OVERSAMPLE (이보다 길면 더 큰 집계 단위 사용)
+OVERSAMPLE = 10
+
+
+def minmax_downsample(values, max_points):
+    """구간별 최솟값/최댓값 인덱스 (최대 max_points 개, 시각 순)"""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start == end:
+            continue
+        bucket = values[start:end]
+        low, high = start + int(np.argmin(bucket)), start + int(np.argmax(bucket))
+        indices.extend(sorted({low, high}))
+    return np.asarray(indices)
+
+
+def lttb(x, y, max_points):
+    """Largest-Triangle-Three-Buckets 인덱스 (첫/마지막 점 포함, 최대 max_points 개)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    indices = [0]
+    for bucket_index in range(max_points - 2):
+        start, end = edges[bucket_index], edges[bucket_index + 1]
+        # 다음 구간 평균 점 (마지막 구간은 마지막 점)
+        next_start = end
+        next_end = edges[bucket_index + 2] if bucket_index + 2 < len(edges) else n
+        next_x = x[next_start:next_end].mean() if next_end > next_start else x[-1]
+        next_y = y[next_start:next_end].mean() if next_end > next_start else y[-1]
+
+        previous = indices[-1]
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        indices.append(start + int(np.argmax(areas)))
+    indices.append(n - 1)
+    return np.asarray(indices)
+
+
+def downsample(timestamps, values, max_points, method='minmax'):
+    """(시각 목록, 값 목록) 다운샘플링 - 값이 None/NaN 인 점은 제외"""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    timestamps = np.asarray(timestamps, dtype=object)[valid]
+    values = values[valid]
+    if method == 'lttb':
+        x = np.asarray(timestamps.tolist(), dtype='datetime64[ms]').astype('int64')
+        indices = lttb(x, values, max_points)
+    else:
+        indices = minmax_downsample(values, max_points)
+    return timestamps[indices].tolist(), values[indices].tolist()
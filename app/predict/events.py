@@ -0,0 +1,123 @@
+"""장비 상태/분석 변경 이벤트의 프로세스 내 pub/sub
+
+DeviceMonitor(스레드)가 상태 저장/분석 저장 직후 publish 하고,
+/pred/stream (SSE, WebSocket) 구독자는 asyncio 큐로 즉시 전달받습니다.
+- 이벤트: {'type': 'status' | 'analysis', 'device_id', 'data', 'snapshot'}
+- data 는 직전 값과 달라진 필드만 포함 (delta), 구독 시작 시 장비별 최신 전체 값을 snapshot=True 로 먼저 전달
+- 느린 구독자는 큐가 가득 차면 대기 중인 delta 를 모두 버리고 (모니터 스레드는 막히지 않음),
+  해당 장비/유형은 다음 get() 에서 최신 전체 값을 snapshot=True 로 다시 전달 (이후 delta 는 순서대로 이어짐)
+"""
+import asyncio
+import threading
+
+EVENT_TYPES = ('status', 'analysis')
+
+
+class Subscription:
+    """구독자 하나의 이벤트 큐 (with 블록 종료 시 구독 해제)"""
+    def __init__(self, broker, device_ids=None, max_queue=100):
+        self.broker = broker
+        self.device_ids = set(device_ids) if device_ids is not None else None
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.stale = set()  # delta 를 버려 snapshot 을 다시 보내야 하는 (device_id, type)
+        self.dropped = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.broker.unsubscribe(self)
+
+    def wants(self, device_id):
+        return self.device_ids is None or device_id in self.device_ids
+
+    def push(self, event):
+        """다른 스레드에서 호출 - 이벤트 루프에서 큐에 넣음"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # 일부 delta 만 빠지면 클라이언트 상태가 어긋나므로 모두 버리고 snapshot 으로 다시 맞춤
+            while not self.queue.empty():
+                self._mark_stale(self.queue.get_nowait())
+            self._mark_stale(event)
+            return
+        self.queue.put_nowait(event)
+
+    def _mark_stale(self, event):
+        self.stale.add((event['device_id'], event['type']))
+        self.dropped += 1
+
+    async def get(self, timeout=None):
+        """다음 이벤트 (timeout 초 동안 없으면 None) - 버려진 delta 가 있으면 최신 snapshot 을 먼저 반환"""
+        while self.stale:
+            event = self.broker.snapshot_event(*self.stale.pop())
+            if event is not None:
+                return event
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """장비별 최신 상태를 보관하고 변경분을 구독자에게 전달"""
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._snapshots = {}  # (device_id, type) -> 최신 전체 data
+        self._lock = threading.Lock()
+
+    def publish(self, device_id, event_type, data):
+        """변경된 필드만 구독자에게 전달 - 어느 스레드에서나 호출 가능"""
+        with self._lock:
+            previous = self._snapshots.get((device_id, event_type), {})
+            delta = {key: value for key, value in data.items() if previous.get(key) != value}
+            self._snapshots[(device_id, event_type)] = {**previous, **data}
+            subscribers = [subscription for subscription in self._subscribers if subscription.wants(device_id)]
+        if not delta:
+            return
+
+        event = {'type': event_type, 'device_id': device_id, 'data': delta, 'snapshot': False}
+        for subscription in subscribers:
+            try:
+                subscription.push(event)
+            except RuntimeError:
+                # 구독자의 이벤트 루프가 이미 종료됨
+                self.unsubscribe(subscription)
+
+    def subscribe(self, device_ids=None):
+        """구독 시작 (이벤트 루프 안에서 호출) - device_ids 가 None 이면 전체 장비"""
+        subscription = Subscription(self, device_ids, self.max_queue)
+        with self._lock:
+            for (device_id, event_type), data in sorted(self._snapshots.items()):
+                if subscription.wants(device_id):
+                    subscription._put({'type': event_type, 'device_id': device_id,
+                                       'data': dict(data), 'snapshot': True})
+            self._subscribers.add(subscription)
+        return subscription
+
+    def snapshot_event(self, device_id, event_type):
+        """장비/유형의 최신 전체 값 이벤트 (없으면 None)"""
+        with self._lock:
+            data = self._snapshots.get((device_id, event_type))
+        if data is None:
+            return None
+        return {'type': event_type, 'device_id': device_id, 'data': dict(data), 'snapshot': True}
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+_broker = EventBroker()
+
+
+def get_event_broker() -> EventBroker:
+    """프로세스 공용 이벤트 브로커"""
+    return _broker
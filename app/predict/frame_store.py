@@ -0,0 +1,126 @@
+"""장비별 열화상 프레임 저장소
+
+프레임마다 .bin 파일을 np.load 하는 대신, 장비별로 모든 프레임을 하나의 연속된
+[N, 120, 160] float32 배열(frames.npy)로 묶고 메모리 매핑하여 읽습니다.
+index.json 은 filenames 칼럼 값 -> 배열 오프셋 매핑, frame_max.npy 는 프레임별 최고 온도입니다.
+
+변환 (sensor_data.db 의 {device}_table.filenames 칼럼 기준):
+    python -m app.predict.frame_store agv17 agv18 oht17 oht18
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+
+FRAME_STORE_ROOT = './data/frame_store'
+FRAME_SHAPE = (120, 160)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class ThermalFrameStore:
+    """메모리 매핑된 장비별 열화상 프레임 배열과 파일명 인덱스"""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'index.json'), 'r', encoding='utf-8') as file:
+            self.index = json.load(file)
+        # copy-on-write 모드: 파일은 수정되지 않고 torch.from_numpy 로 복사 없이 사용 가능
+        self.frames = np.load(os.path.join(path, 'frames.npy'), mmap_mode='c')
+        self.frame_max = np.load(os.path.join(path, 'frame_max.npy'))
+
+    def __contains__(self, filename):
+        return filename in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def offsets(self, filenames) -> np.ndarray:
+        """파일명 목록 -> 배열 오프셋"""
+        return np.fromiter((self.index[filename] for filename in filenames), dtype=np.int64)
+
+    def read(self, filename) -> np.ndarray:
+        """프레임 1장 [120, 160] 반환 (복사 없는 view)"""
+        return self.frames[self.index[filename]]
+
+    def read_many(self, filenames) -> np.ndarray:
+        """프레임 묶음 [n, 120, 160] 반환 - 연속 구간이면 복사 없는 slice"""
+        offsets = self.offsets(filenames)
+        if len(offsets) and np.all(np.diff(offsets) == 1):
+            return self.frames[offsets[0]:offsets[-1] + 1]
+        return self.frames[offsets]
+
+    def max_temperatures(self, filenames=None) -> np.ndarray:
+        """프레임별 최고 온도 (변환 시 미리 계산된 값)"""
+        if filenames is None:
+            return self.frame_max
+        return self.frame_max[self.offsets(filenames)]
+
+    @classmethod
+    def build(cls, path, filenames, base_dir='.'):
+        """filenames 목록의 .bin 파일들을 하나의 frames.npy 로 변환"""
+        os.makedirs(path, exist_ok=True)
+        unique_filenames = list(dict.fromkeys(filenames))
+        frames = np.lib.format.open_memmap(
+            os.path.join(path, 'frames.npy'), mode='w+',
+            dtype=np.float32, shape=(len(unique_filenames), *FRAME_SHAPE)
+        )
+        for offset, filename in enumerate(unique_filenames):
+            frames[offset] = np.load(os.path.join(base_dir, filename)).reshape(FRAME_SHAPE)
+        frames.flush()
+
+        np.save(os.path.join(path, 'frame_max.npy'), frames.max(axis=(1, 2)))
+        with open(os.path.join(path, 'index.json'), 'w', encoding='utf-8') as file:
+            json.dump({filename: offset for offset, filename in enumerate(unique_filenames)},
+                      file, ensure_ascii=False)
+        del frames
+        return cls(path)
+
+
+def get_frame_store(device_id, root=FRAME_STORE_ROOT):
+    """장비의 프레임 저장소 반환 (변환되지 않은 장비는 None)"""
+    device_id = device_id.lower()
+    with _stores_lock:
+        if device_id not in _stores:
+            path = os.path.join(root, device_id)
+            _stores[device_id] = ThermalFrameStore(path) if os.path.exists(os.path.join(path, 'index.json')) else None
+        return _stores[device_id]
+
+
+def read_frame(filename, store=None, base_dir='.') -> np.ndarray:
+    """저장소에 있으면 메모리 매핑에서, 없으면 개별 .bin 파일에서 프레임 읽기"""
+    if store is not None and filename in store:
+        return store.read(filename)
+    return np.load(os.path.join(base_dir, filename))
+
+
+def read_max_temperatures(filenames, store=None, base_dir='.') -> np.ndarray:
+    """프레임별 최고 온도 목록"""
+    filenames = list(filenames)
+    if store is not None and all(filename in store for filename in filenames):
+        return store.max_temperatures(filenames)
+    return np.array([read_frame(filename, store, base_dir).max() for filename in filenames])
+
+
+def convert_device(device_id, db_path='sensor_data.db', root=FRAME_STORE_ROOT, base_dir='.'):
+    """{device}_table 의 filenames 칼럼으로 장비 프레임 저장소 생성"""
+    device_id = device_id.lower()
+    conn = sqlite3.connect(db_path)
+    try:
+        filenames = [row[0] for row in conn.execute(f'SELECT filenames FROM {device_id}_table')]
+    finally:
+        conn.close()
+
+    store = ThermalFrameStore.build(os.path.join(root, device_id), filenames, base_dir)
+    with _stores_lock:
+        _stores[device_id] = store
+    return store
+
+
+if __name__ == '__main__':
+    for device_id in sys.argv[1:] or ['agv17', 'agv18', 'oht17', 'oht18']:
+        store = convert_device(device_id)
+        print(f"{device_id}: {len(store)} frames -> {store.path}")
@@ -0,0 +1,157 @@
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+import torch
+
+
+class InferenceRequest:
+    """장비 하나가 제출한 추론 요청 (이미지/센서 텐서와 결과를 돌려받을 Future)"""
+    def __init__(self, device_type, images, sensors):
+        self.device_type = device_type
+        self.images = images
+        self.sensors = sensors
+        self.future = Future()
+
+
+class InferenceScheduler:
+    """장비 유형별 공유 모델을 단일 워커에서 실행하는 중앙 추론 스케줄러
+
+    장비별 모니터링 스레드는 프레임 텐서를 제출만 하고, 워커가 같은 유형(AGV/OHT)의
+    대기 중인 요청을 모아 적정 크기의 마이크로 배치로 추론한 뒤 결과를 각 장비에 돌려줍니다.
+    여러 스레드가 동시에 모델을 호출하며 PyTorch 연산 스레드가 코어를 과점유하는 문제를 막습니다.
+    """
+    def __init__(self, model_loader, max_batch_size=64, num_threads=None, max_wait=0.05):
+        """
+        Parameter:
+        model_loader: device_type 을 받아 추론 모델을 반환하는 함수
+        max_batch_size: 한 번에 모델에 넣을 최대 프레임 수
+        num_threads: 워커가 사용할 torch 연산 스레드 수 (기본값: CPU 코어 수)
+        max_wait: 다른 장비의 요청을 모으기 위해 기다리는 최대 시간(초)
+        """
+        self.model_loader = model_loader
+        self.max_batch_size = max_batch_size
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._stopped = False  # stop() 이후 start() 전까지 제출된 요청은 바로 실패
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'frames': 0, 'batches': 0, 'busy_seconds': 0.0}
+
+    def start(self):
+        """워커 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            self._stopped = False
+            self._ensure_worker()
+
+    def _ensure_worker(self):
+        """(lock 안에서 호출) 워커가 없으면 새 큐와 함께 시작"""
+        if self._worker is None or not self._worker.is_alive():
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, args=(self._queue,), daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """대기 중인 요청 처리 후 워커 종료 - 이후 submit 은 start() 전까지 실패"""
+        with self._lock:
+            self._stopped = True
+            if self._worker is not None:
+                # 종료 중인 워커와 큐를 분리하여, 다시 start() 하면 새 워커/큐를 사용
+                self._queue.put(None)
+                self._worker = None
+
+    def submit(self, device_type, images, sensors) -> Future:
+        """프레임 텐서 추론 요청 - Future.result() 로 프레임별 예측 클래스 텐서 반환
+        stop() 이후에는 RuntimeError 가 설정된 Future 반환
+        """
+        request = InferenceRequest(device_type, images, sensors)
+        with self._lock:
+            if self._stopped:
+                request.future.set_exception(RuntimeError('Inference scheduler is stopped'))
+                return request.future
+            self._ensure_worker()
+            self._queue.put(request)
+        return request.future
+
+    def stats(self):
+        """처리량 통계 반환"""
+        with self._lock:
+            stats = dict(self._stats)
+        busy = stats['busy_seconds']
+        stats['frames_per_second'] = round(stats['frames'] / busy, 1) if busy else 0.0
+        return stats
+
+    def _run(self, requests_queue):
+        torch.set_num_threads(self.num_threads)
+        running = True
+        while running:
+            request = requests_queue.get()
+            if request is None:
+                break
+
+            # 짧은 시간 동안 다른 장비의 요청을 모아 함께 처리
+            pending = [request]
+            deadline = time.monotonic() + self.max_wait
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = requests_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    running = False
+                    break
+                pending.append(request)
+
+            groups = defaultdict(list)
+            for request in pending:
+                groups[request.device_type].append(request)
+            for device_type, requests in groups.items():
+                self._run_group(device_type, requests)
+
+        # 종료 신호 뒤에 남은 요청은 기다리는 스레드가 멈추지 않도록 실패 처리
+        while True:
+            try:
+                request = requests_queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and not request.future.done():
+                request.future.set_exception(RuntimeError('Inference scheduler is stopped'))
+
+    def _run_group(self, device_type, requests):
+        """같은 장비 유형의 요청들을 하나로 합쳐 마이크로 배치 단위로 추론"""
+        try:
+            started = time.perf_counter()
+            model = self.model_loader(device_type)
+            images = torch.cat([request.images for request in requests])
+            sensors = torch.cat([request.sensors for request in requests])
+
+            outputs = []
+            with torch.no_grad():
+                for start in range(0, len(images), self.max_batch_size):
+                    end = start + self.max_batch_size
+                    outputs.append(torch.argmax(model(images[start:end], sensors[start:end]), dim=1))
+            predictions = torch.cat(outputs)
+
+            offset = 0
+            for request in requests:
+                size = len(request.images)
+                request.future.set_result(predictions[offset:offset + size])
+                offset += size
+
+            with self._lock:
+                self._stats['requests'] += len(requests)
+                self._stats['frames'] += len(images)
+                self._stats['batches'] += len(outputs)
+                self._stats['busy_seconds'] += time.perf_counter() - started
+        except Exception as e:
+            print(f"Inference failed for {device_type}: {e}")
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
@@ -0,0 +1,122 @@
+"""LLM 응답(리포트 결론) 영구 캐시
+
+프롬프트 입력을 정규화한 JSON 의 해시를 키로 SQLite 에 저장하므로,
+분석 내용이 같은 리포트를 다시 만들 때는 ChatGPT 를 호출하지 않습니다.
+- TTL: 저장 후 LLM_CACHE_TTL 초가 지나면 다시 생성
+- LRU: LLM_CACHE_MAX_ENTRIES 개를 넘으면 가장 오래 사용하지 않은 항목부터 삭제
+- stats(): hit/miss 횟수와 적중률
+LLM 호출 함수는 인자로 받으므로 로컬 가짜 함수로 바꿔 실행할 수 있습니다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app.predict.sensor_db import get_sensor_db
+
+LLM_CACHE_PATH = os.getenv('MONOGUARD_LLM_CACHE_PATH', './data/llm_cache.db')
+LLM_CACHE_TTL = int(os.getenv('MONOGUARD_LLM_CACHE_TTL', 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('MONOGUARD_LLM_CACHE_MAX_ENTRIES', 5000))
+
+CACHE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )
+'''
+CACHE_INDEX = 'CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)'
+
+
+def normalize(value):
+    """키 계산용 정규화 - 문자열 앞뒤 공백 제거, 사전은 키 순서 무시"""
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    return value
+
+
+def cache_key(model, inputs):
+    """(모델, 정규화한 프롬프트 입력) 의 sha256"""
+    payload = json.dumps({'model': model, 'inputs': normalize(inputs)},
+                         ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite 기반 LLM 응답 캐시 (TTL + LRU)"""
+    def __init__(self, db_path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db = get_sensor_db(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        with self.db.write() as conn:
+            conn.execute(CACHE_TABLE)
+            conn.execute(CACHE_INDEX)
+
+    def get(self, key, now=None):
+        """저장된 응답 (없거나 TTL 이 지났으면 None)"""
+        now = now or time.time()
+        with self.db.read() as conn:
+            row = conn.execute('SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            return None
+        with self.db.write() as conn:
+            conn.execute('UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?', (now, key))
+        return row[0]
+
+    def put(self, key, model, response, now=None):
+        now = now or time.time()
+        with self.db.write() as conn:
+            conn.execute('''
+            INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used, hits)
+            VALUES (?, ?, ?, ?, ?, 0)
+            ''', (key, model, response, now, now))
+            self._evict(conn, now)
+
+    def get_or_create(self, model, inputs, generate):
+        """캐시에 있으면 반환, 없으면 generate() 결과를 저장 후 반환"""
+        key = cache_key(model, inputs)
+        response = self.get(key)
+        with self._stats_lock:
+            if response is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if response is None:
+            response = generate()
+            self.put(key, model, response)
+        return response
+
+    def stats(self):
+        with self.db.read() as conn:
+            entries = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'entries': entries
+            }
+
+    def _evict(self, conn, now):
+        """TTL 이 지난 항목 삭제 후 max_entries 를 넘는 만큼 LRU 삭제"""
+        if self.ttl is not None:
+            conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl,))
+        if self.max_entries is not None:
+            conn.execute('''
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            ''', (self.max_entries,))
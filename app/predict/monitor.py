@@ -1,16 +1,23 @@
 import torch
-from torch.utils.data import DataLoader
 from datetime import datetime, timedelta
 import threading
 import time
+import os
 from app.predict.dbfunc import Database
 from app.predict.MultiModal.dataset import MultimodalTestDataset
-from app.predict.MultiModal.model import ConditionClassifier
+from app.predict.MultiModal.variants import load_model_variant
 from app.predict.analyzer import ImprovedSensorAnalyzer
+from app.predict.prediction_cache import FramePredictionCache
+from app.predict.inference import InferenceScheduler
+from app.predict.frame_store import get_frame_store
+from app.predict.rolling_stats import RollingSensorStats
+from app.predict.events import get_event_broker
 
 class DeviceMonitor:
     def __init__(self):
         self.db = Database()
+        # 상태/분석 저장 직후 /pred/stream 구독자에게 전달
+        self.events = get_event_broker()
         self.model_config = {
             "img_dim_h": 120,
             "img_dim_w": 160,
@@ -22,12 +29,25 @@ class DeviceMonitor:
             "num_classes": 4
         }
         self.models = {}
+        # 분석기는 상태가 없으므로 모든 장비/점검에서 공유 (분포/메시지 사전을 매번 만들지 않음)
+        self.analyzer = ImprovedSensorAnalyzer(self.model_config)
+        # 1/true 이면 디코더를 생략한 인코더 전용 경로로 추론 (일치도는 MultiModal/evaluate.py 로 검증)
+        self.encoder_only = os.getenv('MONOGUARD_ENCODER_ONLY', 'false').lower() in ('1', 'true', 'yes')
+        # 추론 모델 변형: fp32 | int8 | torchscript (MultiModal/variants.py 로 생성)
+        self.model_variant = os.getenv('MONOGUARD_MODEL_VARIANT', 'fp32')
         self.running = True
         self.window_size = 300
         self.step_size = 30
         self.monitoring_interval = 300
+        self.retention_interval = 3600  # 원본/집계 데이터 보존 기간 정리 주기 (초)
         self.monitoring_devices = set()  # 모니터링 중인 장비 추적
         self.monitoring_threads = {}  # Store monitoring threads
+        self.retention_thread = None
+        self.rolling_stats = {}  # 장비별 슬라이딩 윈도우 센서 통계
+        self.prediction_cache = FramePredictionCache(max_frames_per_device=self.window_size * 10)
+        # 모든 장비의 추론을 단일 워커에서 마이크로 배치로 처리
+        self.scheduler = InferenceScheduler(self.load_model, max_batch_size=64)
+        self.inference_timeout = 300  # 추론 결과 최대 대기 시간 (초) - 초과 시 이번 점검은 오류 처리
 
 
     def is_monitoring(self, device_id: str) -> bool:
@@ -37,9 +57,7 @@ class DeviceMonitor:
     def load_model(self, device_type):
         """모델 로드"""
         if device_type not in self.models:
-            model = ConditionClassifier(**self.model_config)
-            path = f'app/predict/Parameters/{device_type}_Best_State_Model.pth'
-            model.load_state_dict(torch.load(path, map_location='cpu'))
+            model = load_model_variant(device_type, self.model_variant, self.encoder_only)
             self.models[device_type] = model.eval()
             if(model):
                 print("model load Successful!")
@@ -49,6 +67,7 @@ class DeviceMonitor:
         try:
             self.monitoring_devices.add(device_id)
             self.db.update_device_status(device_id, {'monitoring_in_progress': True})
+            self.events.publish(device_id, 'status', {'monitoring_in_progress': True})
             
             device_type = 'OHT' if 'oht' in device_id.lower() else 'AGV'
             
@@ -57,18 +76,16 @@ class DeviceMonitor:
                 print(f"Not enough data for device {device_id}")
                 return
 
-            analyzer = ImprovedSensorAnalyzer(self.model_config)
-            model = self.load_model(device_type)
+            analyzer = self.analyzer
             current_time = datetime.now()
 
+            rolling_stats = self._get_rolling_stats(device_id, analyzer)
+
             for start in range(0, len(df) - self.window_size + 1, self.step_size):
                 window = df.iloc[start:start + self.window_size]
-                dataset = MultimodalTestDataset(window)
-                dataloader = DataLoader(dataset, batch_size=self.window_size)
-                images, sensors = next(iter(dataloader))
-
-                with torch.no_grad():
-                    predictions = torch.argmax(model(images, sensors), dim=1)
+                predictions = self._predict_window(device_id, device_type, window)
+                # 이전 윈도우 이후 새로 들어온 행만 통계에 반영
+                rolling_stats.slide(window)
 
                 # 정수로 카운트하여 정확한 비율 계산
                 counts = {
@@ -113,15 +130,47 @@ class DeviceMonitor:
                     'ratios': ratios
                 }
                 self.db.update_device_status(device_id, status_data)
+                self.events.publish(device_id, 'status', {
+                    'status': status,
+                    'timestamp': window_time.isoformat(),
+                    'ratios': ratios
+                })
 
                 if start + self.window_size >= len(df):
                     self._update_final_window_data(device_id, window, window_time)
-                    analysis_result = analyzer.analyze_device_status(device_id, window)
+                    analysis_result = analyzer.analyze_device_status(device_id, window, rolling_stats.snapshot())
                     analysis_result['current_state'] = status
                     self._save_analysis_result(device_id, window_time, status, analysis_result)
         finally:
             self.monitoring_devices.remove(device_id)
+            self.events.publish(device_id, 'status', {'monitoring_in_progress': False})
             
+    def _get_rolling_stats(self, device_id, analyzer):
+        """장비별 롤링 통계 객체 반환 (없으면 생성)"""
+        if device_id not in self.rolling_stats:
+            self.rolling_stats[device_id] = RollingSensorStats(
+                analyzer.sensor_columns, self.window_size, analyzer.get_engine(device_id)
+            )
+        return self.rolling_stats[device_id]
+
+    def _predict_window(self, device_id, device_type, window):
+        """윈도우 내 프레임별 예측 - 캐시에 없는 프레임만 모델 추론"""
+        keys = window['filenames'].tolist()
+        cached = self.prediction_cache.get_many(device_id, keys)
+        missing = [idx for idx, value in enumerate(cached) if value is None]
+
+        if missing:
+            dataset = MultimodalTestDataset(window.iloc[missing], get_frame_store(device_id))
+            images, sensors = dataset.get_batch()
+            new_predictions = self.scheduler.submit(device_type, images, sensors).result(
+                timeout=self.inference_timeout).tolist()
+
+            self.prediction_cache.put_many(device_id, [keys[idx] for idx in missing], new_predictions)
+            for idx, prediction in zip(missing, new_predictions):
+                cached[idx] = prediction
+
+        return torch.tensor(cached, dtype=torch.long)
+
     def _update_final_window_data(self, device_id, window, window_time):
         """마지막 윈도우 데이터 업데이트"""
         data_to_insert = window.tail(self.step_size)
@@ -129,43 +178,48 @@ class DeviceMonitor:
                        if col not in ['device_id', 'timestamp', 'filenames',
                                     'ex_temperature', 'ex_humidity', 'ex_illuminance']]
         
+        sensor_rows = []
+        environment_rows = []
         for idx, row in data_to_insert.iterrows():
             timestamp = window_time + timedelta(seconds=idx)
-            # 환경 데이터 업데이트
-            self.db.update_environment_data({
+            # 환경 데이터
+            environment_rows.append({
+                'timestamp': timestamp,
                 'temperature': float(row['ex_temperature']),
                 'humidity': float(row['ex_humidity']),
                 'illuminance': float(row['ex_illuminance'])
             })
             
-            # 센서 측정값 업데이트
-            measurements = [{
+            # 센서 측정값 (시각당 1행)
+            sensor_rows.append({
                 'timestamp': timestamp,
-                'sensor_name': sensor,
-                'value': float(row[sensor])
-            } for sensor in sensor_columns]
-            self.db.update_sensor_measurements(device_id, measurements)
+                **{sensor: float(row[sensor]) for sensor in sensor_columns}
+            })
+
+        # 윈도우 전체를 한 트랜잭션으로 저장
+        self.db.insert_window_measurements(device_id, sensor_rows, environment_rows)
 
     def _save_analysis_result(self, device_id, timestamp, status, analysis_result):
         """분석 결과 저장"""
         window_start = int(timestamp.timestamp())
         window_end = window_start + self.window_size
+        analysis_data = {
+            'current_state': status,
+            'summary': analysis_result['summary'],
+            'critical_issues': analysis_result['critical_issues'],
+            'warnings': analysis_result['warnings'],
+            'recommendations': analysis_result['recommendations'],
+            'sensor_details': analysis_result['sensor_details']
+        }
         
         self.db.update_device_analysis(
             device_id=device_id,
             timestamp=timestamp,
             window_start=window_start,
             window_end=window_end,
-            analysis_data={
-                'current_state': status,
-                'summary': analysis_result['summary'],
-                'critical_issues': analysis_result['critical_issues'],
-                'warnings': analysis_result['warnings'],
-                'recommendations': analysis_result['recommendations'],
-                'sensor_details': analysis_result['sensor_details']
-
-            }
+            analysis_data=analysis_data
         )
+        self.events.publish(device_id, 'analysis', {'timestamp': timestamp.isoformat(), **analysis_data})
 
     def monitor_device(self, device_id):
         """Monitor individual device"""
@@ -178,8 +232,22 @@ class DeviceMonitor:
                 print(f"Error monitoring {device_id}: {e}")
                 time.sleep(30)
 
+    def run_retention(self):
+        """지난 데이터 Parquet 보관 및 보존 기간이 지난 원본/집계 데이터 주기적 정리"""
+        while self.running:
+            try:
+                self.db.archive_history()
+                self.db.apply_retention()
+            except Exception as e:
+                print(f"Error applying retention: {e}")
+            time.sleep(self.retention_interval)
+
     def start_monitoring(self, device_ids):
         """Start monitoring for given device IDs"""
+        self.scheduler.start()
+        if self.retention_thread is None:
+            self.retention_thread = threading.Thread(target=self.run_retention, daemon=True)
+            self.retention_thread.start()
         for device_id in device_ids:
             if device_id not in self.monitoring_threads:
                 thread = threading.Thread(
@@ -192,4 +260,5 @@ class DeviceMonitor:
 
     def stop_monitoring(self):
         """모니터링 중지"""
-        self.running = False
\ No newline at end of file
+        self.running = False
+        self.scheduler.stop()
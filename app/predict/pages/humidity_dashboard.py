@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import sqlite3
+from sensor_db import read_dataframe
 
 st.set_page_config(page_title="습도 모니터링", layout="wide", initial_sidebar_state="collapsed")
 
@@ -24,16 +24,14 @@ st.markdown("""
 
 def load_data():
     try:
-        conn = sqlite3.connect('sensor_data.db')
         query = """
             SELECT timestamp, ex_humidity 
             FROM environment_measurements
             ORDER BY timestamp DESC 
             LIMIT 300
         """
-        df = pd.read_sql_query(query, conn)
+        df = read_dataframe(query)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
-        conn.close()
         return df
     except Exception as e:
         st.error("⚠️ 데이터 로드 실패")
@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import sqlite3
 import numpy as np
 import matplotlib.pyplot as plt
 import requests
 from thermal_image_analysis import ThermalImageAnalysis
+from frame_store import get_frame_store, read_frame, read_max_temperatures
+from sensor_db import read_dataframe
 import time
 import os
 st.set_page_config(
@@ -145,52 +146,37 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-def load_thermal_image(bin_path):
+# 프로젝트 루트 (filenames 칼럼은 루트 기준 상대 경로)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+
+def load_thermal_image(bin_path, device_id):
     try:
-        data = np.load(bin_path)
+        data = read_frame(bin_path, get_frame_store(device_id), PROJECT_ROOT)
         return data
     except Exception as e:
         st.error(f"이미지 로드 중 오류 발생: {str(e)}")
         return None
 
-def get_db_connection():
-    try:
-        return sqlite3.connect('sensor_data.db')
-    except Exception as e:
-        st.error(f"데이터베이스 연결 오류: {str(e)}")
-        return None
-
 def get_thermal_data(device_id):
     try:
         device_type = 'oht' if 'oht' in device_id.lower() else 'agv'
         number = ''.join(filter(str.isdigit, device_id))
         table = f"{device_type}{number}_table"
        
-        conn = get_db_connection()
-        if conn is None:
-            return []
-           
         query = f"SELECT filenames FROM {table}"
-        df = pd.read_sql(query, conn)
-        conn.close()
+        df = read_dataframe(query)
        
-        current_file_dir = os.path.dirname(os.path.abspath(__file__))
-        # 루트 상위폴더로 이동해야함
-        project_root = os.path.abspath(os.path.join(current_file_dir, "..", "..", ".."))
-        absolute_paths = [os.path.join(project_root, filename) for filename in df['filenames'].tolist()]
-        return absolute_paths
+        # 프레임 저장소 인덱스와 동일한 상대 경로 그대로 반환 (읽을 때 PROJECT_ROOT 기준으로 해석)
+        return df['filenames'].tolist()
     except Exception as e:
         st.error(f"데이터 조회 중 오류 발생: {str(e)}")
         return []
  
 
-def aggregated_high_temperature_mean(window):
+def aggregated_high_temperature_mean(window, device_id):
     try:
-        agg = []
-        for image in window['filenames']:
-            data = np.load(image)
-            agg.append(data.max())
-        return np.array(agg).mean()
+        agg = read_max_temperatures(window['filenames'], get_frame_store(device_id), PROJECT_ROOT)
+        return agg.mean()
     except Exception as e:
         st.warning(f"온도 평균 계산 중 오류 발생: {str(e)}")
         return None
@@ -213,7 +199,7 @@ def display_statistics(img, window, thermal_analyze, stats_placeholder):
         min_temp = np.min(img)
         max_temp = np.max(img)
         state_prob = thermal_analyze.ProbabiltyOfState(max_temp)
-        agg_temp = aggregated_high_temperature_mean(window)
+        agg_temp = aggregated_high_temperature_mean(window, thermal_analyze.device_id)
         
         current_state = max(state_prob.items(), key=lambda x: x[1])[0]
         state_colors = {
@@ -327,7 +313,7 @@ def main():
             try:
                 window = df[start:start + window_size]
                 bin_path = window['filenames'].iloc[-1]
-                img = load_thermal_image(bin_path)
+                img = load_thermal_image(bin_path, selected_device)
                 
                 if img is not None:
                     display_thermal_image(img, image_placeholder)
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import sqlite3
+from sensor_db import read_dataframe
 
 # 페이지 설정
 st.set_page_config(
@@ -103,17 +103,15 @@ st.markdown("""
 
 def load_data():
     try:
-        conn = sqlite3.connect('sensor_data.db')
         query = """
-            SELECT timestamp, sensor_name, sensor_value 
-            FROM sensor_measurements
-            WHERE sensor_name = 'NTC'
+            SELECT timestamp, NTC AS sensor_value 
+            FROM sensor_timeseries
+            WHERE NTC IS NOT NULL
             ORDER BY timestamp DESC 
             LIMIT 300
         """
-        df = pd.read_sql_query(query, conn)
+        df = read_dataframe(query)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
-        conn.close()
         return df
     except Exception as e:
         st.error("⚠️ 데이터 로드 실패")
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import sqlite3
+from sensor_db import read_dataframe
 
 # 페이지 설정
 st.set_page_config(
@@ -115,17 +115,14 @@ st.markdown("""
 
 def load_data():
     try:
-        conn = sqlite3.connect('sensor_data.db')
         query = """
-            SELECT timestamp, sensor_name, sensor_value 
-            FROM sensor_measurements
-            WHERE sensor_name IN ('PM10', 'PM2_5', 'PM1_0')
+            SELECT timestamp, PM10, PM2_5, PM1_0 
+            FROM sensor_timeseries
             ORDER BY timestamp DESC 
-            LIMIT 300
+            LIMIT 100
         """
-        df = pd.read_sql_query(query, conn)
+        df = read_dataframe(query)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
-        conn.close()
         return df
     except Exception as e:
         st.error("⚠️ 데이터 로드 실패")
@@ -158,7 +155,7 @@ def main():
     
     for sensor_type, tab in tabs.items():
         with tab:
-            sensor_data = df[df['sensor_name'] == sensor_type].copy()
+            sensor_data = df[['timestamp', sensor_type]].dropna().rename(columns={sensor_type: 'sensor_value'})
             if not sensor_data.empty:
                 # 주요 지표 계산
                 current_value = sensor_data['sensor_value'].iloc[0]
@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+
+class FramePredictionCache:
+    """장비별 프레임 단위 예측 결과 캐시
+
+    슬라이딩 윈도우(300프레임, 30프레임 이동)는 이전 윈도우와 270프레임이 겹치므로
+    (device_id, 프레임 키) 단위로 예측 클래스를 저장해두고 새로 들어온 프레임만 추론합니다.
+    프레임 키는 열화상 파일 경로(filenames)를 사용합니다.
+    """
+    def __init__(self, max_frames_per_device=3000):
+        """
+        Parameter:
+        max_frames_per_device: 장비별로 보관할 최대 프레임 수 (초과 시 가장 오래 사용되지 않은 프레임부터 제거)
+        """
+        self.max_frames_per_device = max_frames_per_device
+        self._frames = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, device_id, keys):
+        """키 목록에 대한 캐시 조회 결과 반환 (없는 프레임은 None)"""
+        with self._lock:
+            frames = self._frames.setdefault(device_id, OrderedDict())
+            results = []
+            for key in keys:
+                value = frames.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    frames.move_to_end(key)
+                    self.hits += 1
+                results.append(value)
+            return results
+
+    def put_many(self, device_id, keys, values):
+        """프레임별 예측 결과 저장"""
+        with self._lock:
+            frames = self._frames.setdefault(device_id, OrderedDict())
+            for key, value in zip(keys, values):
+                frames[key] = value
+                frames.move_to_end(key)
+            while len(frames) > self.max_frames_per_device:
+                frames.popitem(last=False)
+
+    def clear(self, device_id=None):
+        """캐시 초기화 (device_id 미지정 시 전체 초기화, 모델 교체 시 사용)"""
+        with self._lock:
+            if device_id is None:
+                self._frames.clear()
+            else:
+                self._frames.pop(device_id, None)
+
+    def stats(self):
+        """캐시 적중률 통계 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'frames': {device_id: len(frames) for device_id, frames in self._frames.items()}
+            }
@@ -0,0 +1,154 @@
+"""주요 조회 쿼리 실행 계획 점검
+
+init_tables 로 만든 스키마/인덱스에서 자주 실행되는 쿼리의 EXPLAIN QUERY PLAN 을 확인하고
+인덱스 없이 테이블 전체를 읽는 SCAN 이나 정렬용 임시 B-tree 가 나타나면 회귀로 보고합니다.
+
+사용 예 (프로젝트 루트에서, 문제가 있으면 종료 코드 1):
+    python -m app.predict.query_plans            # 빈 임시 DB 에 스키마 생성 후 점검
+    python -m app.predict.query_plans sensor_data.db
+"""
+import os
+import sys
+import tempfile
+
+from app.predict.dbfunc import Database
+from app.predict.rollups import series_query
+
+# 이름: (쿼리, 파라미터, 허용되는 SCAN 대상 - CTE/서브쿼리 결과 등)
+HOT_QUERIES = {
+    'latest_aggregated_status': ('''
+        SELECT status, aggregation_end, normal_ratio, caution_ratio,
+               warning_ratio, risk_ratio, monitoring_in_progress
+        FROM aggregated_device_status
+        WHERE device_id = ?
+        ORDER BY aggregation_end DESC
+        LIMIT 1
+    ''', ('AGV17',), ()),
+    'latest_device_analysis': ('''
+        SELECT timestamp, current_state, summary, critical_issues,
+               warnings, recommendations, sensor_details
+        FROM device_analysis
+        WHERE device_id = ?
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ''', ('AGV17',), ()),
+    'latest_status_per_device': ('''
+        WITH latest_status AS (
+            SELECT device_id, MAX(aggregation_end) as latest_time
+            FROM aggregated_device_status
+            WHERE device_id IN ('AGV17', 'AGV18')
+            GROUP BY device_id
+        )
+        SELECT a.device_id, a.status, a.normal_ratio, a.caution_ratio, a.warning_ratio, a.risk_ratio
+        FROM aggregated_device_status a
+        INNER JOIN latest_status l
+        ON a.device_id = l.device_id AND a.aggregation_end = l.latest_time
+    ''', (), ('l', 'latest_status')),
+    'device_sensor_series': ('''
+        SELECT *
+        FROM sensor_timeseries
+        WHERE device_id = ?
+        ORDER BY timestamp DESC
+        LIMIT 900
+    ''', ('AGV17',), ()),
+    'sensor_measurements_view': ('''
+        SELECT timestamp, sensor_name, sensor_value
+        FROM sensor_measurements
+        WHERE device_id = ?
+    ''', ('AGV17',), ()),
+    'latest_sensor_values': ('''
+        SELECT timestamp, PM10, PM2_5, PM1_0
+        FROM sensor_timeseries
+        ORDER BY timestamp DESC
+        LIMIT 100
+    ''', (), ()),
+    'latest_environment': ('''
+        SELECT * FROM environment_measurements
+        ORDER BY timestamp DESC
+        LIMIT 900
+    ''', (), ()),
+    'device_type_time_series': ('''
+        SELECT device_id, aggregation_start AS timestamp,
+               normal_ratio, caution_ratio, warning_ratio, risk_ratio,
+               status as current_status
+        FROM aggregated_device_status
+        WHERE substr(device_id, 1, 3) = 'AGV'
+        ORDER BY aggregation_start ASC
+    ''', (), ()),
+    'device_type_warning_risk': ('''
+        SELECT device_id, normal_ratio, caution_ratio, warning_ratio, risk_ratio
+        FROM aggregated_device_status
+        WHERE substr(device_id, 1, 3) = 'OHT'
+        ORDER BY risk_ratio DESC, warning_ratio DESC
+    ''', (), ()),
+    'fleet_latest_status': ('''
+        SELECT device_id, MAX(aggregation_end), status, normal_ratio, caution_ratio,
+               warning_ratio, risk_ratio, monitoring_in_progress
+        FROM aggregated_device_status
+        WHERE device_id GLOB ?
+        GROUP BY device_id
+    ''', ('AGV*',), ()),
+    'fleet_latest_analysis': ('''
+        SELECT device_id, MAX(timestamp), current_state, summary, critical_issues,
+               warnings, recommendations, sensor_details
+        FROM device_analysis
+        WHERE device_id IN (?, ?)
+        GROUP BY device_id
+    ''', ('AGV17', 'AGV18'), ()),
+    'environment_minute_rollup': (*series_query('environment', ['ex_temperature'], start='2025-01-01 00:00:00',
+                                                end='2025-01-02 00:00:00', level='1m'), ()),
+    'device_sensor_hour_rollup': (*series_query('sensor', ['NTC', 'CT1'], device_id='AGV17',
+                                                start='2025-01-01 00:00:00', level='1h'), ())
+}
+
+
+def explain(conn, query, params=()):
+    """EXPLAIN QUERY PLAN 의 detail 목록"""
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {query}', params)]
+
+
+def plan_problems(plan, allowed_scans=()):
+    """실행 계획에서 전체 스캔/임시 정렬 항목 반환"""
+    problems = []
+    for detail in plan:
+        if 'TEMP B-TREE' in detail:
+            problems.append(detail)
+        elif detail.startswith('SCAN ') and ' USING ' not in detail:
+            target = detail.split()[1]
+            if target not in allowed_scans:
+                problems.append(detail)
+    return problems
+
+
+def check_query_plans(db, queries=HOT_QUERIES):
+    """쿼리별 {'plan', 'problems'} 반환
+    EXPLAIN 은 스키마 변경을 다시 확인하지 않으므로 캐시된 계획이 없는 새 연결에서 실행
+    """
+    results = {}
+    conn = db.sensor_db.connect()
+    try:
+        for name, (query, params, allowed_scans) in queries.items():
+            plan = explain(conn, query, params)
+            results[name] = {'plan': plan, 'problems': plan_problems(plan, allowed_scans)}
+    finally:
+        conn.close()
+    return results
+
+
+def main(db_path=None):
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(db_path or os.path.join(directory, 'sensor_data.db'))
+        db.create_tables()
+        db.create_indexes()
+
+        failed = False
+        for name, result in check_query_plans(db).items():
+            status = 'FAIL' if result['problems'] else 'ok'
+            failed = failed or bool(result['problems'])
+            print(f"[{status:4s}] {name}: {' | '.join(result['plan'])}")
+        db.sensor_db.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else None))
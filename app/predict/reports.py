@@ -0,0 +1,246 @@
+"""장비 PDF 리포트 생성 작업 큐와 결과 캐시
+
+PDF 생성은 ChatGPT 결론 요청(네트워크)과 WeasyPrint 렌더링(CPU)이 포함되어 수 초가 걸립니다.
+- submit 은 작업 ID 를 바로 반환하고, 렌더링은 전용 스레드 풀에서 실행
+- 결과 PDF 는 (device_id, 분석 시각) 키로 REPORT_CACHE_DIR 에 저장 -> 분석이 바뀌지 않았으면 즉시 반환
+- 같은 키의 작업이 진행 중이면 새 작업을 만들지 않고 기존 작업을 반환
+- 리포트 HTML 은 templates/reports/ 의 Jinja2 템플릿, CSS/글꼴은 렌더러별로 한 번만 로드
+- 전체 장비 일괄 생성은 batch_reports.py (렌더링 프로세스마다 ReportRenderer 1개)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+REPORT_TEMPLATE_DIR = os.getenv('MONOGUARD_REPORT_TEMPLATE_DIR', './templates/reports')
+REPORT_TEMPLATE = 'device_report.html'
+REPORT_STYLESHEET = 'device_report.css'
+REPORT_CACHE_DIR = os.getenv('MONOGUARD_REPORT_CACHE_DIR', './data/reports/cache')
+MAX_CACHED_REPORTS = int(os.getenv('MONOGUARD_MAX_CACHED_REPORTS', 200))
+MAX_JOBS = 500  # 보관할 작업 기록 수 (오래된 완료 작업부터 삭제)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+STATUS_FIELDS = ('status', 'aggregation_end', 'normal_ratio', 'caution_ratio', 'warning_ratio', 'risk_ratio')
+
+
+def classify_sensors(sensor_details):
+    """센서를 상태별 (이름, 현재값) 목록으로 분류"""
+    groups = {'위험': [], '경고': [], '주의': []}
+    for sensor_name, details in sensor_details.items():
+        if details['status'] in groups:
+            groups[details['status']].append((sensor_name, details['current_value']))
+    return groups['위험'], groups['경고'], groups['주의']
+
+
+class ReportRenderer:
+    """Jinja2 템플릿 + WeasyPrint 리포트 렌더러
+    템플릿은 생성 시 한 번 컴파일하고, CSS 와 글꼴 설정은 첫 렌더링 때 한 번만 읽어 재사용
+    (WeasyPrint 객체는 스레드 간 공유하지 않으므로 스레드마다 get_renderer() 사용)
+    """
+    def __init__(self, template_dir=REPORT_TEMPLATE_DIR):
+        self.template_dir = template_dir
+        self.env = Environment(loader=FileSystemLoader(template_dir),
+                               autoescape=select_autoescape(['html']), auto_reload=False)
+        self.template = self.env.get_template(REPORT_TEMPLATE)
+        self._font_config = None
+        self._stylesheet = None
+
+    @property
+    def stylesheet(self):
+        if self._stylesheet is None:
+            self._font_config = FontConfiguration()
+            self._stylesheet = CSS(filename=os.path.join(self.template_dir, REPORT_STYLESHEET),
+                                   font_config=self._font_config)
+        return self._stylesheet
+
+    def render_html(self, device_id, status_row, analysis_row, conclusion):
+        """리포트 HTML 생성
+        status_row: (status, aggregation_end, normal_ratio, caution_ratio, warning_ratio, risk_ratio)
+        analysis_row: (timestamp, current_state, summary, critical_issues, warnings, recommendations, sensor_details)
+        """
+        critical_sensors, warning_sensors, caution_sensors = classify_sensors(json.loads(analysis_row[6]))
+        return self.template.render(
+            device_id=device_id,
+            status=dict(zip(STATUS_FIELDS, status_row)),
+            analysis={
+                'summary': analysis_row[2],
+                'critical_issues': json.loads(analysis_row[3]),
+                'warnings': json.loads(analysis_row[4]),
+                'recommendations': json.loads(analysis_row[5])
+            },
+            sensor_groups=[('위험', critical_sensors), ('경고', warning_sensors), ('주의', caution_sensors)],
+            conclusion=conclusion
+        )
+
+    def render_pdf(self, html_content, path):
+        """HTML 을 PDF 파일로 저장 (임시 파일에 쓴 뒤 교체하여 반쯤 쓰인 파일이 보이지 않음)"""
+        stylesheet = self.stylesheet
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            HTML(string=html_content, base_url=self.template_dir).write_pdf(
+                temp_path, stylesheets=[stylesheet], font_config=self._font_config)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+    def render(self, device_id, status_row, analysis_row, conclusion, path):
+        return self.render_pdf(self.render_html(device_id, status_row, analysis_row, conclusion), path)
+
+
+_renderers = threading.local()
+
+
+def get_renderer() -> ReportRenderer:
+    """현재 스레드의 리포트 렌더러 (스레드마다 한 번 생성)"""
+    if not hasattr(_renderers, 'renderer'):
+        _renderers.renderer = ReportRenderer()
+    return _renderers.renderer
+
+
+def report_path(cache_dir, device_id, analysis_timestamp):
+    """(device_id, 분석 시각) 별 PDF 경로"""
+    digest = hashlib.sha1(str(analysis_timestamp).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{device_id}_{digest}.pdf')
+
+
+class ReportJob:
+    """리포트 생성 작업 상태"""
+    def __init__(self, device_id, analysis_timestamp, path):
+        self.job_id = uuid.uuid4().hex
+        self.device_id = device_id
+        self.analysis_timestamp = analysis_timestamp
+        self.path = path
+        self.status = JOB_PENDING
+        self.error = None
+        self.cached = False
+        self.created_at = datetime.now()
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    async def wait(self):
+        """작업 완료까지 대기 (이벤트 루프를 막지 않음)"""
+        if self.future is not None:
+            await asyncio.wrap_future(self.future)
+        return self
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'device_id': self.device_id,
+            'analysis_timestamp': self.analysis_timestamp,
+            'status': self.status,
+            'cached': self.cached,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class ReportJobQueue:
+    """리포트 생성 작업 큐 - conclusion_func(device_id, analysis_row) 로 결론 문단 생성"""
+    def __init__(self, conclusion_func, max_workers=2, cache_dir=REPORT_CACHE_DIR,
+                 max_cached=MAX_CACHED_REPORTS):
+        self.conclusion_func = conclusion_func
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.max_cached = max_cached
+        self.jobs = OrderedDict()
+        self._active = {}  # 캐시 경로 -> 진행 중인 작업
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report')
+        return self._executor
+
+    def cache_path(self, device_id, analysis_timestamp):
+        return report_path(self.cache_dir, device_id, analysis_timestamp)
+
+    def submit(self, device_id, status_row, analysis_row):
+        """작업 등록 후 바로 반환 - 캐시된 PDF 가 있으면 완료 상태, 같은 리포트가 생성 중이면 그 작업"""
+        path = self.cache_path(device_id, analysis_row[0])
+        with self._lock:
+            active = self._active.get(path)
+            if active is not None:
+                return active
+
+            job = ReportJob(device_id, analysis_row[0], path)
+            self._remember(job)
+            if os.path.exists(path):
+                job.status = JOB_DONE
+                job.cached = True
+                job.finished_at = datetime.now()
+                return job
+
+            self._active[path] = job
+            job.future = self.executor.submit(self._run, job, status_row, analysis_row)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(self, job, status_row, analysis_row):
+        job.status = JOB_RUNNING
+        try:
+            conclusion = self.conclusion_func(job.device_id, analysis_row)
+            get_renderer().render(job.device_id, status_row, analysis_row, conclusion, job.path)
+            job.status = JOB_DONE
+            self._evict()
+        except Exception as e:
+            print(f"Report generation failed for {job.device_id}: {e}")
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                self._active.pop(job.path, None)
+
+    def _remember(self, job):
+        """작업 기록 추가 (lock 안에서 호출) - 오래된 완료 작업부터 정리"""
+        self.jobs[job.job_id] = job
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= MAX_JOBS:
+                break
+            if self.jobs[job_id].finished:
+                del self.jobs[job_id]
+
+    def _evict(self):
+        """캐시 PDF 가 max_cached 개를 넘으면 오래된 파일부터 삭제"""
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                 if name.endswith('.pdf')]
+        if len(files) <= self.max_cached:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_cached]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,63 @@
+"""async 라우트용 DB 조회 계층
+
+sqlite3 / pd.read_sql 호출은 블로킹이므로 이벤트 루프에서 직접 실행하면 느린 쿼리 하나가
+모든 동시 요청을 멈춥니다. AsyncRepository 는 Database 메서드를 전용 스레드 풀에서 실행하고
+await 가능한 코루틴으로 노출합니다. 스레드 수는 읽기 연결 풀 크기와 맞춥니다.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class AsyncRepository:
+    """Database 조회를 스레드 풀에서 실행하는 async 래퍼"""
+    def __init__(self, db, max_workers=None):
+        self.db = db
+        self.max_workers = max_workers or db.sensor_db.pool_size
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='db-repository')
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """블로킹 함수를 스레드 풀에서 실행하고 결과 반환"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def device_history(self, device_id, limit=10):
+        return await self.run(self.db.get_device_history, device_id, limit)
+
+    async def sensor_data(self, device_id, limit=900):
+        return await self.run(self.db.get_sensor_data, device_id, limit)
+
+    async def environment_data(self, limit=900):
+        return await self.run(self.db.get_environment_data, limit)
+
+    async def device_analysis(self, device_id):
+        return await self.run(self.db.get_device_analysis, device_id)
+
+    async def device_status(self, device_id):
+        return await self.run(self.db.get_device_status, device_id)
+
+    async def fleet_status(self, device_type=None, device_ids=None):
+        return await self.run(self.db.get_fleet_status, device_type, device_ids)
+
+    async def downsampled_series(self, source, metrics, device_id=None, start=None, end=None,
+                                 max_points=500, method='minmax'):
+        return await self.run(self.db.get_downsampled_series, source, metrics, device_id,
+                              start, end, max_points, method)
+
+    async def report_rows(self, device_id):
+        return await self.run(self.db.get_report_rows, device_id)
+
+    async def thermal_filenames(self, device_id):
+        return await self.run(self.db.get_thermal_filenames, device_id)
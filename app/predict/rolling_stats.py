@@ -0,0 +1,131 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class RollingSensorStats:
+    """장비 1대의 센서별 슬라이딩 윈도우 통계
+
+    윈도우가 step 만큼 이동할 때 새로 들어온 행만 반영하고 빠져나간 행만 제거합니다.
+    - 평균/표준편차: Welford 추가/제거 갱신
+    - 최소/최대: 단조 덱 (amortized O(1))
+    - 상태 사후확률 합계 및 상태별 카운트: 행별 사후확률 링 버퍼
+    """
+    def __init__(self, sensors: list, window_size: int, engine=None):
+        """
+        Parameter:
+        sensors: 통계를 유지할 센서 칼럼 목록
+        window_size: 윈도우 크기 (링 버퍼 크기)
+        engine: 행별 상태 사후확률을 계산할 GaussianStateEngine (None 이면 상태 통계 생략)
+        """
+        self.sensors = list(sensors)
+        self.window_size = window_size
+        self.engine = engine
+        num_states = len(engine.states) if engine is not None else 0
+        self.values = np.zeros((window_size, len(self.sensors)))
+        self.posteriors = np.zeros((window_size, len(self.sensors), num_states))
+        self.reset()
+
+    def reset(self):
+        """모든 통계 초기화"""
+        self.keys = deque()
+        self.count = 0
+        self.position = 0  # 지금까지 추가된 전체 행 수 (링 버퍼 위치 계산용)
+        self.mean = np.zeros(len(self.sensors))
+        self.m2 = np.zeros(len(self.sensors))
+        self.posterior_sum = np.zeros(self.posteriors.shape[1:])
+        self.state_counts = np.zeros(self.posteriors.shape[1:], dtype=np.int64)
+        self.min_deques = [deque() for _ in self.sensors]
+        self.max_deques = [deque() for _ in self.sensors]
+
+    def slide(self, window: pd.DataFrame, key_column='filenames'):
+        """윈도우를 받아 이전 윈도우 이후 새로 추가된 행만 반영 (겹치지 않으면 전체 재계산)"""
+        keys = window[key_column].tolist()
+        start = 0
+        if self.keys:
+            try:
+                start = keys.index(self.keys[-1]) + 1
+            except ValueError:
+                self.reset()
+        if start < len(keys):
+            new_rows = window.iloc[start:]
+            self.push(keys[start:], new_rows[self.sensors].to_numpy(dtype=np.float64))
+        return self
+
+    def push(self, keys, rows: np.ndarray):
+        """새 행 추가 - 윈도우가 가득 차면 가장 오래된 행 제거"""
+        posteriors = self.engine.posteriors(rows) if self.engine is not None else None
+        for offset, (key, row) in enumerate(zip(keys, rows)):
+            if self.count == self.window_size:
+                self._evict()
+
+            slot = self.position % self.window_size
+            self.values[slot] = row
+            self.keys.append(key)
+            self.count += 1
+
+            delta = row - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (row - self.mean)
+
+            for index, value in enumerate(row):
+                min_deque, max_deque = self.min_deques[index], self.max_deques[index]
+                while min_deque and min_deque[-1][1] >= value:
+                    min_deque.pop()
+                min_deque.append((self.position, value))
+                while max_deque and max_deque[-1][1] <= value:
+                    max_deque.pop()
+                max_deque.append((self.position, value))
+
+            if posteriors is not None:
+                self.posteriors[slot] = posteriors[offset]
+                self.posterior_sum += posteriors[offset]
+                self.state_counts[np.arange(len(self.sensors)), posteriors[offset].argmax(axis=-1)] += 1
+
+            self.position += 1
+
+    def _evict(self):
+        """가장 오래된 행 제거"""
+        oldest = self.position - self.count
+        slot = oldest % self.window_size
+        row = self.values[slot]
+        self.keys.popleft()
+        self.count -= 1
+
+        if self.count:
+            delta = row - self.mean
+            self.mean -= delta / self.count
+            self.m2 -= delta * (row - self.mean)
+        else:
+            self.mean[:] = 0
+            self.m2[:] = 0
+
+        for deques in (self.min_deques, self.max_deques):
+            for values in deques:
+                if values and values[0][0] == oldest:
+                    values.popleft()
+
+        if self.engine is not None:
+            self.posterior_sum -= self.posteriors[slot]
+            self.state_counts[np.arange(len(self.sensors)), self.posteriors[slot].argmax(axis=-1)] -= 1
+
+    def snapshot(self) -> dict:
+        """센서별 현재 윈도우 통계 반환"""
+        std = np.sqrt(np.maximum(self.m2, 0) / self.count) if self.count else np.zeros(len(self.sensors))
+        result = {}
+        for index, sensor in enumerate(self.sensors):
+            stats = {
+                'mean': float(self.mean[index]),
+                'std': float(std[index]),
+                'min': float(self.min_deques[index][0][1]) if self.min_deques[index] else None,
+                'max': float(self.max_deques[index][0][1]) if self.max_deques[index] else None,
+                'count': self.count
+            }
+            if self.engine is not None and self.count:
+                stats['state_counts'] = dict(zip(self.engine.states, self.state_counts[index].tolist()))
+                stats['state_probabilities'] = dict(zip(
+                    self.engine.states, (self.posterior_sum[index] / self.count).tolist()
+                ))
+            result[sensor] = stats
+        return result
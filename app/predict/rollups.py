@@ -0,0 +1,279 @@
+"""시간 버킷 집계(rollup) 테이블과 원본 데이터 보존 기간 관리
+
+원본 테이블은 계속 쌓이므로 1분/1시간/1일 단위로 count/sum/min/max 를 미리 집계해 둡니다.
+- 모니터가 측정값/상태를 저장할 때 같은 트랜잭션에서 증분 반영 (apply_rollup_rows, 덮어쓰는 행은 기존 값을 빼고 반영)
+- 기존 원본 데이터는 rebuild_rollups 로 한 번에 재계산
+- apply_retention 이 보존 기간이 지난 원본/집계 행 삭제
+- series_query 가 조회 구간 길이에 맞춰 원본 또는 집계 테이블 쿼리를 선택
+
+Streamlit 페이지에서도 import 할 수 있도록 app.* 모듈에 의존하지 않습니다.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# 집계 단위: (버킷 길이(초), 버킷 시작 시각 포맷 - SQLite strftime / Python strftime 공용)
+ROLLUP_LEVELS = {
+    '1m': (60, '%Y-%m-%d %H:%M:00'),
+    '1h': (3600, '%Y-%m-%d %H:00:00'),
+    '1d': (86400, '%Y-%m-%d 00:00:00')
+}
+
+# 집계 대상: source -> (원본 테이블, 시각 칼럼, 장비 칼럼(None 이면 공용), 지표 칼럼)
+ROLLUP_SOURCES = {
+    # 센서 지표는 sensor_db.SENSOR_COLUMNS 와 동일
+    'sensor': ('sensor_timeseries', 'timestamp', 'device_id',
+               ['NTC', 'PM1_0', 'PM2_5', 'PM10', 'CT1', 'CT2', 'CT3', 'CT4']),
+    'environment': ('environment_measurements', 'timestamp', None,
+                    ['ex_temperature', 'ex_humidity', 'ex_illuminance']),
+    'status': ('aggregated_device_status', 'aggregation_end', 'device_id',
+               ['normal_ratio', 'caution_ratio', 'warning_ratio', 'risk_ratio'])
+}
+
+# 보존 기간(일) - None 이면 삭제하지 않음
+RETENTION_DAYS = {
+    'raw': int(os.getenv('MONOGUARD_RAW_RETENTION_DAYS', 14)),
+    '1m': int(os.getenv('MONOGUARD_1M_RETENTION_DAYS', 90)),
+    '1h': int(os.getenv('MONOGUARD_1H_RETENTION_DAYS', 730)),
+    '1d': None
+}
+# 원본 행을 Parquet 로 옮기는 기준(일) - archive.ARCHIVE_AFTER_DAYS 와 같은 설정
+# (Streamlit 에서도 import 하므로 app.predict.archive 대신 환경변수를 직접 읽음)
+ARCHIVE_AFTER_DAYS = int(os.getenv('MONOGUARD_ARCHIVE_AFTER_DAYS', 7))
+
+ROLLUP_TABLE = '''
+    CREATE TABLE IF NOT EXISTS rollups (
+        level TEXT NOT NULL,
+        source TEXT NOT NULL,
+        device_id TEXT NOT NULL,
+        bucket DATETIME NOT NULL,
+        metric TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        sum REAL NOT NULL,
+        min REAL,
+        max REAL,
+        PRIMARY KEY (level, source, device_id, bucket, metric)
+    ) WITHOUT ROWID
+'''
+
+_UPSERT = '''
+    INSERT INTO rollups (level, source, device_id, bucket, metric, count, sum, min, max)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (level, source, device_id, bucket, metric) DO UPDATE SET
+        count = count + excluded.count,
+        sum = sum + excluded.sum,
+        min = MIN(COALESCE(min, excluded.min), COALESCE(excluded.min, min)),
+        max = MAX(COALESCE(max, excluded.max), COALESCE(excluded.max, max))
+'''
+
+STATS = {
+    'mean': 'sum / count',
+    'min': 'min',
+    'max': 'max',
+    'count': 'count'
+}
+
+
+def local_time(timestamp):
+    """시간대가 있는 시각은 로컬 시간대의 naive datetime 으로 변환 (DB 는 naive 로컬 시각 저장)"""
+    if isinstance(timestamp, datetime) and timestamp.tzinfo is not None:
+        return timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+
+def _to_datetime(timestamp):
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    return local_time(timestamp)
+
+
+def create_rollup_tables(conn):
+    """rollups 테이블 생성 - 비어 있고 원본 데이터가 있으면 재계산"""
+    conn.execute(ROLLUP_TABLE)
+    if conn.execute('SELECT 1 FROM rollups LIMIT 1').fetchone() is None:
+        rebuild_rollups(conn)
+
+
+def rebuild_rollups(conn):
+    """원본 테이블에서 전체 집계 재계산 (1분 -> 1시간/1일 순서)"""
+    conn.execute('DELETE FROM rollups')
+    minute_format = ROLLUP_LEVELS['1m'][1]
+    for source, (table, time_column, device_column, metrics) in ROLLUP_SOURCES.items():
+        device = device_column or "''"
+        for metric in metrics:
+            conn.execute(f'''
+            INSERT INTO rollups (level, source, device_id, bucket, metric, count, sum, min, max)
+            SELECT '1m', '{source}', {device}, strftime('{minute_format}', {time_column}), '{metric}',
+                   COUNT({metric}), SUM({metric}), MIN({metric}), MAX({metric})
+            FROM {table}
+            WHERE {metric} IS NOT NULL
+            GROUP BY {device}, strftime('{minute_format}', {time_column})
+            ''')
+
+    for level, (_, bucket_format) in ROLLUP_LEVELS.items():
+        if level == '1m':
+            continue
+        conn.execute(f'''
+        INSERT INTO rollups (level, source, device_id, bucket, metric, count, sum, min, max)
+        SELECT '{level}', source, device_id, strftime('{bucket_format}', bucket), metric,
+               SUM(count), SUM(sum), MIN(min), MAX(max)
+        FROM rollups
+        WHERE level = '1m'
+        GROUP BY source, device_id, strftime('{bucket_format}', bucket), metric
+        ''')
+
+
+def _existing_rows(conn, source, device_id, timestamps, chunk=500):
+    """덮어쓸 원본 행의 지표 값 - {datetime: {metric: value}}"""
+    table, time_column, device_column, metrics = ROLLUP_SOURCES[source]
+    existing = {}
+    for offset in range(0, len(timestamps), chunk):
+        part = timestamps[offset:offset + chunk]
+        condition, params = '', list(part)
+        if device_column:
+            condition = f'AND {device_column} = ?'
+            params.append(device_id)
+        rows = conn.execute(f'''
+        SELECT {time_column}, {', '.join(metrics)} FROM {table}
+        WHERE {time_column} IN ({', '.join('?' * len(part))}) {condition}
+        ''', params).fetchall()
+        for row in rows:
+            existing[_to_datetime(row[0])] = dict(zip(metrics, row[1:]))
+    return existing
+
+
+def apply_rollup_rows(conn, source, device_id, rows):
+    """원본 행을 모든 집계 단위에 증분 반영 - 원본 테이블에 쓰기 전에 같은 트랜잭션에서 호출
+    rows: [{'timestamp': ..., '<metric>': value, ...}, ...] (값이 None 인 지표는 기존 값 유지로 보고 제외)
+    같은 키의 기존 원본 행은 덮어써지므로 그 값을 count/sum 에서 빼고 새 값을 더함
+    (min/max 는 덮어쓴 값을 되돌릴 수 없어 범위가 넓게 남을 수 있음 - rebuild_rollups 로 재계산)
+    """
+    metrics = ROLLUP_SOURCES[source][3]
+    latest = {}  # 같은 시각이 여러 번 오면 원본처럼 마지막 값 사용
+    for row in rows:
+        values = latest.setdefault(row['timestamp'], {})
+        values.update({metric: row[metric] for metric in metrics if row.get(metric) is not None})
+    if not latest:
+        return
+    replaced = _existing_rows(conn, source, device_id, list(latest))
+
+    partials = defaultdict(lambda: [0, 0.0, None, None])
+    for timestamp, values in latest.items():
+        timestamp = _to_datetime(timestamp)
+        previous = replaced.get(timestamp, {})
+        buckets = [(level, timestamp.strftime(bucket_format))
+                   for level, (_, bucket_format) in ROLLUP_LEVELS.items()]
+        for metric, value in values.items():
+            old_value = previous.get(metric)
+            for level, bucket in buckets:
+                partial = partials[(level, bucket, metric)]
+                partial[0] += 1 if old_value is None else 0
+                partial[1] += value - (old_value or 0.0)
+                partial[2] = value if partial[2] is None else min(partial[2], value)
+                partial[3] = value if partial[3] is None else max(partial[3], value)
+
+    conn.executemany(_UPSERT, [
+        (level, source, device_id or '', bucket, metric, *partial)
+        for (level, bucket, metric), partial in partials.items()
+    ])
+
+
+def apply_retention(conn, now=None, retention=RETENTION_DAYS):
+    """보존 기간이 지난 원본/집계 행 삭제 - 테이블별 삭제 행 수 반환
+    장비별 최신 상태 행은 보존 기간과 관계없이 유지
+    """
+    now = now or datetime.now()
+    deleted = {}
+    if retention.get('raw') is not None:
+        cutoff = now - timedelta(days=retention['raw'])
+        for table, time_column, device_column, _ in ROLLUP_SOURCES.values():
+            keep_latest = ''
+            if table == 'aggregated_device_status':
+                keep_latest = f'''
+                AND {time_column} < (SELECT MAX(latest.{time_column}) FROM {table} latest
+                                     WHERE latest.{device_column} = {table}.{device_column})
+                '''
+            deleted[table] = conn.execute(
+                f'DELETE FROM {table} WHERE {time_column} < ? {keep_latest}', (cutoff,)
+            ).rowcount
+
+    for level in ROLLUP_LEVELS:
+        if retention.get(level) is None:
+            continue
+        cutoff = (now - timedelta(days=retention[level])).strftime(ROLLUP_LEVELS[level][1])
+        deleted[f'rollups_{level}'] = conn.execute(
+            'DELETE FROM rollups WHERE level = ? AND bucket < ?', (level, cutoff)
+        ).rowcount
+    return deleted
+
+
+def choose_level(start=None, end=None, max_points=2000, now=None, retention=RETENTION_DAYS,
+                 archive_days=ARCHIVE_AFTER_DAYS):
+    """조회 구간에 맞는 데이터 단위 선택 ('raw' | '1m' | '1h' | '1d')
+    원본은 장비당 초당 1행 기준, 보존 기간이 지났거나 Parquet 로 옮겨진 구간은 집계 테이블 사용
+    """
+    now = now or datetime.now()
+    if start is None:
+        return '1m'
+    start = _to_datetime(start)
+    end = _to_datetime(end) if end is not None else now
+    span = max((end - start).total_seconds(), 0)
+
+    # SQLite 원본에 남아 있는 기간 = 보존 기간과 Parquet 보관 기준 중 짧은 쪽
+    raw_days = [days for days in (retention.get('raw'), archive_days) if days is not None]
+    raw_cutoff = now - timedelta(days=min(raw_days)) if raw_days else None
+    if span <= max_points and (raw_cutoff is None or start >= raw_cutoff):
+        return 'raw'
+    for level, (seconds, _) in ROLLUP_LEVELS.items():
+        level_cutoff = now - timedelta(days=retention[level]) if retention.get(level) is not None else None
+        if span / seconds <= max_points and (level_cutoff is None or start >= level_cutoff):
+            return level
+    return '1d'
+
+
+def series_query(source, metrics, device_id=None, start=None, end=None,
+                 level=None, stat='mean', max_points=2000):
+    """(쿼리, 파라미터) 반환 - 결과 칼럼: timestamp, metrics...
+    level 을 지정하지 않으면 choose_level 로 원본/집계 테이블 자동 선택
+    """
+    level = level or choose_level(start, end, max_points)
+    table, time_column, device_column, source_metrics = ROLLUP_SOURCES[source]
+    metrics = [metric for metric in metrics if metric in source_metrics]
+
+    if level == 'raw':
+        conditions, params = [], []
+        if device_column and device_id is not None:
+            conditions.append(f'{device_column} = ?')
+            params.append(device_id)
+        if start is not None:
+            conditions.append(f'{time_column} >= ?')
+            params.append(local_time(start))
+        if end is not None:
+            conditions.append(f'{time_column} <= ?')
+            params.append(local_time(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return f'''
+            SELECT {time_column} AS timestamp, {', '.join(metrics)}
+            FROM {table}
+            {where}
+            ORDER BY {time_column}
+        ''', params
+
+    bucket_format = ROLLUP_LEVELS[level][1]
+    params = [level, source, device_id or '']
+    conditions = ''
+    if start is not None:
+        conditions += ' AND bucket >= ?'
+        params.append(_to_datetime(start).strftime(bucket_format))
+    if end is not None:
+        conditions += ' AND bucket <= ?'
+        params.append(_to_datetime(end).strftime(bucket_format))
+    columns = ', '.join(f"MAX(CASE WHEN metric = '{metric}' THEN {STATS[stat]} END) AS {metric}"
+                        for metric in metrics)
+    return f'''
+        SELECT bucket AS timestamp, {columns}
+        FROM rollups
+        WHERE level = ? AND source = ? AND device_id = ?{conditions}
+        GROUP BY bucket
+        ORDER BY bucket
+    ''', params
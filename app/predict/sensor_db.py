@@ -0,0 +1,116 @@
+"""sensor_data.db 공유 연결 관리
+
+모니터(쓰기)와 FastAPI/Streamlit(읽기)이 같은 SQLite 파일을 사용하므로
+- WAL 저널: 쓰기 중에도 읽기가 막히지 않음
+- 읽기 연결 풀: 쿼리마다 connect 하지 않고 연결과 prepared statement 캐시를 재사용
+- 단일 쓰기 연결: lock 으로 직렬화하여 SQLITE_BUSY 경합 방지
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+DB_PATH = os.getenv('SENSOR_DB_PATH', 'sensor_data.db')
+
+# sensor_timeseries 테이블의 센서 칼럼 (장비별 시각당 1행)
+SENSOR_COLUMNS = ['NTC', 'PM1_0', 'PM2_5', 'PM10', 'CT1', 'CT2', 'CT3', 'CT4']
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',   # WAL 에서는 NORMAL 로도 손상 없이 안전 (전원 차단 시 마지막 트랜잭션만 유실 가능)
+    'cache_size': -65536,      # 64MB (음수: KiB 단위)
+    'mmap_size': 268435456,    # 256MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000       # ms
+}
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+class SensorDB:
+    """읽기 연결 풀 + 단일 쓰기 연결"""
+    def __init__(self, db_path=DB_PATH, pool_size=4, cached_statements=256):
+        self.db_path = os.path.abspath(db_path)
+        self.pool_size = pool_size
+        self.cached_statements = cached_statements
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._writer = None
+
+    def connect(self) -> sqlite3.Connection:
+        """PRAGMA 가 적용된 새 연결 생성"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for name, value in PRAGMAS.items():
+            conn.execute(f'PRAGMA {name}={value}')
+        return conn
+
+    @contextmanager
+    def read(self):
+        """읽기 연결 대여 (with 블록 종료 시 풀에 반환)"""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def write(self):
+        """쓰기 연결 사용 - with 블록 전체가 하나의 트랜잭션 (예외 시 롤백)"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self.connect()
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    def close(self):
+        """모든 연결 종료"""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._pool_lock:
+            self._reader_count = 0
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._reader_count < self.pool_size:
+                self._reader_count += 1
+                return self.connect()
+        return self._readers.get()
+
+
+def get_sensor_db(db_path=DB_PATH) -> SensorDB:
+    """프로세스 내에서 DB 파일별로 공유되는 연결 관리자 반환"""
+    db_path = os.path.abspath(db_path)
+    with _managers_lock:
+        if db_path not in _managers:
+            _managers[db_path] = SensorDB(db_path)
+        return _managers[db_path]
+
+
+def read_dataframe(query, params=None, db_path=DB_PATH) -> pd.DataFrame:
+    """읽기 연결 풀에서 쿼리 결과를 DataFrame 으로 조회"""
+    with get_sensor_db(db_path).read() as conn:
+        return pd.read_sql_query(query, conn, params=params)
@@ -1,8 +1,7 @@
-import numpy as np
 from typing import Dict
-import pandas as pd
-import sqlite3
 from scipy.stats import norm
+from frame_store import get_frame_store, read_max_temperatures
+from sensor_db import read_dataframe
 
 class ThermalImageAnalysis():
     def __init__(self, device_id='oht17'):
@@ -27,15 +26,9 @@ class ThermalImageAnalysis():
             }
         }
         
-    def get_db_connect(self):
-        return sqlite3.connect('sensor_data.db')
-    
     def get_thermal_data_path(self):
-        conn = self.get_db_connect()
         query = f"SELECT filenames FROM {self.table}"
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+        return read_dataframe(query)
     
     def SlidingWindows(self, step_size=30):
         df = self.get_thermal_data_path()
@@ -49,20 +42,15 @@ class ThermalImageAnalysis():
     def GetHighTemperatureMeanFromEachWindow(self, step_size=30):
         windows = self.SlidingWindows(step_size)
         temperature_information = {}
+        store = get_frame_store(self.device_id)
         for idx, window in enumerate(windows):
-            window_high_temp = []
-            for thermal_image_path in window['filenames']:
-                thermal_data = np.load(thermal_image_path)
-                window_high_temp.append(thermal_data.max())
-            temperature_information[f'Next Window {idx+1}'] = np.array(window_high_temp).mean()
+            window_high_temp = read_max_temperatures(window['filenames'], store)
+            temperature_information[f'Next Window {idx+1}'] = window_high_temp.mean()
         return temperature_information
         
     def GetHighTemperatureFromAll(self):
         df = self.get_thermal_data_path()
-        hightemperature_from_all = []
-        for thermal_data in df['filenames']:
-            hightemperature_from_all.append(np.load(thermal_data).max())
-        return hightemperature_from_all
+        return read_max_temperatures(df['filenames'], get_frame_store(self.device_id)).tolist()
     
     def ProbabiltyOfState(self, X):
         """주어진 온도가 어떤 상태일 확률을 구해줍니다."""
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from functools import partial
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
@@ -82,6 +83,11 @@ async def chat_endpoint(question: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="챗봇이 초기화되지 않았습니다.")
 
     try:
+        # 기기 ID + 날짜가 들어간 센서 이력 질문은 DB(SQLite + Parquet 보관본)에서 직접 조회
+        history = await run_in_threadpool(CT.sensor_history_from_text, question)
+        if history is not None:
+            return {"answer": history}
+
         response = qa_chain.invoke({"query": question})
         return {"answer": response["result"]}
     except Exception as e:
@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
 from datetime import datetime
+import re
 from app.models import OperationLog
+from app.predict.dbfunc import Database
 from langchain.tools import tool
 
 # 특정 날짜 또는 기간 동안의 기기 상태 조회
@@ -96,3 +98,51 @@ def get_all_devices_status(db: Session):
         )
 
     return response
+
+
+# 특정 기기의 기간별 센서 이력 요약 (최근 데이터는 SQLite, 지난 데이터는 Parquet 보관본에서 조회)
+@tool("query_sensor_history")
+def query_sensor_history(device_id: str, start_date: str, end_date: str = None):
+    """
+    특정 기기의 기간 동안 센서 측정값(평균/최대)을 조회하는 함수.
+    사용 예: "AGV17의 2024-02-01 ~ 2024-02-05 센서 이력"
+    """
+    end_date = end_date or start_date
+    df = Database().get_history(
+        'sensor_timeseries', start=start_date, end=f"{end_date} 23:59:59", device_id=device_id
+    )
+
+    if df.empty:
+        return f"📌 {device_id}의 해당 기간 센서 데이터가 없습니다."
+
+    sensors = df.drop(columns=['device_id', 'timestamp'])
+    response = f"📢 {device_id} 센서 이력 ({start_date} ~ {end_date}, {len(df)}건):\n"
+    for sensor in sensors.columns:
+        response += f"- {sensor}: 평균 {sensors[sensor].mean():.2f}, 최대 {sensors[sensor].max():.2f}\n"
+
+    return response
+
+
+# 질문 문자열 -> (기기 ID, 시작일, 종료일) - 예: "AGV17의 2024-02-01 ~ 2024-02-05 센서 이력"
+DEVICE_ID_PATTERN = re.compile(r'(?<![A-Za-z])(AGV|OHT)-?(\d+)(?!\d)', re.IGNORECASE)
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+HISTORY_KEYWORDS = ('센서', '이력', '기록')
+
+
+def parse_sensor_history_question(text: str):
+    """센서 이력 질문이면 (device_id, start_date, end_date), 아니면 None"""
+    device = DEVICE_ID_PATTERN.search(text)
+    dates = DATE_PATTERN.findall(text)
+    if not device or not dates or not any(keyword in text for keyword in HISTORY_KEYWORDS):
+        return None
+    device_id = f"{device.group(1).upper()}{device.group(2)}"
+    return device_id, dates[0], dates[-1]
+
+
+def sensor_history_from_text(text: str):
+    """질문 문자열 하나로 query_sensor_history 호출 (센서 이력 질문이 아니면 None)"""
+    parsed = parse_sensor_history_question(text)
+    if parsed is None:
+        return None
+    device_id, start_date, end_date = parsed
+    return query_sensor_history.invoke({'device_id': device_id, 'start_date': start_date, 'end_date': end_date})
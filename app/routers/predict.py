@@ -1,22 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from app.predict.monitor import DeviceMonitor
-from app.predict.analyzer import ImprovedSensorAnalyzer
 from app.predict.MultiModal.dataset import MultimodalTestDataset
 from app.predict.dbfunc import Database
-from typing import Dict
-
-from fastapi.responses import FileResponse
-from datetime import datetime
-import pandas as pd
+from app.predict.repository import AsyncRepository
+from app.predict.cache import ResponseCache, SHARED_KEY
+from app.predict.events import get_event_broker
+from app.predict.rollups import ROLLUP_SOURCES, local_time
+from app.predict.downsample import METHODS
+from app.predict.reports import ReportJobQueue, JOB_DONE, JOB_FAILED
+from app.predict.conclusions import generate_conclusion, get_conclusion_cache
+from app.predict.batch_reports import BatchReportScheduler, create_batch, generate_batch, list_batches, load_manifest, zip_batch
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+from fastapi.responses import FileResponse, StreamingResponse
+from datetime import datetime, timedelta
+import asyncio
 import json
-import tempfile
-from weasyprint import HTML
+import hashlib
+from functools import lru_cache
 from aiocache import cached
 import torch
 from torch.utils.data import DataLoader
 import os
 import openai
-import sqlite3
 from typing import List
 
 
@@ -25,6 +33,10 @@ router = APIRouter()
 
 # 데이터베이스 및 모니터링 초기화
 db = Database()
+# async 라우트의 DB 조회는 이벤트 루프 대신 스레드 풀에서 실행
+repository = AsyncRepository(db)
+# 조회 응답 캐시 - Database.update_* 저장 시 장비별로 무효화
+response_cache = ResponseCache()
 monitor = DeviceMonitor()
 
 @router.on_event("startup")
@@ -35,38 +47,31 @@ async def startup_event():
     # 모니터링 시작
     device_ids = ['AGV17', 'AGV18', 'OHT17', 'OHT18']
     monitor.start_monitoring(device_ids)
+    # 교대 시각마다 전체 장비 리포트 일괄 생성
+    batch_scheduler.start()
 
 @router.on_event("shutdown")
 async def shutdown_event():
     # 모니터링 중지
     monitor.stop_monitoring()
+    repository.shutdown()
+    report_jobs.shutdown()
+    batch_scheduler.stop()
 
 
 
-# 열화상 데이터용 데이터베이스 연결 함수
-def get_thermal_db_connection():
-    return sqlite3.connect('./sensor_data.db')
-
-def extract_thermal(device_id: str) -> List[str]:
+async def extract_thermal(device_id: str) -> List[str]:
     """열화상 이미지 경로 추출 함수"""
-    device_type = 'oht' if 'oht' in device_id.lower() else 'agv'
-    number = ''.join(filter(str.isdigit, device_id))
-    table = f"{device_type}{number}_table"
-    
-    conn = get_thermal_db_connection()
     try:
-        df = pd.read_sql(f'SELECT filenames FROM {table}', conn)
-        return df['filenames'].tolist()
+        return await repository.thermal_filenames(device_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"데이터베이스 조회 중 오류 발생: {str(e)}")
-    finally:
-        conn.close()
 
 @router.get("/get_thermal_data/{device_id}", response_model=List[str])
 async def get_thermal_data(device_id: str):
     """열화상 데이터 조회 엔드포인트"""
     try:
-        filenames = extract_thermal(device_id)
+        filenames = await extract_thermal(device_id)
         return filenames
     except HTTPException as e:
         raise e
@@ -74,128 +79,175 @@ async def get_thermal_data(device_id: str):
         raise HTTPException(status_code=500, detail=f"열화상 데이터 조회 중 오류 발생: {str(e)}")
 
 
-@router.get("/device_history/{device_id}")
-async def get_device_history(device_id: str):
-    """디바이스 상태 이력 조회"""
-    conn = db.get_connection()
-    df = pd.read_sql(f'''
-    SELECT aggregation_end as timestamp, status, 
-           normal_ratio, caution_ratio, warning_ratio, risk_ratio
-    FROM aggregated_device_status
-    WHERE device_id = ?
-    ORDER BY aggregation_end DESC
-    LIMIT 10
-    ''', conn, params=(device_id,))
-    conn.close()
+async def load_device_history(device_id: str):
+    """상태 이력을 응답 형식으로 변환"""
+    rows = await repository.device_history(device_id, limit=10)
 
     history = []
-    for _, row in df.iterrows():
+    for row in rows:
         history.append({
             "timestamp": row["timestamp"],
             "status": row["status"],
             "counts": {
-                "normal_count": float(row["normal_ratio"]),
-                "caution_count": float(row["caution_ratio"]),
-                "warning_count": float(row["warning_ratio"]),
-                "risk_count": float(row["risk_ratio"])
+                "normal_count": float(row["ratios"]["normal"]),
+                "caution_count": float(row["ratios"]["caution"]),
+                "warning_count": float(row["ratios"]["warning"]),
+                "risk_count": float(row["ratios"]["risk"])
             }
         })
     return history
 
+@router.get("/device_history/{device_id}")
+async def get_device_history(device_id: str):
+    """디바이스 상태 이력 조회"""
+    return await response_cache.get_or_load('device_history', device_id, load_device_history, device_id)
+
 @router.get("/sensor_data/{device_id}")
 async def get_sensor_data(device_id: str):
     """센서 데이터 조회"""
-    conn = db.get_connection()
-    df = pd.read_sql(f'''
-    SELECT timestamp, sensor_name, sensor_value
-    FROM sensor_measurements
-    WHERE device_id = ?
-    ORDER BY timestamp DESC
-    LIMIT 900
-    ''', conn, params=(device_id,))
-    conn.close()
-    
-    sensor_data = {}
-    for sensor in df['sensor_name'].unique():
-        sensor_df = df[df['sensor_name'] == sensor]
-        sensor_data[sensor] = {
-            'timestamps': sensor_df['timestamp'].tolist(),
-            'values': sensor_df['sensor_value'].tolist()
-        }
-    return sensor_data
+    return await response_cache.get_or_load('sensor_data', device_id, repository.sensor_data,
+                                            device_id, limit=900)
 
 @router.get("/environment_data")
 async def get_environment_data():
     """환경 데이터 조회"""
-    conn = db.get_connection()
-    df = pd.read_sql('''
-    SELECT * FROM environment_measurements 
-    ORDER BY timestamp DESC 
-    LIMIT 900
-    ''', conn)
-    conn.close()
-   
-    return {
-        "timestamps": df['timestamp'].tolist(),
-        "ex_temperature": df['ex_temperature'].tolist(),
-        "ex_humidity": df['ex_humidity'].tolist(),
-        "ex_illuminance": df['ex_illuminance'].tolist()
-    }
+    return await response_cache.get_or_load('environment_data', SHARED_KEY, repository.environment_data,
+                                            limit=900)
     
 @router.get("/analyze_device/{device_id}")
 async def analyze_device(device_id: str):
     """디바이스 분석 결과 조회"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
+    analysis_data = await response_cache.get_or_load('analyze_device', device_id,
+                                                     repository.device_analysis, device_id)
+    if not analysis_data:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return analysis_data
+
+SERIES_DEFAULT_SPAN = timedelta(days=1)
+
+async def load_series(source, metrics, device_id, start, end, max_points, method):
+    """다운샘플링 시계열 조회 공통 처리 (기본 구간: 최근 1일)"""
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(METHODS)}")
+    available = ROLLUP_SOURCES[source][3]
+    metrics = [metric.strip() for metric in metrics.split(',')] if metrics else available
+    unknown = [metric for metric in metrics if metric not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics: {', '.join(unknown)}")
+
+    # 클라이언트의 UTC 시각(toISOString 의 ...Z 등)은 DB 와 같은 naive 로컬 시각으로 변환
+    end = local_time(end) or datetime.now()
+    start = local_time(start) or end - SERIES_DEFAULT_SPAN
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return await repository.downsampled_series(source, metrics, device_id, start, end, max_points, method)
+
+@router.get("/series/sensor/{device_id}")
+async def get_sensor_series(device_id: str, sensors: str = None, start: datetime = None, end: datetime = None,
+                            max_points: int = Query(500, ge=10, le=10000), method: str = 'minmax'):
+    """센서 시계열 다운샘플링 조회 (sensors: 쉼표로 구분, 기본 전체 센서)"""
+    return await load_series('sensor', sensors, device_id, start, end, max_points, method)
+
+@router.get("/series/environment")
+async def get_environment_series(metrics: str = None, start: datetime = None, end: datetime = None,
+                                 max_points: int = Query(500, ge=10, le=10000), method: str = 'minmax'):
+    """환경 시계열 다운샘플링 조회 (metrics: ex_temperature, ex_humidity, ex_illuminance)"""
+    return await load_series('environment', metrics, None, start, end, max_points, method)
+
+@router.get("/fleet_status")
+async def get_fleet_status(request: Request, device_type: str = None, device_ids: str = None):
+    """여러 장비의 최신 상태/분석 결과 일괄 조회 (칼럼 단위 JSON)
+    device_type: agv | oht, device_ids: 쉼표로 구분한 장비 ID (예: AGV17,OHT18)
+    내용이 같으면 ETag 가 같으므로 If-None-Match 요청에는 304 반환
+    """
+    if device_type and device_type.lower() not in ('agv', 'oht'):
+        raise HTTPException(status_code=400, detail="device_type must be agv or oht")
+    ids = [device_id.strip() for device_id in device_ids.split(',') if device_id.strip()] if device_ids else None
+
+    fleet = await repository.fleet_status(device_type, ids)
+    body = json.dumps(fleet, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(',')]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/cache_stats")
+async def get_cache_stats():
+    """조회 응답 캐시 / 리포트 결론 캐시 hit/miss 통계"""
+    return {
+        **response_cache.stats(),
+        "llm_conclusions": await run_in_threadpool(get_conclusion_cache().stats)
+    }
+
+
+STREAM_KEEPALIVE = 15  # 초 - 이벤트가 없을 때 연결 확인용 주석 전송 간격
+
+def event_json(event) -> str:
+    """이벤트 JSON 직렬화 (numpy 값은 파이썬 값으로 변환)"""
+    return json.dumps(event, ensure_ascii=False,
+                      default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+async def sse_events(request: Request, device_ids=None):
+    """Server-Sent Events 스트림 생성기"""
+    with get_event_broker().subscribe(device_ids) as subscription:
+        while not await request.is_disconnected():
+            event = await subscription.get(timeout=STREAM_KEEPALIVE)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {event_json(event)}\n\n"
+
+async def receive_until_disconnect(websocket: WebSocket):
+    """클라이언트 메시지를 읽어 버리다가 연결이 끊기면 반환"""
     try:
-        # 최신 분석 결과 조회
-        cursor.execute('''
-        SELECT timestamp, current_state, summary, critical_issues, 
-               warnings, recommendations, sensor_details
-        FROM device_analysis
-        WHERE device_id = ?
-        ORDER BY timestamp DESC
-        LIMIT 1
-        ''', (device_id,))
-        
-        result = cursor.fetchone()
-        if not result:
-            raise HTTPException(status_code=404, detail="Analysis not found")
-        
-        # 상태 비율도 함께 조회
-        cursor.execute('''
-        SELECT normal_ratio, caution_ratio, warning_ratio, risk_ratio
-        FROM aggregated_device_status
-        WHERE device_id = ?
-        ORDER BY aggregation_end DESC
-        LIMIT 1
-        ''', (device_id,))
-        
-        ratio_result = cursor.fetchone()
-        
-        analysis_data = {
-            "timestamp": result[0],
-            "current_state": result[1],
-            "summary": result[2],
-            "critical_issues": json.loads(result[3]),
-            "warnings": json.loads(result[4]),
-            "recommendations": json.loads(result[5]),
-            "sensor_details": json.loads(result[6])
-        }
-        
-        if ratio_result:
-            analysis_data["state_ratios"] = {
-                "normal": ratio_result[0],
-                "caution": ratio_result[1],
-                "warning": ratio_result[2],
-                "risk": ratio_result[3]
-            }
-        
-        return analysis_data
-        
-    finally:
-        conn.close()
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+async def websocket_events(websocket: WebSocket, device_ids=None):
+    """WebSocket 으로 이벤트 전달 (연결 종료 시 구독 해제)"""
+    await websocket.accept()
+    with get_event_broker().subscribe(device_ids) as subscription:
+        # 이벤트가 없는 동안에도 연결 종료를 바로 알 수 있도록 수신 태스크를 함께 실행
+        receiver = asyncio.create_task(receive_until_disconnect(websocket))
+        try:
+            while True:
+                getter = asyncio.create_task(subscription.get())
+                done, _ = await asyncio.wait({receiver, getter}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    getter.cancel()
+                    break
+                await websocket.send_text(event_json(getter.result()))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            receiver.cancel()
+
+@router.get("/stream")
+async def stream_fleet(request: Request):
+    """전체 장비 상태/분석 변경 스트림 (SSE)"""
+    return StreamingResponse(sse_events(request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@router.get("/stream/{device_id}")
+async def stream_device(request: Request, device_id: str):
+    """장비 상태/분석 변경 스트림 (SSE)"""
+    return StreamingResponse(sse_events(request, [device_id]), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@router.websocket("/stream")
+async def stream_fleet_ws(websocket: WebSocket):
+    """전체 장비 상태/분석 변경 스트림 (WebSocket)"""
+    await websocket_events(websocket)
+
+@router.websocket("/stream/{device_id}")
+async def stream_device_ws(websocket: WebSocket, device_id: str):
+    """장비 상태/분석 변경 스트림 (WebSocket)"""
+    await websocket_events(websocket, [device_id])
+
 
 
 
@@ -209,275 +261,149 @@ openai_api_key = load_file("./chatbot/api_key.txt")
 os.environ["OPENAI_API_KEY"] = openai_api_key
 openai.api_key = os.getenv("OPENAI_API_KEY")  # 환경변수에서 가져오기
 
-def generate_conclusion(device_id: str, analysis_result):
-    """ChatGPT를 사용하여 분석 결과를 요약하고 결론을 도출"""
-    
-    # None 체크 및 기본값 설정
-    summary = analysis_result[2] if analysis_result[2] else "분석 요약 없음"
-    critical_issues = json.loads(analysis_result[3]) if analysis_result[3] else []
-    warnings = json.loads(analysis_result[4]) if analysis_result[4] else []
-    recommendations = json.loads(analysis_result[5]) if analysis_result[5] else []
-    sensor_details = json.loads(analysis_result[6]) if analysis_result[6] else {}
-
-    # 센서별 상태 분석
-    critical_sensors = []
-    warning_sensors = []
-    caution_sensors = []
-    
-    for sensor_name, details in sensor_details.items():
-        if details['status'] == '위험':
-            critical_sensors.append(f"{sensor_name}: {details['current_value']:.2f}")
-        elif details['status'] == '경고':
-            warning_sensors.append(f"{sensor_name}: {details['current_value']:.2f}")
-        elif details['status'] == '주의':
-            caution_sensors.append(f"{sensor_name}: {details['current_value']:.2f}")
-
-    # ChatGPT 프롬프트 작성
-    prompt = f"""
-    다음은 장비 {device_id}의 최신 분석 데이터입니다.
-
-    분석 요약: {summary}
-
-    위험 수준 센서: {', '.join(critical_sensors) if critical_sensors else '없음'}
-    경고 수준 센서: {', '.join(warning_sensors) if warning_sensors else '없음'}
-    주의 수준 센서: {', '.join(caution_sensors) if caution_sensors else '없음'}
-
-    중요 이슈: {', '.join(critical_issues) if critical_issues else '없음'}
-    경고사항: {', '.join(warnings) if warnings else '없음'}
-    권장사항: {', '.join(recommendations) if recommendations else '없음'}
-
-    위 내용을 바탕으로 다음 사항을 포함하여 3~4문장으로 결론을 요약해 주세요:
-    1. 전반적인 장비 상태
-    2. 가장 심각한 센서들의 상태와 그 위험성
-    3. 권장되는 조치사항
-    """
-    
-    client = openai.OpenAI()
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}]
+# PDF 리포트 작업 큐 - (device_id, 분석 시각) 별 결과 캐시
+report_jobs = ReportJobQueue(generate_conclusion)
+
+async def submit_report(device_id: str):
+    """리포트 작업 등록 (상태/분석 정보가 없으면 404)"""
+    status_result, analysis_result = await repository.report_rows(device_id)
+    if not status_result or not analysis_result:
+        print("Device Data not found!")
+        raise HTTPException(status_code=404, detail="Device data not found")
+    return report_jobs.submit(device_id, status_result, analysis_result)
+
+def report_file_response(job):
+    return FileResponse(
+        job.path,
+        media_type='application/pdf',
+        filename=f'{job.device_id}_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
     )
 
-    conclusion = response.choices[0].message.content
-    return conclusion
+# 전체 장비 일괄 리포트 (reports/batch/{batch_id}/ 에 장비별 PDF + manifest.json)
+batch_scheduler = BatchReportScheduler(db, generate_conclusion)
+
+class BatchReportRequest(BaseModel):
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    device_type: Optional[str] = None
+    device_ids: Optional[List[str]] = None
+
+@router.post("/reports/batch", status_code=202)
+async def create_batch_report(request: BatchReportRequest, background_tasks: BackgroundTasks):
+    """기간 내 분석 결과로 전체(또는 지정) 장비 리포트 일괄 생성 - batch_id 반환"""
+    # 대기 manifest 를 먼저 저장하여 바로 조회해도 404 가 나지 않도록 함
+    start, end = local_time(request.start), local_time(request.end)
+    batch_id = await run_in_threadpool(create_batch, start, end)
+    background_tasks.add_task(run_in_threadpool, generate_batch, db, generate_conclusion,
+                              device_ids=request.device_ids, start=start, end=end,
+                              device_type=request.device_type, batch_id=batch_id)
+    return {'batch_id': batch_id, 'status': 'pending'}
+
+@router.get("/reports/batch")
+async def get_batch_reports():
+    """최근 일괄 리포트 목록"""
+    return await run_in_threadpool(list_batches)
+
+@router.get("/reports/batch/{batch_id}")
+async def get_batch_report(batch_id: str):
+    """일괄 리포트 manifest 조회"""
+    try:
+        manifest = await run_in_threadpool(load_manifest, batch_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return manifest
+
+@router.get("/reports/batch/{batch_id}/zip")
+async def download_batch_report(batch_id: str):
+    """일괄 리포트 zip 다운로드 (첫 요청 때 생성)"""
+    try:
+        path = await run_in_threadpool(zip_batch, batch_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return FileResponse(path, media_type='application/zip', filename=os.path.basename(path))
+
+@router.post("/reports/{device_id}", status_code=202)
+async def create_report_job(device_id: str):
+    """PDF 리포트 생성 작업 등록 - 작업 ID 반환 (분석 결과가 같으면 캐시된 리포트)"""
+    job = await submit_report(device_id)
+    return job.to_dict()
+
+@router.get("/reports/jobs/{job_id}")
+async def get_report_job(job_id: str):
+    """리포트 작업 상태 조회"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job.to_dict()
+
+@router.get("/reports/jobs/{job_id}/pdf")
+async def download_report(job_id: str):
+    """완료된 리포트 PDF 다운로드"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != JOB_DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    return report_file_response(job)
 
 @router.get("/device_report_pdf/{device_id}")
 async def generate_pdf_report(device_id: str):
-    """PDF 리포트 생성"""
+    """PDF 리포트 생성 (작업 완료까지 대기 후 반환 - 기존 화면 호환)"""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-
-        # 상태 정보 조회
-        cursor.execute('''
-            SELECT status, aggregation_end, normal_ratio, caution_ratio, warning_ratio, risk_ratio
-            FROM aggregated_device_status
-            WHERE device_id = ?
-            ORDER BY aggregation_end DESC
-            LIMIT 1
-        ''', (device_id,))
-        status_result = cursor.fetchone()
-
-        # 분석 정보 조회
-        cursor.execute('''
-            SELECT timestamp, current_state, summary, critical_issues, 
-                   warnings, recommendations, sensor_details
-            FROM device_analysis
-            WHERE device_id = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        ''', (device_id,))
-        analysis_result = cursor.fetchone()
-
-        if not status_result or not analysis_result:
-            print("Device Data not found!")
-            raise HTTPException(status_code=404, detail="Device data not found")
-
-        # 센서 상태 분류
-        sensor_details = json.loads(analysis_result[6])
-        critical_sensors = []
-        warning_sensors = []
-        caution_sensors = []
-        
-        for sensor_name, details in sensor_details.items():
-            if details['status'] == '위험':
-                critical_sensors.append((sensor_name, details['current_value']))
-            elif details['status'] == '경고':
-                warning_sensors.append((sensor_name, details['current_value']))
-            elif details['status'] == '주의':
-                caution_sensors.append((sensor_name, details['current_value']))
-
-        # ChatGPT를 사용하여 결론 생성
-        conclusion = generate_conclusion(device_id, analysis_result)
-
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{ 
-                    font-family: 'Malgun Gothic', sans-serif; 
-                    margin: 40px; 
-                }}
-                .title {{
-                    text-align: center;
-                    font-weight: bold;
-                    font-size: 20px;
-                    margin-bottom: 20px;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-bottom: 20px;
-                }}
-                th, td {{
-                    border: 1px solid black;
-                    padding: 8px;
-                    text-align: left;
-                }}
-                .conclusion {{
-                    margin-top: 30px;
-                    padding: 15px;
-                    background-color: #f8f9fa;
-                    border-left: 4px solid #4e73df;
-                }}
-                .conclusion-title {{
-                    font-weight: bold;
-                    margin-bottom: 10px;
-                    color: #4e73df;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="title">설비 이력 카드</div>
-            
-            <table>
-                <tr>
-                    <th>관리번호</th>
-                    <td>{device_id}</td>
-                    <th>설비명</th>
-                    <td>{'AGV' if 'AGV' in device_id else 'OHT'}</td>
-                </tr>
-                <tr>
-                    <th>현재상태</th>
-                    <td colspan="3">{status_result[0]}</td>
-                </tr>
-                <tr>
-                    <th>점검일시</th>
-                    <td colspan="3">{status_result[1]}</td>
-                </tr>
-            </table>
-
-            <table>
-                <tr>
-                    <th colspan="4">상태 분석</th>
-                </tr>
-                <tr>
-                    <th>정상</th>
-                    <th>주의</th>
-                    <th>경고</th>
-                    <th>위험</th>
-                </tr>
-                <tr>
-                    <td>{status_result[2]:.1f}%</td>
-                    <td>{status_result[3]:.1f}%</td>
-                    <td>{status_result[4]:.1f}%</td>
-                    <td>{status_result[5]:.1f}%</td>
-                </tr>
-            </table>
-
-            <table>
-                <tr>
-                    <th colspan="2">분석 결과</th>
-                </tr>
-                <tr>
-                    <th>요약</th>
-                    <td>{analysis_result[2]}</td>
-                </tr>
-                <tr>
-                    <th>중요 이슈</th>
-                    <td>{', '.join(json.loads(analysis_result[3]))}</td>
-                </tr>
-                <tr>
-                    <th>경고사항</th>
-                    <td>{', '.join(json.loads(analysis_result[4]))}</td>
-                </tr>
-                <tr>
-                    <th>권장사항</th>
-                    <td>{', '.join(json.loads(analysis_result[5]))}</td>
-                </tr>
-                <tr>
-                    <th>센서 상태</th>
-                    <td>
-                        <div>
-                            ■ 위험 수준 센서: {', '.join([f"{name}: {value:.2f}" for name, value in critical_sensors]) if critical_sensors else '없음'}
-                        </div>
-                        <div>
-                            ■ 경고 수준 센서: {', '.join([f"{name}: {value:.2f}" for name, value in warning_sensors]) if warning_sensors else '없음'}
-                        </div>
-                        <div>
-                            ■ 주의 수준 센서: {', '.join([f"{name}: {value:.2f}" for name, value in caution_sensors]) if caution_sensors else '없음'}
-                        </div>
-                    </td>
-                </tr>
-            </table>
-
-            <div class="conclusion">
-                <div class="conclusion-title">AI 분석 결론</div>
-                <div>{conclusion}</div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-            HTML(string=html_content).write_pdf(tmp.name)
-            return FileResponse(
-                tmp.name,
-                media_type='application/pdf',
-                filename=f'{device_id}_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-            )
-            
+        job = await submit_report(device_id)
+        await job.wait()
+        if job.status == JOB_FAILED:
+            raise HTTPException(status_code=500, detail=job.error)
+        return report_file_response(job)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
         
-# 전역 변수로 monitor 인스턴스 생성
-device_monitor = DeviceMonitor()
-
-# 모델 설정 추가
-model_config = {
-    "img_dim_h": 120,
-    "img_dim_w": 160,
-    "patch_size": 16,
-    "embed_dim": 256,
-    "num_heads": 8,
-    "depth": 6,
-    "aux_input_dim": 11,
-    "num_classes": 4
-}
+ANALYSIS_FIELDS = ('summary', 'sensor_details', 'critical_issues', 'warnings', 'recommendations')
 
-@router.get("/device_status/{device_id}")
-async def get_device_status(device_id: str):
-    status = db.get_device_status(device_id)
-    if not status:
-        raise HTTPException(status_code=404, detail="Device not found")
-    
+@lru_cache(maxsize=32)
+def fallback_analysis(device_id: str, window_key):
+    """저장된 분석 결과가 없을 때 최근 윈도우를 직접 분석 (window_key: 최신 상태 시각, 바뀌면 다시 계산)"""
     window_data = db.load_device_data(
         'OHT' if 'oht' in device_id.lower() else 'AGV', 
         device_id[-2:]
     )
-    
-    analyzer = ImprovedSensorAnalyzer(model_config)
-    latest_analysis = analyzer.analyze_device_status(device_id, window_data.tail(300))
-    
-    status.update({
+    if window_data.empty:
+        return None
+    return monitor.analyzer.analyze_device_status(device_id, window_data.tail(monitor.window_size))
+
+@router.get("/device_status/{device_id}")
+async def get_device_status(device_id: str):
+    """디바이스 최신 상태 + 모니터가 저장한 분석 결과 (없으면 최근 윈도우 분석)"""
+    status = await response_cache.get_or_load('device_status', device_id, repository.device_status, device_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Device not found")
+
+    analysis = await response_cache.get_or_load('analyze_device', device_id,
+                                                repository.device_analysis, device_id)
+    if analysis:
+        latest_analysis = {
+            "device_id": device_id,
+            "timestamp": analysis["timestamp"],
+            **{field: analysis[field] for field in ANALYSIS_FIELDS}
+        }
+    else:
+        latest_analysis = await repository.run(fallback_analysis, device_id, status["timestamp"])
+
+    # 캐시된 dict 는 공유되므로 새 dict 로 응답
+    return {
+        **status,
         "sensor_analysis": latest_analysis,
-        "monitoring_in_progress": device_monitor.is_monitoring(device_id)
-    })
-    
-    return status
\ No newline at end of file
+        "monitoring_in_progress": monitor.is_monitoring(device_id)
+    }
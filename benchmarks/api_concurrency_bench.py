@@ -0,0 +1,104 @@
+"""동시 요청 지연 시간 비교 (async 라우트에서 DB 직접 호출 vs AsyncRepository 스레드 풀)
+
+가벼운 센서 조회 사이에 긴 이력 조회를 섞어 동시 클라이언트 수만큼 요청하고
+가벼운 요청의 p50/p99 지연 시간을 비교합니다. 직접 호출은 느린 쿼리가 이벤트 루프를 막습니다.
+
+사용 예 (프로젝트 루트에서, fastapi/httpx 필요):
+    python -m benchmarks.api_concurrency_bench --clients 100 --requests 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+
+import httpx
+from fastapi import FastAPI
+
+from app.predict.dbfunc import Database
+from app.predict.repository import AsyncRepository
+from benchmarks.db_write_bench import make_window
+
+
+def make_app(db, repository=None):
+    """repository 가 None 이면 async 핸들러에서 Database 를 직접 호출"""
+    app = FastAPI()
+
+    async def call(func, *args):
+        if repository is None:
+            return func(*args)
+        return await repository.run(func, *args)
+
+    @app.get('/sensor_data/{device_id}')
+    async def sensor_data(device_id: str):
+        return await call(db.get_sensor_data, device_id, 900)
+
+    @app.get('/history/{device_id}')
+    async def history(device_id: str):
+        df = await call(db.get_history, 'sensor_timeseries', None, None, device_id)
+        return {'rows': len(df)}
+
+    return app
+
+
+async def run_clients(app, clients, requests, slow_every, interval):
+    """클라이언트별 요청 지연 시간(초) 수집 - slow_every 번째 클라이언트는 느린 이력 조회
+    요청은 정해진 시각(interval 간격)에 보내고, 지연 시간은 예정 시각부터 응답까지로 측정
+    (이벤트 루프가 막혀 요청을 늦게 보낸 시간도 포함)
+    """
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        async def worker(index):
+            slow = index % slow_every == 0
+            for request_index in range(requests):
+                scheduled = started + (request_index + index / clients) * interval
+                await asyncio.sleep(max(0, scheduled - loop.time()))
+                response = await client.get('/history/AGV17' if slow else '/sensor_data/AGV17')
+                response.raise_for_status()
+                if not slow:
+                    latencies.append(loop.time() - scheduled)
+
+        await asyncio.gather(*(worker(index) for index in range(clients)))
+    return latencies
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=5)
+    parser.add_argument('--slow-every', type=int, default=10)
+    parser.add_argument('--interval', type=float, default=1.0, help='클라이언트별 요청 간격(초)')
+    parser.add_argument('--windows', type=int, default=400)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'sensor_data.db'))
+        db.create_tables()
+        db.create_indexes()
+        for window_index in range(args.windows):
+            db.insert_window_measurements('AGV17', *make_window(window_index))
+
+        repository = AsyncRepository(db)
+        results = {}
+        for name, app in (('direct', make_app(db)), ('repository', make_app(db, repository))):
+            latencies = asyncio.run(run_clients(app, args.clients, args.requests,
+                                               args.slow_every, args.interval))
+            results[name] = (percentile(latencies, 50), percentile(latencies, 99))
+        repository.shutdown()
+        db.sensor_db.close()
+
+    print(f"clients={args.clients}, fast request latency (ms)")
+    for name, (p50, p99) in results.items():
+        print(f"{name:10s} p50 {p50 * 1000:8.1f}  p99 {p99 * 1000:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""MultimodalTestDataset 윈도우 로드 비용 비교 (기존 항목별 DataFrame 복사 vs 칼럼 배열 + 배치 로드)
+
+사용 예 (프로젝트 루트에서):
+    python -m benchmarks.dataset_bench --rows 300 --repeat 5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from app.predict.frame_store import ThermalFrameStore
+from app.predict.MultiModal.dataset import MultimodalTestDataset
+
+SENSOR_COLUMNS = ['NTC', 'PM1_0', 'PM2_5', 'PM10', 'CT1', 'CT2', 'CT3', 'CT4',
+                  'ex_temperature', 'ex_humidity', 'ex_illuminance']
+
+
+class LegacyMultimodalTestDataset(Dataset):
+    """변경 전 구현 (항목마다 drop + iloc)"""
+    def __init__(self, X):
+        self.X = X
+
+    def __getitem__(self, index):
+        image = torch.tensor(np.load(self.X.iloc[index]['filenames']), dtype=torch.float32).unsqueeze(0)
+        sensor_features = self.X.drop(columns=['filenames'])
+        sensor_features = torch.tensor(sensor_features.iloc[index].values, dtype=torch.float32)
+        return image, sensor_features
+
+    def __len__(self):
+        return len(self.X)
+
+
+def make_window(directory, rows):
+    """임시 .bin 프레임과 센서 값으로 윈도우 DataFrame 생성"""
+    filenames = []
+    for index in range(rows):
+        path = os.path.join(directory, f'frame_{index}.bin')
+        with open(path, 'wb') as file:
+            np.save(file, np.random.rand(120, 160).astype(np.float32) * 60)
+        filenames.append(path)
+    df = pd.DataFrame(np.random.rand(rows, len(SENSOR_COLUMNS)) * 50, columns=SENSOR_COLUMNS)
+    df.insert(0, 'filenames', filenames)
+    return df
+
+
+def measure(load, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        window = make_window(directory, args.rows)
+        store = ThermalFrameStore.build(os.path.join(directory, 'store'), window['filenames'].tolist())
+
+        cases = {
+            'legacy (DataLoader, per-item drop/iloc)':
+                lambda: next(iter(DataLoader(LegacyMultimodalTestDataset(window), batch_size=args.rows))),
+            'columnar (DataLoader, per-item)':
+                lambda: next(iter(DataLoader(MultimodalTestDataset(window), batch_size=args.rows))),
+            'columnar get_batch (.bin files)':
+                lambda: MultimodalTestDataset(window).get_batch(),
+            'columnar get_batch (frame store)':
+                lambda: MultimodalTestDataset(window, store).get_batch(),
+        }
+        baseline = None
+        for name, load in cases.items():
+            elapsed = measure(load, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{name:45s} {elapsed * 1000:9.2f} ms  x{baseline / elapsed:6.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""윈도우 측정값 저장 처리량 비교 (행마다 연결/커밋 vs 윈도우 단위 executemany 일괄 저장)
+
+사용 예 (프로젝트 루트에서):
+    python -m benchmarks.db_write_bench --windows 20
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.predict.dbfunc import Database
+from app.predict.sensor_db import SENSOR_COLUMNS as SENSORS
+
+LEGACY_TABLE = '''
+    CREATE TABLE IF NOT EXISTS legacy_sensor_measurements (
+        device_id TEXT,
+        timestamp DATETIME,
+        sensor_name TEXT,
+        sensor_value REAL,
+        PRIMARY KEY (device_id, timestamp, sensor_name)
+    )
+'''
+
+
+def make_window(window_index, step_size=30):
+    """한 윈도우(step_size 행)의 센서/환경 측정값 생성"""
+    base_time = datetime(2025, 1, 1) + timedelta(minutes=5 * window_index)
+    sensor_rows, environment_rows = [], []
+    for idx in range(step_size):
+        timestamp = base_time + timedelta(seconds=idx)
+        environment_rows.append({'timestamp': timestamp, 'temperature': 25.0,
+                                 'humidity': 30.0, 'illuminance': 155.0})
+        sensor_rows.append({'timestamp': timestamp, **{sensor: float(idx) for sensor in SENSORS}})
+    return sensor_rows, environment_rows
+
+
+def write_legacy(db, device_id, sensor_rows, environment_rows):
+    """변경 전 방식: 행마다 환경/센서 저장 함수를 각각 호출 (호출마다 새 연결 + 센서값별 EAV INSERT + 커밋)"""
+    for row_index, environment in enumerate(environment_rows):
+        conn = sqlite3.connect('sensor_data.db')
+        conn.execute('INSERT OR REPLACE INTO environment_measurements VALUES (?, ?, ?, ?)',
+                     (environment['timestamp'], environment['temperature'],
+                      environment['humidity'], environment['illuminance']))
+        conn.commit()
+        conn.close()
+
+        conn = sqlite3.connect('sensor_data.db')
+        row = sensor_rows[row_index]
+        for sensor in SENSORS:
+            conn.execute('INSERT OR REPLACE INTO legacy_sensor_measurements VALUES (?, ?, ?, ?)',
+                         (device_id, row['timestamp'], sensor, row[sensor]))
+        conn.commit()
+        conn.close()
+
+
+def run(db, writer, device_id, windows):
+    rows = 0
+    start = time.perf_counter()
+    for window_index in range(windows):
+        sensor_rows, environment_rows = make_window(window_index)
+        writer(db, device_id, sensor_rows, environment_rows)
+        rows += len(sensor_rows) * len(SENSORS) + len(environment_rows)
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--windows', type=int, default=20)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            db = Database()
+            db.create_tables()
+            with db.write() as conn:
+                conn.execute(LEGACY_TABLE)
+            legacy = run(db, write_legacy, 'AGV17', args.windows)
+            bulk = run(db, lambda db, *window: db.insert_window_measurements(*window), 'AGV18', args.windows)
+        finally:
+            os.chdir(cwd)
+
+    print(f"legacy (per-row connections/commits): {legacy:10.0f} values/s")
+    print(f"bulk   (insert_window_measurements):   {bulk:10.0f} values/s  x{bulk / legacy:.1f}")
+
+
+if __name__ == '__main__':
+    main()
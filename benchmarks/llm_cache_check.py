@@ -0,0 +1,104 @@
+"""리포트 결론 캐시 동작 확인 (가짜 LLM 사용 - ChatGPT 호출/API 키 불필요)
+
+generate_conclusion(..., llm=가짜 함수, cache=임시 LLMResponseCache) 로 다음을 확인합니다.
+- 입력이 같으면 캐시 적중 (가짜 LLM 호출 0회)
+- 분석 입력이 바뀌면 캐시 미스
+- TTL 이 지나면 다시 생성
+- max_entries 를 넘으면 가장 오래 사용하지 않은 항목 삭제 (LRU)
+- stats() 의 hit/miss 횟수와 적중률
+
+사용 예 (프로젝트 루트에서):
+    python -m benchmarks.llm_cache_check
+"""
+import json
+import os
+import tempfile
+import time
+
+from app.predict.conclusions import generate_conclusion
+from app.predict.llm_cache import LLMResponseCache
+
+
+class FakeLLM:
+    """프롬프트를 받은 횟수를 세는 가짜 LLM"""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, prompt):
+        self.calls += 1
+        return f'결론 {self.calls}'
+
+
+def make_analysis(summary, ntc=52.0):
+    """분석 행 (timestamp, current_state, summary, critical_issues, warnings, recommendations, sensor_details)"""
+    sensor_details = {'NTC': {'status': '위험', 'current_value': ntc},
+                      'PM10': {'status': '주의', 'current_value': 31.0}}
+    return ('2025-01-01 10:00:00', '위험', summary,
+            json.dumps(['NTC 온도 상승'], ensure_ascii=False),
+            json.dumps([], ensure_ascii=False),
+            json.dumps(['냉각 장치 점검'], ensure_ascii=False),
+            json.dumps(sensor_details, ensure_ascii=False))
+
+
+def check_hit_and_miss(directory):
+    cache = LLMResponseCache(os.path.join(directory, 'hit_miss.db'), ttl=None, max_entries=None)
+    llm = FakeLLM()
+
+    first = generate_conclusion('AGV17', make_analysis('온도 상승'), llm=llm, cache=cache)
+    # 공백만 다른 요약은 정규화되어 같은 키
+    again = generate_conclusion('AGV17', make_analysis('  온도   상승 '), llm=llm, cache=cache)
+    assert again == first and llm.calls == 1, '같은 입력은 LLM 을 다시 호출하지 않아야 함'
+
+    generate_conclusion('AGV17', make_analysis('온도 상승', ntc=61.0), llm=llm, cache=cache)
+    assert llm.calls == 2, '센서 값이 바뀌면 다시 생성해야 함'
+    generate_conclusion('AGV18', make_analysis('온도 상승'), llm=llm, cache=cache)
+    assert llm.calls == 3, '장비가 다르면 다시 생성해야 함'
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 3, 3), stats
+    assert stats['hit_ratio'] == 0.25, stats
+    print(f"hit/miss     ok  {stats}")
+
+
+def check_ttl(directory):
+    cache = LLMResponseCache(os.path.join(directory, 'ttl.db'), ttl=0.2, max_entries=None)
+    llm = FakeLLM()
+
+    generate_conclusion('AGV17', make_analysis('온도 상승'), llm=llm, cache=cache)
+    generate_conclusion('AGV17', make_analysis('온도 상승'), llm=llm, cache=cache)
+    assert llm.calls == 1
+    time.sleep(0.3)
+    generate_conclusion('AGV17', make_analysis('온도 상승'), llm=llm, cache=cache)
+    assert llm.calls == 2, 'TTL 이 지나면 다시 생성해야 함'
+    print(f"ttl          ok  {cache.stats()}")
+
+
+def check_lru(directory):
+    cache = LLMResponseCache(os.path.join(directory, 'lru.db'), ttl=None, max_entries=2)
+    llm = FakeLLM()
+
+    for device_id in ('AGV17', 'AGV18'):
+        generate_conclusion(device_id, make_analysis('온도 상승'), llm=llm, cache=cache)
+    time.sleep(0.01)
+    generate_conclusion('AGV17', make_analysis('온도 상승'), llm=llm, cache=cache)  # AGV17 최근 사용
+    time.sleep(0.01)
+    generate_conclusion('OHT17', make_analysis('온도 상승'), llm=llm, cache=cache)  # AGV18 삭제
+    assert llm.calls == 3 and cache.stats()['entries'] == 2
+
+    generate_conclusion('AGV17', make_analysis('온도 상승'), llm=llm, cache=cache)
+    assert llm.calls == 3, '최근 사용한 항목은 남아 있어야 함'
+    generate_conclusion('AGV18', make_analysis('온도 상승'), llm=llm, cache=cache)
+    assert llm.calls == 4, '가장 오래 사용하지 않은 항목은 삭제되어야 함'
+    print(f"lru          ok  {cache.stats()}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        check_hit_and_miss(directory)
+        check_ttl(directory)
+        check_lru(directory)
+    print("all checks passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""리포트 1건당 PDF 렌더링 시간 비교 (요청마다 렌더러 생성 vs 일괄 실행에서 렌더러 공유)
+
+요청마다 생성: 템플릿 컴파일 + CSS 파싱 + 글꼴 설정을 리포트마다 반복 (기존 요청 처리 방식)
+공유: 한 렌더러로 여러 리포트 생성 (get_renderer() 스레드 / batch_reports 렌더링 프로세스 방식)
+결론 문단은 고정 문자열을 사용하므로 ChatGPT 호출 시간은 포함하지 않습니다.
+
+사용 예 (프로젝트 루트에서, weasyprint 필요):
+    python -m benchmarks.report_render_bench --reports 20
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app.predict.reports import ReportRenderer
+
+SENSORS = ['NTC', 'PM1_0', 'PM2_5', 'PM10', 'CT1', 'CT2', 'CT3', 'CT4']
+STATES = ['정상', '주의', '경고', '위험']
+CONCLUSION = '전반적인 장비 상태는 양호하나 일부 센서의 값이 상승하고 있어 점검이 필요합니다.'
+
+
+def make_rows(index):
+    """장비 한 대의 (status_row, analysis_row) 생성"""
+    status_row = (STATES[index % 4], f'2025-01-01 00:{index % 60:02d}:00', 70.0, 20.0, 7.0, 3.0)
+    sensor_details = {sensor: {'status': STATES[(index + offset) % 4], 'current_value': 10.0 + offset}
+                      for offset, sensor in enumerate(SENSORS)}
+    analysis_row = (f'2025-01-01 00:{index % 60:02d}:00', status_row[0], '센서 상태 요약',
+                    json.dumps(['NTC 온도 상승'], ensure_ascii=False),
+                    json.dumps(['PM10 농도 증가'], ensure_ascii=False),
+                    json.dumps(['냉각 장치 점검'], ensure_ascii=False),
+                    json.dumps(sensor_details, ensure_ascii=False))
+    return status_row, analysis_row
+
+
+def run(reports, directory, shared):
+    renderer = ReportRenderer() if shared else None
+    start = time.perf_counter()
+    for index in range(reports):
+        status_row, analysis_row = make_rows(index)
+        current = renderer or ReportRenderer()
+        current.render(f'AGV{index:02d}', status_row, analysis_row, CONCLUSION,
+                       os.path.join(directory, f'{"shared" if shared else "fresh"}_{index}.pdf'))
+    return (time.perf_counter() - start) / reports
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fresh = run(args.reports, directory, shared=False)
+        shared = run(args.reports, directory, shared=True)
+
+    print(f"per-request renderer: {fresh * 1000:8.1f} ms/report")
+    print(f"shared renderer:      {shared * 1000:8.1f} ms/report  x{fresh / shared:.2f}")
+
+
+if __name__ == '__main__':
+    main()